@@ -1,33 +1,123 @@
 """Anime endpoints"""
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional
-from app.schemas.anime import BannerAnime, BannerResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, Dict, FrozenSet, List, Optional
+from app.schemas.anime import (
+    AnimeCatalogItem, BannerAnime, BannerResponse, CatalogResponse, HomeFeedResponse
+)
 from app.services.anilist_service import anilist_service
+from app.core.config import settings
 from app.core.errors import AniListException
-from datetime import datetime
+from app.core.http_cache import RenderedCache, conditional_response, serialize, track_sources
+from app.services.query_builder import FIELD_SELECTIONS, FILTER_TYPES, resolve_fields
+import base64
+import binascii
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/anime", tags=["anime"])
 
+# Encoded responses of the endpoints below, keyed by URL
+rendered_cache = RenderedCache(
+    max_size=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    generation=anilist_service.local_generation
+)
 
-@router.get("/trending", response_model=BannerResponse)
+
+def get_projection(
+    view: Optional[str] = Query(None, regex="^(card|banner|full)$", description="Field preset"),
+    fields: Optional[str] = Query(None, description="Comma-separated anime fields")
+) -> Optional[FrozenSet[str]]:
+    """Requested anime fields, None for all of them"""
+    try:
+        return resolve_fields(view, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# Response models of the endpoints taking view/fields describe every anime field;
+# only id, title and coverImage are required there, as in every projection
+PROJECTION_RESPONSES: Dict[int, Dict[str, Any]] = {
+    200: {
+        "description": (
+            "Successful Response. With view or fields, anime objects carry only the selected "
+            "fields (card, banner or the listed ones); id, title and coverImage are always present."
+        )
+    }
+}
+
+
+def each(fields: Optional[FrozenSet[str]]) -> Optional[dict]:
+    """Include spec projecting every anime of a list"""
+    return {"__all__": fields} if fields is not None else None
+
+
+def encode_cursor(
+    filters: Dict[str, Any],
+    page: int,
+    per_page: int,
+    fields: Optional[FrozenSet[str]]
+) -> str:
+    """Opaque crawl position: filters, next page, page size and projection"""
+    state = {"f": filters, "p": page, "n": per_page, "v": sorted(fields) if fields is not None else None}
+    raw = json.dumps(state, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Crawl position from a cursor, HTTP 400 when it was not issued by us"""
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        filters, page, per_page, fields = state["f"], state["p"], state["n"], state["v"]
+        valid = (
+            isinstance(filters, dict) and set(filters) <= set(FILTER_TYPES)
+            and isinstance(page, int) and page >= 1
+            and isinstance(per_page, int) and 1 <= per_page <= 50
+            and (fields is None or (isinstance(fields, list) and set(fields) <= set(FIELD_SELECTIONS)))
+        )
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        valid = False
+    if not valid:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {
+        "filters": filters,
+        "page": page,
+        "per_page": per_page,
+        "fields": frozenset(fields) if fields is not None else None
+    }
+
+
+@router.get("/trending", response_model=BannerResponse, responses=PROJECTION_RESPONSES)
+@rendered_cache.cached
 async def get_trending_anime(
+    request: Request,
     page: int = Query(1, ge=1),
-    limit: int = Query(30, ge=1, le=100)
+    limit: int = Query(30, ge=1, le=100),
+    projection: Optional[FrozenSet[str]] = Depends(get_projection)
 ):
     """
     Get trending anime for home banner
     
     - **page**: Page number (default: 1)
     - **limit**: Items per page (default: 30, max: 100)
+    - **view** / **fields**: Return only card, banner or the listed fields (id, title, coverImage always)
     """
     try:
-        anime_list = await anilist_service.get_trending_anime(page=page, per_page=limit)
-        return BannerResponse(
+        with track_sources() as sources:
+            anime_list = await anilist_service.get_trending_anime(
+                page=page, per_page=limit, fields=projection
+            )
+        response = BannerResponse(
             trending=anime_list,
-            updated_at=datetime.now()
+            updated_at=sources.updated_at
+        )
+        return conditional_response(
+            request, response, BannerResponse, sources,
+            max_age=settings.CACHE_TTL_TRENDING,
+            cache=rendered_cache,
+            include={"trending": each(projection), "updated_at": True} if projection else None
         )
     except AniListException as e:
         logger.error(f"AniList error: {e}")
@@ -37,20 +127,80 @@ async def get_trending_anime(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@router.get("/popular", response_model=List[BannerAnime])
+@router.get("/home", response_model=HomeFeedResponse, responses=PROJECTION_RESPONSES)
+@rendered_cache.cached
+async def get_home_feed(
+    request: Request,
+    limit: int = Query(20, ge=1, le=50),
+    genres: Optional[str] = Query(None, description="Comma-separated genre rows (max: 6)"),
+    projection: Optional[FrozenSet[str]] = Depends(get_projection)
+):
+    """
+    Get home page feed in one request: trending, popular, current season and genre rows
+    
+    - **limit**: Items per section (default: 20, max: 50)
+    - **genres**: Comma-separated genres (default: configured home feed genres)
+    - **view** / **fields**: Return only card, banner or the listed fields (id, title, coverImage always)
+    """
+    genre_list = None
+    if genres is not None:
+        genre_list = [genre.strip() for genre in genres.split(",") if genre.strip()]
+        if len(genre_list) > 6:
+            raise HTTPException(status_code=400, detail="Too many genres (max: 6)")
+    
+    try:
+        with track_sources() as sources:
+            feed = await anilist_service.get_home_feed(
+                per_page=limit, genres=genre_list, fields=projection
+            )
+        return conditional_response(
+            request, feed, HomeFeedResponse, sources,
+            max_age=settings.CACHE_TTL_HOME,
+            cache=rendered_cache,
+            include={
+                "trending": each(projection),
+                "popular": each(projection),
+                "seasonal": each(projection),
+                "genres": {"__all__": each(projection)},
+                "season": True,
+                "seasonYear": True,
+                "updated_at": True
+            } if projection else None
+        )
+    except AniListException as e:
+        logger.error(f"AniList error: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/popular", response_model=List[BannerAnime], responses=PROJECTION_RESPONSES)
+@rendered_cache.cached
 async def get_popular_anime(
+    request: Request,
     page: int = Query(1, ge=1),
-    limit: int = Query(30, ge=1, le=100)
+    limit: int = Query(30, ge=1, le=100),
+    projection: Optional[FrozenSet[str]] = Depends(get_projection)
 ):
     """
     Get popular anime
     
     - **page**: Page number (default: 1)
     - **limit**: Items per page (default: 30, max: 100)
+    - **view** / **fields**: Return only card, banner or the listed fields (id, title, coverImage always)
     """
     try:
-        anime_list = await anilist_service.get_popular_anime(page=page, per_page=limit)
-        return anime_list
+        with track_sources() as sources:
+            anime_list = await anilist_service.get_popular_anime(
+                page=page, per_page=limit, fields=projection
+            )
+        return conditional_response(
+            request, anime_list, List[BannerAnime], sources,
+            max_age=settings.CACHE_TTL_POPULAR,
+            cache=rendered_cache,
+            include=each(projection)
+        )
     except AniListException as e:
         logger.error(f"AniList error: {e}")
         raise HTTPException(status_code=503, detail=str(e))
@@ -59,12 +209,15 @@ async def get_popular_anime(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@router.get("/seasonal", response_model=List[BannerAnime])
+@router.get("/seasonal", response_model=List[BannerAnime], responses=PROJECTION_RESPONSES)
+@rendered_cache.cached
 async def get_seasonal_anime(
+    request: Request,
     season: str = Query(..., regex="^(WINTER|SPRING|SUMMER|FALL)$"),
     year: int = Query(..., ge=1900, le=2100),
     page: int = Query(1, ge=1),
-    limit: int = Query(30, ge=1, le=100)
+    limit: int = Query(30, ge=1, le=100),
+    projection: Optional[FrozenSet[str]] = Depends(get_projection)
 ):
     """
     Get seasonal anime
@@ -73,15 +226,23 @@ async def get_seasonal_anime(
     - **year**: Year (1900-2100)
     - **page**: Page number (default: 1)
     - **limit**: Items per page (default: 30, max: 100)
+    - **view** / **fields**: Return only card, banner or the listed fields (id, title, coverImage always)
     """
     try:
-        anime_list = await anilist_service.get_seasonal_anime(
-            season=season, 
-            year=year, 
-            page=page, 
-            per_page=limit
+        with track_sources() as sources:
+            anime_list = await anilist_service.get_seasonal_anime(
+                season=season, 
+                year=year, 
+                page=page, 
+                per_page=limit,
+                fields=projection
+            )
+        return conditional_response(
+            request, anime_list, List[BannerAnime], sources,
+            max_age=settings.CACHE_TTL_SEASONAL,
+            cache=rendered_cache,
+            include=each(projection)
         )
-        return anime_list
     except AniListException as e:
         logger.error(f"AniList error: {e}")
         raise HTTPException(status_code=503, detail=str(e))
@@ -90,11 +251,14 @@ async def get_seasonal_anime(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@router.get("/genre/{genre}", response_model=List[BannerAnime])
+@router.get("/genre/{genre}", response_model=List[BannerAnime], responses=PROJECTION_RESPONSES)
+@rendered_cache.cached
 async def get_anime_by_genre(
+    request: Request,
     genre: str,
     page: int = Query(1, ge=1),
-    limit: int = Query(30, ge=1, le=100)
+    limit: int = Query(30, ge=1, le=100),
+    projection: Optional[FrozenSet[str]] = Depends(get_projection)
 ):
     """
     Get anime by genre
@@ -102,14 +266,22 @@ async def get_anime_by_genre(
     - **genre**: Genre name (e.g., Action, Comedy, Drama, Romance)
     - **page**: Page number (default: 1)
     - **limit**: Items per page (default: 30, max: 100)
+    - **view** / **fields**: Return only card, banner or the listed fields (id, title, coverImage always)
     """
     try:
-        anime_list = await anilist_service.get_anime_by_genre(
-            genre=genre,
-            page=page,
-            per_page=limit
+        with track_sources() as sources:
+            anime_list = await anilist_service.get_anime_by_genre(
+                genre=genre,
+                page=page,
+                per_page=limit,
+                fields=projection
+            )
+        return conditional_response(
+            request, anime_list, List[BannerAnime], sources,
+            max_age=settings.CACHE_TTL_GENRE,
+            cache=rendered_cache,
+            include=each(projection)
         )
-        return anime_list
     except AniListException as e:
         logger.error(f"AniList error: {e}")
         raise HTTPException(status_code=503, detail=str(e))
@@ -118,11 +290,14 @@ async def get_anime_by_genre(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@router.get("/search", response_model=List[BannerAnime])
+@router.get("/search", response_model=List[BannerAnime], responses=PROJECTION_RESPONSES)
+@rendered_cache.cached
 async def search_anime(
+    request: Request,
     query: str = Query(..., min_length=1),
     page: int = Query(1, ge=1),
-    limit: int = Query(30, ge=1, le=100)
+    limit: int = Query(30, ge=1, le=100),
+    projection: Optional[FrozenSet[str]] = Depends(get_projection)
 ):
     """
     Search anime by title
@@ -130,14 +305,144 @@ async def search_anime(
     - **query**: Search query
     - **page**: Page number (default: 1)
     - **limit**: Items per page (default: 30, max: 100)
+    - **view** / **fields**: Return only card, banner or the listed fields (id, title, coverImage always)
     """
     try:
-        anime_list = await anilist_service.search_anime(
-            query=query,
-            page=page,
-            per_page=limit
+        with track_sources() as sources:
+            anime_list = await anilist_service.search_anime(
+                query=query,
+                page=page,
+                per_page=limit,
+                fields=projection
+            )
+        return conditional_response(
+            request, anime_list, List[BannerAnime], sources,
+            max_age=settings.CACHE_TTL_SEARCH,
+            cache=rendered_cache,
+            include=each(projection)
+        )
+    except AniListException as e:
+        logger.error(f"AniList error: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/batch", response_model=List[BannerAnime], responses=PROJECTION_RESPONSES)
+@rendered_cache.cached
+async def get_anime_batch(
+    request: Request,
+    ids: str = Query(..., min_length=1, description="Comma-separated AniList IDs"),
+    projection: Optional[FrozenSet[str]] = Depends(get_projection)
+):
+    """
+    Get several anime by ID in one request
+    
+    - **ids**: Comma-separated anime IDs from AniList (max: 100)
+    - **view** / **fields**: Return only card, banner or the listed fields (id, title, coverImage always)
+    """
+    try:
+        anime_ids = [int(value) for value in ids.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    if not anime_ids:
+        raise HTTPException(status_code=400, detail="ids must not be empty")
+    if len(anime_ids) > 100:
+        raise HTTPException(status_code=400, detail="Too many ids (max: 100)")
+    
+    try:
+        with track_sources() as sources:
+            anime_list = await anilist_service.get_anime_by_ids(anime_ids)
+        return conditional_response(
+            request, anime_list, List[BannerAnime], sources,
+            max_age=settings.CACHE_TTL_DETAIL,
+            cache=rendered_cache,
+            include=each(projection)
+        )
+    except AniListException as e:
+        logger.error(f"AniList error: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/catalog", response_model=CatalogResponse, responses=PROJECTION_RESPONSES)
+@rendered_cache.cached
+async def get_catalog(
+    request: Request,
+    genre: Optional[str] = Query(None, description="Comma-separated genres, all must match"),
+    season: Optional[str] = Query(None, regex="^(WINTER|SPRING|SUMMER|FALL)$"),
+    year: Optional[int] = Query(None, ge=1900, le=2100),
+    format: Optional[str] = Query(None, description="TV, TV_SHORT, MOVIE, SPECIAL, OVA, ONA, MUSIC"),
+    status: Optional[str] = Query(None, description="FINISHED, RELEASING, NOT_YET_RELEASED, CANCELLED, HIATUS"),
+    sort: str = Query("popularity", regex="^(popularity|score)$"),
+    order: str = Query("desc", regex="^(asc|desc)$"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    projection: Optional[FrozenSet[str]] = Depends(get_projection)
+):
+    """
+    Filter locally indexed anime by several facets at once
+    
+    - **genre**: Comma-separated genres (e.g., Action,Comedy)
+    - **season** / **year**: Season and year, either can be used alone
+    - **format**: Media format
+    - **status**: Release status
+    - **sort**: popularity or score (default: popularity)
+    - **order**: asc or desc (default: desc)
+    - **limit**: Items per page (default: 20, max: 100)
+    - **offset**: Items to skip (default: 0)
+    - **view** / **fields**: Return only card, banner or the listed fields (id, title, coverImage always)
+    """
+    try:
+        genres = [value.strip() for value in genre.split(",") if value.strip()] if genre else None
+        with track_sources() as sources:
+            catalog = await anilist_service.get_catalog(
+                genres=genres,
+                season=season,
+                year=year,
+                format=format,
+                status=status,
+                sort=sort,
+                order=order,
+                limit=limit,
+                offset=offset
+            )
+        return conditional_response(
+            request, catalog, CatalogResponse, sources,
+            max_age=settings.HTTP_CACHE_MAX_AGE_LOCAL,
+            cache=rendered_cache,
+            include={"animes": each(projection), "total": True, "has_more": True} if projection else None
+        )
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/suggest", response_model=List[AnimeCatalogItem])
+@rendered_cache.cached
+async def suggest_anime(
+    request: Request,
+    query: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=20)
+):
+    """
+    Typeahead title suggestions from the local search index
+    
+    - **query**: Title prefix or approximate title
+    - **limit**: Number of suggestions (default: 10, max: 20)
+    """
+    try:
+        with track_sources() as sources:
+            anime_list = await anilist_service.suggest_anime(query=query, limit=limit)
+        items = [AnimeCatalogItem.model_validate(anime, from_attributes=True) for anime in anime_list]
+        return conditional_response(
+            request, items, List[AnimeCatalogItem], sources,
+            max_age=settings.HTTP_CACHE_MAX_AGE_LOCAL,
+            cache=rendered_cache
         )
-        return anime_list
     except AniListException as e:
         logger.error(f"AniList error: {e}")
         raise HTTPException(status_code=503, detail=str(e))
@@ -147,7 +452,9 @@ async def search_anime(
 
 
 @router.get("/genres/popular", response_model=List[str])
+@rendered_cache.cached
 async def get_popular_genres(
+    request: Request,
     limit: int = Query(10, ge=1, le=20)
 ):
     """
@@ -156,8 +463,13 @@ async def get_popular_genres(
     - **limit**: Number of genres (default: 10, max: 20)
     """
     try:
-        genres = await anilist_service.get_popular_genres(limit=limit)
-        return genres
+        with track_sources() as sources:
+            genres = await anilist_service.get_popular_genres(limit=limit)
+        return conditional_response(
+            request, genres, List[str], sources,
+            max_age=settings.HTTP_CACHE_MAX_AGE_LOCAL,
+            cache=rendered_cache
+        )
     except AniListException as e:
         logger.error(f"AniList error: {e}")
         raise HTTPException(status_code=503, detail=str(e))
@@ -166,20 +478,100 @@ async def get_popular_genres(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@router.get("/{anime_id}", response_model=BannerAnime)
+async def crawl_lines(
+    filters: Dict[str, Any],
+    page: int,
+    per_page: int,
+    max_pages: Optional[int],
+    fields: Optional[FrozenSet[str]]
+) -> AsyncIterator[bytes]:
+    """NDJSON lines of a crawl: anime objects, then a cursor line after every page"""
+    resume = encode_cursor(filters, page, per_page, fields)
+    try:
+        async for page, anime_list, has_more in anilist_service.crawl(
+            filters, start_page=page, per_page=per_page, max_pages=max_pages, fields=fields
+        ):
+            for anime in anime_list:
+                yield serialize(anime, BannerAnime, fields) + b"\n"
+            resume = encode_cursor(filters, page + 1, per_page, fields) if has_more else None
+            yield json.dumps({"page": page, "next_cursor": resume}).encode("utf-8") + b"\n"
+    except AniListException as e:
+        logger.error(f"AniList error during crawl: {e}")
+        yield json.dumps({"error": str(e), "next_cursor": resume}).encode("utf-8") + b"\n"
+    except Exception as e:
+        logger.error(f"Unexpected error during crawl: {e}")
+        yield json.dumps({"error": "Internal server error", "next_cursor": resume}).encode("utf-8") + b"\n"
+
+
+@router.get("/crawl")
+async def crawl_anime(
+    season: Optional[str] = Query(None, regex="^(WINTER|SPRING|SUMMER|FALL)$"),
+    year: Optional[int] = Query(None, ge=1900, le=2100),
+    genre: Optional[str] = None,
+    format: Optional[str] = None,
+    status: Optional[str] = None,
+    per_page: int = Query(50, ge=1, le=50),
+    max_pages: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    projection: Optional[FrozenSet[str]] = Depends(get_projection)
+):
+    """
+    Stream every matching anime as NDJSON, paging through AniList internally
+    
+    Each anime is one line. After every page a line {"page", "next_cursor"} follows;
+    next_cursor is null once the list is exhausted. On failure a line {"error",
+    "next_cursor"} ends the stream. Pass a cursor to resume, filters are taken from it.
+    
+    - **season** / **year** / **genre** / **format** / **status**: Filters
+    - **per_page**: AniList page size (default: 50, max: 50)
+    - **max_pages**: Stop after this many pages, resume with the last cursor
+    - **cursor**: Resume a previous crawl
+    - **view** / **fields**: Return only card, banner or the listed fields (id, title, coverImage always)
+    """
+    if cursor is not None:
+        state = decode_cursor(cursor)
+    else:
+        state = {
+            "filters": anilist_service.crawl_filters(
+                season=season, year=year, genre=genre, format=format, status=status
+            ),
+            "page": 1,
+            "per_page": per_page,
+            "fields": projection
+        }
+    return StreamingResponse(
+        crawl_lines(
+            state["filters"], state["page"], state["per_page"], max_pages, state["fields"]
+        ),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-store"}
+    )
+
+
+@router.get("/{anime_id}", response_model=BannerAnime, responses=PROJECTION_RESPONSES)
+@rendered_cache.cached
 async def get_anime_by_id(
+    request: Request,
     anime_id: int,
+    projection: Optional[FrozenSet[str]] = Depends(get_projection)
 ):
     """
     Get anime by ID
     
     - **anime_id**: Anime ID from AniList
+    - **view** / **fields**: Return only card, banner or the listed fields (id, title, coverImage always)
     """
     try:
-        anime = await anilist_service.get_anime_by_id(anime_id=anime_id)
+        with track_sources() as sources:
+            anime = await anilist_service.get_anime_by_id(anime_id=anime_id)
         if not anime:
             raise HTTPException(status_code=404, detail="Anime not found")
-        return anime
+        return conditional_response(
+            request, anime, BannerAnime, sources,
+            max_age=settings.CACHE_TTL_DETAIL,
+            cache=rendered_cache,
+            include=projection
+        )
     except AniListException as e:
         logger.error(f"AniList error: {e}")
         raise HTTPException(status_code=503, detail=str(e))
@@ -1,5 +1,6 @@
 """Health check endpoints"""
 from fastapi import APIRouter
+from app.services.anilist_service import anilist_service
 
 router = APIRouter(tags=["health"])
 
@@ -16,8 +17,10 @@ async def root():
 
 @router.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """Health check endpoint, degraded while the AniList circuit is not closed"""
+    breaker = anilist_service.breaker.snapshot()
     return {
-        "status": "healthy",
-        "version": "1.0.0"
+        "status": "healthy" if breaker["state"] == "closed" else "degraded",
+        "version": "1.0.0",
+        "anilist": breaker
     }
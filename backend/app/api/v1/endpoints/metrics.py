@@ -0,0 +1,104 @@
+"""Prometheus metrics endpoint"""
+from typing import Iterable, Tuple
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.api.v1.endpoints.anime import rendered_cache
+from app.core.metrics import Samples, registry
+from app.services.anilist_service import anilist_service
+from app.services.media_parser import description_cache
+
+router = APIRouter(tags=["metrics"])
+
+
+def collect_service_metrics() -> Iterable[Tuple[str, str, str, Samples]]:
+    """Cache, pool, limiter and breaker figures read at scrape time"""
+    stats = anilist_service.get_stats()
+    cache = stats["cache"]
+    rendered = rendered_cache.stats()
+    descriptions = description_cache.stats()
+
+    yield "anilist_cache_lookups", "counter", "AniList response cache lookups by result", [
+        ({"result": "hit"}, cache["hits"]),
+        ({"result": "shared_hit"}, cache["shared_hits"]),
+        ({"result": "miss"}, cache["misses"]),
+    ]
+    yield "anilist_cache_stale_served", "counter", "Expired AniList responses served (SWR or outage)", [
+        ({}, cache["stale_served"]),
+    ]
+    yield "rendered_cache_lookups", "counter", "Encoded API response cache lookups by result", [
+        ({"result": "hit"}, rendered["hits"] - rendered["not_modified"]),
+        ({"result": "not_modified"}, rendered["not_modified"]),
+        ({"result": "miss"}, rendered["misses"]),
+    ]
+    yield "description_cache_lookups", "counter", "Cleaned description memo lookups by result", [
+        ({"result": "hit"}, descriptions["hits"]),
+        ({"result": "miss"}, descriptions["misses"]),
+    ]
+    yield "cache_hit_ratio", "gauge", "Hit ratio since start per cache", [
+        ({"cache": "anilist"}, cache["hit_rate"]),
+        ({"cache": "rendered"}, rendered["hit_rate"]),
+        ({"cache": "description"}, descriptions["hit_rate"]),
+        ({"cache": "prefetch"}, stats["prefetch"]["hit_ratio"]),
+    ]
+    yield "cache_entries", "gauge", "Entries held per cache", [
+        ({"cache": "anilist"}, cache["size"]),
+        ({"cache": "rendered"}, rendered["size"]),
+        ({"cache": "description"}, descriptions["size"]),
+    ]
+    yield "cache_evictions", "counter", "LRU evictions per cache", [
+        ({"cache": "anilist"}, cache["evictions"]),
+        ({"cache": "rendered"}, rendered["evictions"]),
+        ({"cache": "description"}, descriptions["evictions"]),
+    ]
+    yield "anilist_prefetches", "counter", "Next-page prefetches by outcome", [
+        ({"outcome": outcome}, stats["prefetch"][outcome])
+        for outcome in ("scheduled", "completed", "hits", "skipped", "shed", "failed")
+    ]
+    yield "anilist_singleflight_calls", "counter", "Upstream calls and callers coalesced onto them", [
+        ({"kind": "upstream"}, stats["singleflight"]["upstream_calls"]),
+        ({"kind": "coalesced"}, stats["singleflight"]["coalesced"]),
+    ]
+
+    pool = stats["pool"]
+    yield "anilist_pool_connections", "gauge", "Pooled AniList connections by state", [
+        ({"state": "idle"}, pool["idle"]),
+        ({"state": "active"}, pool["connections"] - pool["idle"]),
+    ]
+    yield "anilist_pool_max_connections", "gauge", "Configured AniList pool size", [
+        ({}, pool["max_connections"]),
+    ]
+    yield "anilist_pool_requests", "gauge", "AniList requests holding or waiting for a connection", [
+        ({"state": "in_flight"}, pool["in_flight"]),
+        ({"state": "waiting"}, pool["waiting"]),
+    ]
+
+    limiter = stats["rate_limiter"]
+    yield "anilist_rate_limit_tokens", "gauge", "Rate limiter tokens available", [({}, limiter["tokens"])]
+    yield "anilist_rate_limit_queued", "gauge", "Requests waiting for a rate limiter token", [
+        ({"priority": priority}, count) for priority, count in limiter["queued_by_priority"].items()
+    ]
+    yield "anilist_rate_limit_events", "counter", "Rate limiter events", [
+        ({"event": "throttled"}, limiter["throttled"]),
+        ({"event": "retry"}, limiter["retries"]),
+        ({"event": "shed"}, limiter["shed"]),
+    ]
+
+    breaker = stats["circuit_breaker"]
+    yield "anilist_circuit_state", "gauge", "1 for the current circuit breaker state", [
+        ({"state": state}, 1 if breaker["state"] == state else 0) for state in ("closed", "open", "half_open")
+    ]
+    yield "anilist_circuit_events", "counter", "Circuit breaker openings and rejected calls", [
+        ({"event": "opened"}, breaker["opened"]),
+        ({"event": "rejected"}, breaker["rejected"]),
+    ]
+
+
+registry.add_collector(collect_service_metrics)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Metrics in the Prometheus text exposition format"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
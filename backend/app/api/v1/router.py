@@ -1,6 +1,7 @@
 """API v1 router with all endpoints"""
 from fastapi import APIRouter
-from app.api.v1.endpoints import anime, health
+from app.api.v1.endpoints import anime, health, metrics
+from app.core.config import settings
 
 # Create main API v1 router
 router = APIRouter(prefix="/api/v1")
@@ -8,3 +9,5 @@ router = APIRouter(prefix="/api/v1")
 # Include endpoint routers
 router.include_router(anime.router)
 router.include_router(health.router)
+if settings.METRICS_ENABLED:
+    router.include_router(metrics.router)
@@ -1,6 +1,6 @@
 """Application configuration"""
 from pydantic_settings import BaseSettings
-from pydantic import Field
+from pydantic import model_validator
 from typing import Optional
 
 
@@ -10,13 +10,27 @@ class Settings(BaseSettings):
     # App
     APP_NAME: str = "Vilibrity API"
     APP_VERSION: str = "1.0.0"
-    DEBUG: bool = True
     ENV: str = "development"
+    # Unset: enabled only when ENV is development
+    DEBUG: Optional[bool] = None
     
     # Server
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     
+    # Production server (python -m app.server); SERVER_WORKERS=0 starts one per CPU.
+    # Keep-alive should outlast the load balancer idle timeout; on shutdown workers
+    # stop accepting, let requests finish for GRACEFUL_SHUTDOWN seconds and then
+    # give background AniList calls DRAIN_TIMEOUT seconds before cancelling them
+    SERVER_WORKERS: int = 1
+    SERVER_KEEPALIVE_TIMEOUT: int = 65
+    SERVER_BACKLOG: int = 2048
+    SERVER_LIMIT_CONCURRENCY: Optional[int] = None
+    SERVER_GRACEFUL_SHUTDOWN: int = 20
+    SERVER_DRAIN_TIMEOUT: float = 5.0
+    SERVER_FORWARDED_ALLOW_IPS: str = "127.0.0.1"
+    SERVER_ACCESS_LOG: bool = False
+    
     # API
     API_V1_STR: str = "/api/v1"
     
@@ -27,6 +41,118 @@ class Settings(BaseSettings):
     ANILIST_API_URL: str = "https://graphql.anilist.co"
     ANILIST_TIMEOUT: int = 10
     
+    # AniList HTTP client (shared connection pool)
+    ANILIST_HTTP2: bool = True
+    ANILIST_MAX_CONNECTIONS: int = 20
+    ANILIST_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    ANILIST_KEEPALIVE_EXPIRY: float = 30.0
+    ANILIST_CONNECT_TIMEOUT: float = 5.0
+    ANILIST_READ_TIMEOUT: float = 10.0
+    ANILIST_WRITE_TIMEOUT: float = 5.0
+    ANILIST_POOL_TIMEOUT: float = 5.0
+    
+    # AniList rate limiting and retries
+    ANILIST_RATE_LIMIT_PER_MINUTE: int = 90
+    ANILIST_RATE_LIMIT_BURST: int = 10
+    ANILIST_QUEUE_TIMEOUT: float = 10.0
+    ANILIST_MAX_RETRIES: int = 2
+    ANILIST_BACKOFF_BASE: float = 0.5
+    ANILIST_BACKOFF_MAX: float = 10.0
+    
+    # Circuit breaker: opens when ERROR_RATE of the last WINDOW calls failed or
+    # SLOW_CALL_RATE took SLOW_CALL_SECONDS or longer; fails fast (or serves stale
+    # cache) for OPEN_SECONDS, then lets HALF_OPEN_CALLS probes decide
+    CIRCUIT_BREAKER_ENABLED: bool = True
+    CIRCUIT_BREAKER_WINDOW: int = 20
+    CIRCUIT_BREAKER_MIN_CALLS: int = 5
+    CIRCUIT_BREAKER_ERROR_RATE: float = 0.5
+    CIRCUIT_BREAKER_SLOW_CALL_SECONDS: float = 5.0
+    CIRCUIT_BREAKER_SLOW_CALL_RATE: float = 0.8
+    CIRCUIT_BREAKER_OPEN_SECONDS: float = 30.0
+    CIRCUIT_BREAKER_HALF_OPEN_CALLS: int = 1
+    
+    # Response cache: in-process LRU + optional shared tier (none, memory, redis, mmap)
+    CACHE_ENABLED: bool = True
+    CACHE_MAX_ENTRIES: int = 1000
+    CACHE_SHARED_BACKEND: str = "none"
+    REDIS_URL: Optional[str] = None
+    
+    # mmap shared tier: one file for all workers of a host (default /dev/shm/vilibrity-cache);
+    # a worker fetching a key holds its fill lock, others wait up to FILL_LOCK_TIMEOUT seconds
+    CACHE_MMAP_PATH: str = ""
+    CACHE_MMAP_SIZE_MB: int = 64
+    CACHE_MMAP_SLOTS: int = 8192
+    CACHE_FILL_LOCK_TIMEOUT: float = 15.0
+    
+    # Cache TTLs per query type (seconds)
+    CACHE_TTL_TRENDING: int = 900
+    CACHE_TTL_POPULAR: int = 3600
+    CACHE_TTL_SEASONAL: int = 3600
+    CACHE_TTL_GENRE: int = 3600
+    CACHE_TTL_SEARCH: int = 300
+    CACHE_TTL_DETAIL: int = 21600
+    CACHE_TTL_HOME: int = 900
+    
+    # Stale-while-revalidate: expired entries are kept for CACHE_STALE_TTL seconds,
+    # served instantly for hot lists and whenever AniList is unavailable
+    CACHE_SWR_ENABLED: bool = True
+    CACHE_STALE_TTL: int = 86400
+    
+    # Background cache warmer (hot keys as "type:page:limit", type: trending, popular, seasonal)
+    CACHE_WARM_ENABLED: bool = True
+    CACHE_WARM_INTERVAL: int = 60
+    CACHE_WARM_AHEAD: int = 120
+    CACHE_WARM_KEYS: str = "trending:1:10,trending:1:30,popular:1:30,seasonal:1:30"
+    # Fetch hot keys during startup, before the worker accepts requests
+    CACHE_PREWARM_ENABLED: bool = True
+    CACHE_PREWARM_TIMEOUT: float = 15.0
+    
+    # Snapshot of cached responses and indexed anime, written every INTERVAL seconds
+    # (0: only on shutdown) and loaded at startup so restarted workers start warm
+    CACHE_SNAPSHOT_ENABLED: bool = True
+    CACHE_SNAPSHOT_PATH: str = "cache_snapshot.bin"
+    CACHE_SNAPSHOT_INTERVAL: int = 300
+    
+    # Local catalog mirror (SQLite) with incremental sync from AniList
+    CATALOG_MIRROR_ENABLED: bool = False
+    CATALOG_DB_PATH: str = "catalog.sqlite3"
+    CATALOG_SYNC_INTERVAL: int = 3600
+    CATALOG_SYNC_MAX_PAGES: int = 100
+    CATALOG_SYNC_PAGE_SIZE: int = 50
+    # Lists are read from the mirror only while its last completed sync is younger than this
+    CATALOG_MAX_AGE: int = 10800
+    
+    # Speculative prefetch of page N+1 after serving page N of these list types;
+    # prefetches only use spare rate limit budget, keeping PREFETCH_MIN_TOKENS for users
+    PREFETCH_ENABLED: bool = True
+    PREFETCH_QUERY_TYPES: str = "popular,genre,seasonal"
+    PREFETCH_MIN_TOKENS: float = 3.0
+    
+    # Streaming crawls: AniList pages fetched ahead of the client (bounds memory too)
+    CRAWL_CONCURRENCY: int = 2
+    
+    # Home feed: genre rows fetched together with trending/popular/seasonal
+    HOME_FEED_GENRES: str = "Action,Romance,Comedy,Fantasy"
+    
+    # Browser/CDN caching of API responses: max-age follows the cache TTLs above,
+    # responses served from local indexes use HTTP_CACHE_MAX_AGE_LOCAL
+    HTTP_CACHE_MAX_AGE_LOCAL: int = 300
+    HTTP_CACHE_STALE_WHILE_REVALIDATE: int = 60
+    
+    # Encoded JSON responses per URL, served on hits without rebuilding models
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_MAX_ENTRIES: int = 500
+    
+    # Cleaned AniList descriptions per (media id, raw text hash)
+    DESCRIPTION_CACHE_MAX_ENTRIES: int = 5000
+    
+    # Prometheus text metrics on /api/v1/metrics and per-route request timing
+    METRICS_ENABLED: bool = True
+    
+    # gzip/brotli response compression (brotli needs the brotli package)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    
     # External APIs
     EXTERNAL_API_TIMEOUT: int = 15
     
@@ -34,6 +160,13 @@ class Settings(BaseSettings):
         env_file = ".env"
         case_sensitive = True
     
+    @model_validator(mode="after")
+    def default_debug(self) -> "Settings":
+        """Debug mode follows ENV unless set explicitly"""
+        if self.DEBUG is None:
+            self.DEBUG = self.ENV == "development"
+        return self
+    
     def get_cors_origins(self) -> list:
         """Convert CORS_ORIGINS string to list"""
         if isinstance(self.CORS_ORIGINS, str):
@@ -11,6 +11,16 @@ class AniListException(VilibrityException):
     pass
 
 
+class AniListRateLimitException(AniListException):
+    """Exception for AniList rate limit exhaustion"""
+    pass
+
+
+class AniListUnavailableException(AniListException):
+    """Exception for calls rejected while the AniList circuit breaker is open"""
+    pass
+
+
 class ExternalAPIException(VilibrityException):
     """Exception for external API errors"""
     pass
@@ -0,0 +1,338 @@
+"""HTTP conditional GET support: ETag, Last-Modified, Cache-Control"""
+import hashlib
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from email.utils import formatdate, parsedate_to_datetime
+from functools import lru_cache, wraps
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from app.core.compression import compress, negotiate
+from app.core.config import settings
+from app.services.cache import LRUCache
+
+# Unique per process so in-memory index versions never collide across restarts
+BOOT_ID = f"{time.time():.6f}"
+
+# (tag, fetched_at, expires_at) of every data source used while building a response;
+# tag is None when a source has no precomputed content hash
+_sources: ContextVar[Optional[List[Tuple[Optional[str], float, Optional[float]]]]] = ContextVar(
+    "response_sources", default=None
+)
+
+
+def record_source(tag: Optional[str], fetched_at: float, expires_at: Optional[float] = None) -> None:
+    """Register data used by the current response"""
+    sources = _sources.get()
+    if sources is not None:
+        sources.append((tag, fetched_at, expires_at))
+
+
+class SourceTracker:
+    """Collects data sources recorded while building a response
+
+    Trackers nest: sources seen by an inner tracker are passed on to the outer one.
+    """
+
+    def __init__(self):
+        self.sources: List[Tuple[Optional[str], float, Optional[float]]] = []
+        self._parent = None
+        self._token = None
+
+    def __enter__(self) -> "SourceTracker":
+        self._parent = _sources.get()
+        self._token = _sources.set(self.sources)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        _sources.reset(self._token)
+        if self._parent is not None:
+            self._parent.extend(self.sources)
+
+    @property
+    def fetched_at(self) -> Optional[float]:
+        """When the newest piece of data was fetched"""
+        return max((source[1] for source in self.sources), default=None)
+
+    @property
+    def updated_at(self) -> datetime:
+        """Fetch time for response bodies, now when nothing was recorded"""
+        fetched_at = self.fetched_at
+        return datetime.fromtimestamp(fetched_at) if fetched_at is not None else datetime.now()
+
+    @property
+    def expires_at(self) -> Optional[float]:
+        """When the first piece of data expires"""
+        return min((source[2] for source in self.sources if source[2] is not None), default=None)
+
+    @property
+    def has_local(self) -> bool:
+        """Whether any source is local data without an expiry (mirror or index)"""
+        return any(source[2] is None for source in self.sources)
+
+    def etag(self, request: Request) -> Optional[str]:
+        """Combine precomputed source hashes, None if any source has none"""
+        if not self.sources or any(source[0] is None for source in self.sources):
+            return None
+        digest = hashlib.sha1(str(request.url.path).encode("utf-8"))
+        digest.update(str(request.url.query).encode("utf-8"))
+        for tag in sorted({source[0] for source in self.sources}):
+            digest.update(tag.encode("utf-8"))
+        return f'W/"{digest.hexdigest()[:32]}"'
+
+
+def track_sources() -> SourceTracker:
+    """Start collecting data sources for the current response"""
+    return SourceTracker()
+
+
+@lru_cache(maxsize=None)
+def _adapter(response_type: Any) -> TypeAdapter:
+    """Cached serializer for a response type"""
+    return TypeAdapter(response_type)
+
+
+def serialize(content: Any, response_type: Any, include: Any = None) -> bytes:
+    """Encode response content to JSON like FastAPI's response_model does
+
+    include is a pydantic include spec for sparse fieldsets.
+    """
+    return _adapter(response_type).dump_json(content, by_alias=True, include=include)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check If-None-Match against an ETag (weak comparison)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
+
+def not_modified_since(request: Request, last_modified: float) -> bool:
+    """Check If-Modified-Since (only used without If-None-Match)"""
+    header = request.headers.get("if-modified-since")
+    if not header or request.headers.get("if-none-match"):
+        return False
+    try:
+        return int(last_modified) <= int(parsedate_to_datetime(header).timestamp())
+    except (TypeError, ValueError):
+        return False
+
+
+def cache_headers(
+    etag: str,
+    last_modified: Optional[float],
+    max_age: int,
+    stale_while_revalidate: int = 0
+) -> dict:
+    """Validator and freshness headers"""
+    cache_control = f"public, max-age={max(0, int(max_age))}"
+    if stale_while_revalidate:
+        cache_control += f", stale-while-revalidate={stale_while_revalidate}"
+    headers = {
+        "ETag": etag,
+        "Cache-Control": cache_control,
+        "Vary": "Accept-Encoding",
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+    return headers
+
+
+@dataclass
+class RenderedResponse:
+    """Encoded response body with its validators"""
+    body: bytes
+    etag: str
+    last_modified: Optional[float]
+    max_age: int
+    stale_while_revalidate: int
+    # None for data with a known expiry, otherwise local data versions the body was built from
+    expires_at: Optional[float]
+    generation: Any = None
+    # Compressed bodies per content coding, built on first request for each
+    variants: Dict[str, bytes] = field(default_factory=dict)
+
+    def encoded(self, request: Request) -> Tuple[bytes, Optional[str]]:
+        """Body in the best coding accepted by the client"""
+        if not settings.COMPRESSION_ENABLED or len(self.body) < settings.COMPRESSION_MIN_SIZE:
+            return self.body, None
+        encoding = negotiate(request.headers.get("accept-encoding", ""))
+        if encoding is None:
+            return self.body, None
+        variant = self.variants.get(encoding)
+        if variant is None:
+            variant = self.variants[encoding] = compress(self.body, encoding, static=True)
+        return variant, encoding
+
+    def to_response(self, request: Request, headers: dict) -> Response:
+        """Raw response with a stored body variant"""
+        body, encoding = self.encoded(request)
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type="application/json", headers=headers)
+
+
+class RenderedCache:
+    """Encoded JSON responses keyed by URL, served without rebuilding models
+
+    Entries live until the first upstream cache entry they were built from expires.
+    Entries built from the mirror or in-memory indexes are kept while the
+    generation callable returns the same value.
+    """
+
+    def __init__(self, max_size: int = 500, generation: Optional[Callable[[], Any]] = None):
+        self.local = LRUCache(max_size)
+        self.generation = generation
+        self.hits = 0
+        self.not_modified = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(request: Request) -> str:
+        """Path with sorted query parameters"""
+        return f"{request.url.path}?{urlencode(sorted(request.query_params.multi_items()))}"
+
+    def lookup(self, request: Request) -> Optional[Response]:
+        """Cached response for the request, None on miss"""
+        key = self.make_key(request)
+        rendered = self.local.get(key)
+        if rendered is None:
+            self.misses += 1
+            return None
+        now = time.time()
+        if (rendered.expires_at is not None and rendered.expires_at <= now) or (
+            rendered.generation is not None and self.generation is not None
+            and rendered.generation != self.generation()
+        ):
+            self.local.delete(key)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        max_age = rendered.max_age
+        if rendered.expires_at is not None:
+            max_age = min(max_age, int(rendered.expires_at - now))
+        headers = cache_headers(rendered.etag, rendered.last_modified, max_age, rendered.stale_while_revalidate)
+        if etag_matches(request, rendered.etag) or (
+            rendered.last_modified is not None and not_modified_since(request, rendered.last_modified)
+        ):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return rendered.to_response(request, headers)
+
+    def store(
+        self,
+        request: Request,
+        body: bytes,
+        etag: str,
+        sources: SourceTracker,
+        max_age: int,
+        stale_while_revalidate: int
+    ) -> Optional[RenderedResponse]:
+        """Keep encoded body when its freshness can be tracked"""
+        if not sources.sources:
+            return None
+        expires_at = sources.expires_at
+        if expires_at is not None and expires_at <= time.time():
+            # Built from stale data, a refresh is already on the way
+            return None
+        generation = None
+        if sources.has_local:
+            if self.generation is None:
+                return None
+            generation = self.generation()
+        rendered = RenderedResponse(
+            body=body,
+            etag=etag,
+            last_modified=sources.fetched_at,
+            max_age=max_age,
+            stale_while_revalidate=stale_while_revalidate,
+            expires_at=expires_at,
+            generation=generation
+        )
+        self.local.set(self.make_key(request), rendered)
+        return rendered
+
+    def cached(self, endpoint: Callable) -> Callable:
+        """Serve the endpoint from cache when possible (endpoint must take `request`)"""
+        @wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            if settings.CACHE_ENABLED and settings.RESPONSE_CACHE_ENABLED:
+                response = self.lookup(kwargs["request"])
+                if response is not None:
+                    return response
+            return await endpoint(*args, **kwargs)
+        return wrapper
+
+    def clear(self) -> None:
+        """Drop all rendered responses"""
+        self.local.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.local),
+            "max_size": self.local.max_size,
+            "hits": self.hits,
+            "not_modified": self.not_modified,
+            "misses": self.misses,
+            "evictions": self.local.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+def conditional_response(
+    request: Request,
+    content: Any,
+    response_type: Any,
+    sources: SourceTracker,
+    max_age: int,
+    stale_while_revalidate: Optional[int] = None,
+    cache: Optional[RenderedCache] = None,
+    include: Any = None
+) -> Response:
+    """JSON response with ETag/Last-Modified that answers 304 when the client copy is current
+
+    With cache the encoded body is stored for later requests to the same URL.
+    """
+    if stale_while_revalidate is None:
+        stale_while_revalidate = settings.HTTP_CACHE_STALE_WHILE_REVALIDATE
+    body = None
+    etag = sources.etag(request)
+    if etag is None:
+        body = serialize(content, response_type, include)
+        etag = f'W/"{hashlib.sha1(body).hexdigest()[:32]}"'
+
+    remaining = max_age
+    if sources.expires_at is not None:
+        remaining = min(max_age, int(sources.expires_at - time.time()))
+    headers = cache_headers(etag, sources.fetched_at, remaining, stale_while_revalidate)
+
+    if etag_matches(request, etag) or (
+        sources.fetched_at is not None and not_modified_since(request, sources.fetched_at)
+    ):
+        return Response(status_code=304, headers=headers)
+
+    if body is None:
+        body = serialize(content, response_type, include)
+    if cache is not None and settings.CACHE_ENABLED and settings.RESPONSE_CACHE_ENABLED:
+        rendered = cache.store(request, body, etag, sources, max_age, stale_while_revalidate)
+        if rendered is not None:
+            return rendered.to_response(request, headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,220 @@
+"""In-process metrics rendered in the Prometheus text exposition format"""
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Upper bounds in seconds, from cache hits to AniList timeouts
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# (labels, value) of one metric family
+Samples = List[Tuple[Dict[str, str], float]]
+
+
+def _escape(value: str) -> str:
+    """Escape a label value"""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    """{name="value",...} or nothing"""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    """Sample value, integers without a fraction"""
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with labels"""
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Add amount to the series of the given labels"""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def lines(self) -> List[str]:
+        """Exposition lines of all series"""
+        return [
+            f"{self.name}_total{_format_labels(dict(zip(self.labelnames, key)))} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class Histogram:
+    """Cumulative bucket histogram with labels"""
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> (per-bucket counts, sum, count)
+        self._series: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record one observation"""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[0][i] += 1
+                break
+        series[1] += value
+        series[2] += 1
+
+    def lines(self) -> List[str]:
+        """Exposition lines: cumulative buckets, sum and count per series"""
+        lines = []
+        for key, (counts, total, count) in sorted(self._series.items()):
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, counts):
+                cumulative += bucket
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class Registry:
+    """Metrics to expose; collectors add values read from components at scrape time"""
+
+    def __init__(self):
+        self._metrics: List = []
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, Samples]]]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Create and register a counter"""
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        """Create and register a histogram"""
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, Samples]]]) -> None:
+        """Register a callable yielding (name, type, help, samples) families on every scrape"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Text exposition of every metric"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.lines())
+        for collector in self._collectors:
+            for name, metric_type, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                suffix = "_total" if metric_type == "counter" else ""
+                lines.extend(
+                    f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples
+                )
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+UPSTREAM_LATENCY = registry.histogram(
+    "anilist_request_duration_seconds",
+    "AniList HTTP request latency per attempt",
+    ["query_type"]
+)
+UPSTREAM_RESPONSES = registry.counter(
+    "anilist_responses",
+    "AniList HTTP responses by status code",
+    ["query_type", "status"]
+)
+UPSTREAM_ERRORS = registry.counter(
+    "anilist_errors",
+    "Failed AniList attempts by error class (timeout, transport, http, graphql, rate_limited, "
+    "queue_timeout, circuit_open, unexpected)",
+    ["query_type", "error"]
+)
+PARSE_ERRORS = registry.counter(
+    "anilist_parse_errors",
+    "AniList media items skipped because they could not be parsed"
+)
+HTTP_DURATION = registry.histogram(
+    "http_request_duration_seconds",
+    "API request duration until the last body chunk was sent",
+    ["method", "route"]
+)
+HTTP_REQUESTS = registry.counter(
+    "http_requests",
+    "API requests by route and status code",
+    ["method", "route", "status"]
+)
+
+
+class MetricsMiddleware:
+    """Record duration and status of every HTTP request per route template"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status: Optional[int] = None
+        finished = False
+
+        def observe(status_code: int) -> None:
+            # The router stores the matched route in scope; unmatched paths share one label
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            HTTP_DURATION.observe(time.perf_counter() - started, method=scope["method"], route=path)
+            HTTP_REQUESTS.inc(method=scope["method"], route=path, status=str(status_code))
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, finished
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                finished = True
+                observe(status or 500)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not finished:
+                observe(status or 500)
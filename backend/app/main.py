@@ -1,9 +1,16 @@
 """Main FastAPI application"""
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.core.compression import CompressionMiddleware
+from app.core.metrics import MetricsMiddleware
 from contextlib import asynccontextmanager
 from app.core.config import settings
 from app.api.v1.router import router as api_v1_router
+from app.services.anilist_service import anilist_service
+from app.services.cache_snapshot import CacheSnapshotter
+from app.services.cache_warmer import CacheWarmer
+from app.services.catalog_sync import CatalogSync
+import asyncio
 import logging
 
 # Configure logging
@@ -18,9 +25,62 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     """Application lifespan context"""
     # Startup
+    await anilist_service.startup()
+    snapshots = settings.CACHE_ENABLED and settings.CACHE_SNAPSHOT_ENABLED
+    if snapshots:
+        await anilist_service.load_snapshot(settings.CACHE_SNAPSHOT_PATH)
+    # Lifespan startup finishes before the server accepts connections, so a worker
+    # only reports ready once hot keys are cached (or the timeout passed)
+    if settings.CACHE_ENABLED and settings.CACHE_PREWARM_ENABLED:
+        try:
+            warmed = await asyncio.wait_for(anilist_service.warm_hot_keys(), settings.CACHE_PREWARM_TIMEOUT)
+            logger.info(f"Pre-warmed {warmed} hot cache keys")
+        except asyncio.TimeoutError:
+            logger.warning(f"Cache pre-warm timed out after {settings.CACHE_PREWARM_TIMEOUT}s")
+        except Exception as e:
+            logger.warning(f"Cache pre-warm failed: {e}")
+    app.state.cache_warmer = None
+    if settings.CACHE_ENABLED and settings.CACHE_WARM_ENABLED:
+        app.state.cache_warmer = CacheWarmer(
+            anilist_service,
+            interval=settings.CACHE_WARM_INTERVAL,
+            ahead=settings.CACHE_WARM_AHEAD
+        )
+        app.state.cache_warmer.start()
+    app.state.catalog_sync = None
+    if anilist_service.catalog is not None:
+        app.state.catalog_sync = CatalogSync(
+            anilist_service,
+            anilist_service.catalog,
+            interval=settings.CATALOG_SYNC_INTERVAL,
+            max_pages=settings.CATALOG_SYNC_MAX_PAGES,
+            page_size=settings.CATALOG_SYNC_PAGE_SIZE
+        )
+        app.state.catalog_sync.start()
+    app.state.cache_snapshotter = None
+    if snapshots:
+        app.state.cache_snapshotter = CacheSnapshotter(
+            anilist_service,
+            settings.CACHE_SNAPSHOT_PATH,
+            interval=settings.CACHE_SNAPSHOT_INTERVAL
+        )
+        app.state.cache_snapshotter.start()
     logger.info(f"{settings.APP_NAME} v{settings.APP_VERSION} started")
     yield
     # Shutdown
+    if app.state.cache_warmer is not None:
+        await app.state.cache_warmer.stop()
+    if app.state.catalog_sync is not None:
+        await app.state.catalog_sync.stop()
+    if app.state.cache_snapshotter is not None:
+        await app.state.cache_snapshotter.stop()
+    await anilist_service.shutdown(drain_timeout=settings.SERVER_DRAIN_TIMEOUT)
+    # After draining, so refreshes that just finished are included
+    if snapshots:
+        try:
+            await anilist_service.save_snapshot(settings.CACHE_SNAPSHOT_PATH)
+        except Exception as e:
+            logger.warning(f"Cache snapshot failed: {e}")
     logger.info(f"{settings.APP_NAME} v{settings.APP_VERSION} shutdown")
 
 
@@ -52,6 +112,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Add response compression (precompressed cached responses pass through)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE)
+
+# Request duration per route, outermost so it covers compression too
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(api_v1_router)
 
@@ -68,10 +136,5 @@ async def api_info():
 
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(
-        "app.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True
-    )
+    from app.server import main
+    main(reload=settings.ENV == "development")
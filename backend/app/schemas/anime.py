@@ -1,6 +1,6 @@
 """Schemas for anime data"""
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 
 
@@ -43,6 +43,24 @@ class BannerResponse(BaseModel):
     updated_at: datetime
 
 
+class HomeFeedResponse(BaseModel):
+    """Response for the composite home page feed"""
+    trending: List[BannerAnime]
+    popular: List[BannerAnime]
+    seasonal: List[BannerAnime]
+    genres: Dict[str, List[BannerAnime]]
+    season: str
+    seasonYear: int
+    updated_at: datetime
+
+
+class CatalogResponse(BaseModel):
+    """Response for filtered catalog page"""
+    animes: List[BannerAnime]
+    total: int
+    has_more: bool
+
+
 class AnimeCatalogItem(BaseModel):
     """Single anime item for lists"""
     id: int
@@ -0,0 +1,69 @@
+"""Production server launcher configured from Settings
+
+Run from backend/: python -m app.server
+"""
+import argparse
+import importlib.util
+import logging
+import os
+from typing import Any, Dict
+
+import uvicorn
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _installed(module: str) -> bool:
+    """Whether an optional module can be imported"""
+    return importlib.util.find_spec(module) is not None
+
+
+def worker_count() -> int:
+    """Configured workers, one per CPU when SERVER_WORKERS is 0"""
+    if settings.SERVER_WORKERS > 0:
+        return settings.SERVER_WORKERS
+    return os.cpu_count() or 1
+
+
+def uvicorn_options(reload: bool = False) -> Dict[str, Any]:
+    """uvicorn.run keyword arguments for the current settings"""
+    options = {
+        "host": settings.HOST,
+        "port": settings.PORT,
+        # uvloop and httptools come with uvicorn[standard]; fall back to the pure Python ones
+        "loop": "uvloop" if _installed("uvloop") else "asyncio",
+        "http": "httptools" if _installed("httptools") else "h11",
+        "backlog": settings.SERVER_BACKLOG,
+        "timeout_keep_alive": settings.SERVER_KEEPALIVE_TIMEOUT,
+        "timeout_graceful_shutdown": settings.SERVER_GRACEFUL_SHUTDOWN,
+        "limit_concurrency": settings.SERVER_LIMIT_CONCURRENCY,
+        "proxy_headers": True,
+        "forwarded_allow_ips": settings.SERVER_FORWARDED_ALLOW_IPS,
+        "access_log": settings.SERVER_ACCESS_LOG,
+        "log_level": "debug" if settings.DEBUG else "info",
+    }
+    if reload:
+        options["reload"] = True
+    else:
+        options["workers"] = worker_count()
+    return options
+
+
+def main(reload: bool = False) -> None:
+    """Serve app.main:app, with auto-reload for development"""
+    options = uvicorn_options(reload)
+    logger.info(
+        f"Starting {settings.APP_NAME} on {options['host']}:{options['port']} "
+        f"(env={settings.ENV}, workers={options.get('workers', 1)}, loop={options['loop']}, http={options['http']})"
+    )
+    uvicorn.run("app.main:app", **options)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=f"{settings.APP_NAME} server")
+    parser.add_argument("--reload", action="store_true", help="restart on code changes (development)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    main(reload=args.reload)
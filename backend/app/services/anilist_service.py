@@ -1,478 +1,1219 @@
 """Service for interacting with AniList API"""
 import httpx
 import asyncio
-from typing import Dict, List, Optional, Any
+import itertools
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, FrozenSet, List, Optional, Any, Set, Tuple
 from datetime import datetime
 from app.core.config import settings
-from app.core.errors import AniListException
-from app.schemas.anime import BannerAnime, CoverImage
+from app.core.errors import AniListException, AniListRateLimitException, AniListUnavailableException
+from app.core.http_cache import BOOT_ID, record_source, track_sources
+from app.core.metrics import UPSTREAM_ERRORS, UPSTREAM_LATENCY, UPSTREAM_RESPONSES
+from app.schemas.anime import BannerAnime, CatalogResponse, HomeFeedResponse
+from app.services.cache import CacheEntry, LRUCache, ResponseCache, create_shared_backend
+from app.services.cache_snapshot import read_snapshot, write_snapshot
+from app.services.singleflight import SingleFlight
+from app.services.rate_limiter import Priority, RateLimiter, RequestShed, backoff_delay
+from app.services.catalog_store import CatalogStore
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.search_index import SearchIndex
+from app.services.facet_index import FacetIndex
+from app.services.media_parser import description_cache, parse_media, parse_media_list
+from app.services.query_builder import (
+    CompiledQuery, aliased_page_query, compiled_stats, media_query, page_query
+)
 import logging
-import re
 
 logger = logging.getLogger(__name__)
 
 
+def current_season(now: Optional[datetime] = None) -> Tuple[str, int]:
+    """Current AniList season and year"""
+    now = now or datetime.now()
+    seasons = ["WINTER", "WINTER", "WINTER", "SPRING", "SPRING", "SPRING",
+               "SUMMER", "SUMMER", "SUMMER", "FALL", "FALL", "FALL"]
+    return seasons[now.month - 1], now.year
+
+
 class AniListService:
     """Service for AniList API interactions"""
     
     BASE_URL = settings.ANILIST_API_URL
     TIMEOUT = settings.ANILIST_TIMEOUT
     
-    # GraphQL queries
-    TRENDING_ANIME_QUERY = """
-    query ($page: Int, $perPage: Int) {
-        Page(page: $page, perPage: $perPage) {
-            media(sort: TRENDING_DESC, type: ANIME, status: RELEASING) {
-                id
-                title {
-                    romaji
-                    english
-                    native
-                }
-                description
-                coverImage {
-                    large
-                    medium
-                    color
-                }
-                bannerImage
-                meanScore
-                popularity
-                status
-                episodes
-                genres
-                startDate {
-                    year
-                    month
-                    day
-                }
-                season
-                seasonYear
-                format
-                studios(isMain: true) {
-                    nodes {
-                        name
-                    }
-                }
-            }
-        }
-    }
-    """
-    
-    POPULAR_ANIME_QUERY = """
-    query ($page: Int, $perPage: Int) {
-        Page(page: $page, perPage: $perPage) {
-            media(sort: POPULARITY_DESC, type: ANIME) {
-                id
-                title {
-                    romaji
-                    english
-                }
-                description
-                coverImage {
-                    large
-                    medium
-                    color
-                }
-                bannerImage
-                meanScore
-                popularity
-                status
-                episodes
-                genres
-                startDate {
-                    year
-                    month
-                    day
-                }
-                season
-                seasonYear
-                format
-                studios(isMain: true) {
-                    nodes {
-                        name
-                    }
-                }
-            }
-        }
-    }
-    """
-    
-    SEASONAL_ANIME_QUERY = """
-    query ($page: Int, $perPage: Int, $season: MediaSeason, $seasonYear: Int) {
-        Page(page: $page, perPage: $perPage) {
-            media(season: $season, seasonYear: $seasonYear, type: ANIME, sort: POPULARITY_DESC) {
-                id
-                title {
-                    romaji
-                    english
-                }
-                description
-                coverImage {
-                    large
-                    medium
-                    color
-                }
-                bannerImage
-                meanScore
-                popularity
-                status
-                episodes
-                genres
-                startDate {
-                    year
-                    month
-                    day
-                }
-                season
-                seasonYear
-                format
-                studios(isMain: true) {
-                    nodes {
-                        name
-                    }
-                }
-            }
-        }
+    # Media filters of the list queries (see query_builder.FILTER_TYPES)
+    TRENDING_FILTERS = {"sort": ["TRENDING_DESC"], "status": "RELEASING"}
+    POPULAR_FILTERS = {"sort": ["POPULARITY_DESC"]}
+    
+    # Catalog mirror sync: most recently updated media first
+    CATALOG_SYNC_FILTERS = {"sort": ["UPDATED_AT_DESC"]}
+    CATALOG_SYNC_EXTRA = ("synonyms", "trending", "updatedAt")
+    
+    # Raw fields fetched with details on top of BannerAnime (titles for the search index)
+    DETAIL_EXTRA = ("synonyms",)
+    
+    # AniList Page size limit for id_in lookups
+    BATCH_SIZE = 50
+    
+    # Crawls page in id order, stable while popularity and scores change mid-crawl
+    CRAWL_SORT = ["ID"]
+    
+    # Маппинг русских жанров на английские
+    GENRE_MAPPING = {
+        "Экшен": "Action",
+        "action": "Action",
+        "Романтика": "Romance",
+        "romance": "Romance",
+        "Комедия": "Comedy",
+        "comedy": "Comedy",
+        "Драма": "Drama",
+        "drama": "Drama",
+        "Фэнтези": "Fantasy",
+        "fantasy": "Fantasy",
+        "Приключения": "Adventure",
+        "adventure": "Adventure",
+        "Научная фантастика": "Sci-Fi",
+        "scifi": "Sci-Fi",
+        "Ужасы": "Horror",
+        "horror": "Horror",
+        "Мистика": "Mystery",
+        "mystery": "Mystery",
+        "Спорт": "Sports",
+        "sports": "Sports",
+        "Триллер": "Thriller",
+        "thriller": "Thriller",
+        "Сверхъестественное": "Supernatural",
+        "supernatural": "Supernatural",
+        "Историческое": "Historical",
+        "historical": "Historical"
     }
-    """
-    
-    GENRE_ANIME_QUERY = """
-    query ($page: Int, $perPage: Int, $genre: String) {
-        Page(page: $page, perPage: $perPage) {
-            media(genre: $genre, type: ANIME, sort: POPULARITY_DESC) {
-                id
-                title {
-                    romaji
-                    english
-                    native
-                }
-                description
-                coverImage {
-                    large
-                    medium
-                    color
-                }
-                bannerImage
-                meanScore
-                popularity
-                status
-                episodes
-                genres
-                startDate {
-                    year
-                    month
-                    day
-                }
-                season
-                seasonYear
-                format
-                studios(isMain: true) {
-                    nodes {
-                        name
-                    }
-                }
-            }
-        }
+    
+    # Shared HTTP client, created in the application lifespan
+    _client: Optional[httpx.AsyncClient] = None
+    
+    # Response cache keyed on (query, variables)
+    cache = ResponseCache(max_size=settings.CACHE_MAX_ENTRIES, stale_ttl=settings.CACHE_STALE_TTL)
+    
+    # Coalesces identical concurrent upstream queries
+    inflight = SingleFlight()
+    
+    # Token bucket in front of every upstream call
+    rate_limiter = RateLimiter(
+        rate_per_minute=settings.ANILIST_RATE_LIMIT_PER_MINUTE,
+        burst=settings.ANILIST_RATE_LIMIT_BURST,
+        speculative_reserve=settings.PREFETCH_MIN_TOKENS
+    )
+    
+    # Fails upstream calls fast while AniList is erroring or too slow
+    breaker = CircuitBreaker(
+        window=settings.CIRCUIT_BREAKER_WINDOW,
+        min_calls=settings.CIRCUIT_BREAKER_MIN_CALLS,
+        error_rate=settings.CIRCUIT_BREAKER_ERROR_RATE,
+        slow_call_seconds=settings.CIRCUIT_BREAKER_SLOW_CALL_SECONDS,
+        slow_call_rate=settings.CIRCUIT_BREAKER_SLOW_CALL_RATE,
+        open_seconds=settings.CIRCUIT_BREAKER_OPEN_SECONDS,
+        half_open_calls=settings.CIRCUIT_BREAKER_HALF_OPEN_CALLS,
+        enabled=settings.CIRCUIT_BREAKER_ENABLED
+    )
+    
+    # Local catalog mirror, opened in startup when CATALOG_MIRROR_ENABLED
+    catalog: Optional[CatalogStore] = None
+    
+    # Local title index, filled from parsed and mirrored media
+    search_index = SearchIndex()
+    
+    # Genre/season/format/status indexes for local catalog filtering
+    facet_index = FacetIndex()
+    
+    # Background refresh tasks (stale-while-revalidate)
+    _background_tasks: Set[asyncio.Task] = set()
+    
+    # Next-page prefetches: running tasks and prefetched keys not requested yet
+    _prefetching: Dict[str, asyncio.Task] = {}
+    _prefetched = LRUCache(1000)
+    prefetch_counts = {"scheduled": 0, "completed": 0, "hits": 0, "skipped": 0, "shed": 0, "failed": 0}
+    
+    # Warm-restart snapshot: last load and save
+    snapshot_info = {"loaded_entries": 0, "loaded_anime": 0, "saved_entries": 0, "saved_bytes": 0, "saved_at": None}
+    
+    # Search counters
+    _search_local = 0
+    _search_fallbacks = 0
+    
+    # Cache TTL per query type
+    CACHE_TTLS = {
+        "trending": settings.CACHE_TTL_TRENDING,
+        "popular": settings.CACHE_TTL_POPULAR,
+        "seasonal": settings.CACHE_TTL_SEASONAL,
+        "genre": settings.CACHE_TTL_GENRE,
+        "search": settings.CACHE_TTL_SEARCH,
+        "detail": settings.CACHE_TTL_DETAIL,
+        "home": settings.CACHE_TTL_HOME,
     }
-    """
-    
-    SEARCH_ANIME_QUERY = """
-    query ($page: Int, $perPage: Int, $search: String) {
-        Page(page: $page, perPage: $perPage) {
-            media(search: $search, type: ANIME) {
-                id
-                title {
-                    romaji
-                    english
-                    native
-                }
-                description
-                coverImage {
-                    large
-                    medium
-                    color
-                }
-                bannerImage
-                meanScore
-                popularity
-                status
-                episodes
-                genres
-                startDate {
-                    year
-                    month
-                    day
-                }
-                season
-                seasonYear
-                format
-                studios(isMain: true) {
-                    nodes {
-                        name
-                    }
-                }
+    
+    @classmethod
+    def _build_client(cls) -> httpx.AsyncClient:
+        """Create pooled keep-alive HTTP client for AniList"""
+        http2 = settings.ANILIST_HTTP2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("h2 package is not installed, AniList client falls back to HTTP/1.1")
+                http2 = False
+        
+        logger.debug(
+            f"AniList client: http2={http2}, max_connections={settings.ANILIST_MAX_CONNECTIONS}, "
+            f"keepalive={settings.ANILIST_MAX_KEEPALIVE_CONNECTIONS}"
+        )
+        return httpx.AsyncClient(
+            http2=http2,
+            timeout=httpx.Timeout(
+                cls.TIMEOUT,
+                connect=settings.ANILIST_CONNECT_TIMEOUT,
+                read=settings.ANILIST_READ_TIMEOUT,
+                write=settings.ANILIST_WRITE_TIMEOUT,
+                pool=settings.ANILIST_POOL_TIMEOUT
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.ANILIST_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.ANILIST_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.ANILIST_KEEPALIVE_EXPIRY
+            ),
+            headers={
+                "Content-Type": "application/json",
+                "Accept": "application/json"
             }
+        )
+    
+    @classmethod
+    async def startup(cls) -> None:
+        """Open shared HTTP client"""
+        if cls._client is None or cls._client.is_closed:
+            cls._client = cls._build_client()
+            logger.info("AniList client started")
+        if cls.cache.shared is None:
+            cls.cache.shared = create_shared_backend(
+                settings.CACHE_SHARED_BACKEND,
+                settings.REDIS_URL,
+                mmap_path=settings.CACHE_MMAP_PATH or None,
+                mmap_size=settings.CACHE_MMAP_SIZE_MB * 1024 * 1024,
+                mmap_slots=settings.CACHE_MMAP_SLOTS
+            )
+        if settings.CATALOG_MIRROR_ENABLED and cls.catalog is None:
+            cls.catalog = await asyncio.to_thread(CatalogStore, settings.CATALOG_DB_PATH)
+            logger.info(f"Catalog mirror opened: {settings.CATALOG_DB_PATH} (ready={cls.catalog.ready})")
+            for anime, titles in await asyncio.to_thread(cls.catalog.search_records):
+                cls.search_index.add(anime, titles)
+                cls.facet_index.add(anime)
+    
+    @classmethod
+    async def shutdown(cls, drain_timeout: float = 0.0) -> None:
+        """Close shared HTTP client and release pooled connections
+
+        Background refreshes still talking to AniList get drain_timeout seconds
+        to finish before they are cancelled; speculative prefetches are dropped.
+        """
+        for task in list(cls._prefetching.values()):
+            task.cancel()
+        pending = [task for task in cls._background_tasks if not task.done()]
+        if pending and drain_timeout > 0:
+            logger.info(f"Draining {len(pending)} background AniList calls")
+            _, pending = await asyncio.wait(pending, timeout=drain_timeout)
+        for task in pending:
+            task.cancel()
+        await cls.cache.close()
+        cls.cache.shared = None
+        if cls.catalog is not None:
+            cls.catalog.close()
+            cls.catalog = None
+        if cls._client is not None:
+            await cls._client.aclose()
+            cls._client = None
+            logger.info("AniList client closed")
+    
+    @classmethod
+    async def save_snapshot(cls, path: str) -> int:
+        """Write cached responses still within the stale window and indexed anime to path"""
+        now = time.time()
+        entries = [
+            (key, entry) for key, entry in cls.cache.local.items()
+            if now < entry.expires_at + cls.cache.stale_ttl
+        ]
+        # The catalog mirror reloads the indexes on its own
+        anime = cls.search_index.records() if cls.catalog is None else []
+        size = await asyncio.to_thread(write_snapshot, path, entries, anime)
+        cls.snapshot_info.update(saved_entries=len(entries), saved_bytes=size, saved_at=now)
+        logger.info(f"Cache snapshot written: {len(entries)} entries, {len(anime)} anime, {size} bytes")
+        return size
+    
+    @classmethod
+    async def load_snapshot(cls, path: str) -> int:
+        """Restore cache entries and indexed anime from a snapshot, returns restored entries
+
+        Entries keep their original expiry: fresh ones are served as usual, expired
+        ones only within the stale window (and get revalidated).
+        """
+        try:
+            snapshot = await asyncio.to_thread(read_snapshot, path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Cache snapshot {path} not loaded, starting with an empty cache: {e}")
+            return 0
+        if snapshot is None:
+            return 0
+        written_at, entries, anime = snapshot
+        now = time.time()
+        restored = 0
+        for key, entry in entries:
+            if now < entry.expires_at + cls.cache.stale_ttl and cls.cache.peek(key) is None:
+                cls.cache.local.set(key, entry)
+                restored += 1
+        for item, titles in anime:
+            cls.search_index.add(item, titles)
+            cls.facet_index.add(item)
+        cls.snapshot_info.update(loaded_entries=restored, loaded_anime=len(anime))
+        logger.info(
+            f"Cache snapshot loaded: {restored} entries, {len(anime)} anime "
+            f"(written {now - written_at:.0f}s ago)"
+        )
+        return restored
+    
+    @classmethod
+    def get_stats(cls) -> Dict[str, Any]:
+        """Runtime statistics of the service"""
+        return {
+            "cache": cls.cache.stats(),
+            "singleflight": cls.inflight.stats(),
+            "rate_limiter": cls.rate_limiter.snapshot(),
+            "circuit_breaker": cls.breaker.snapshot(),
+            "pool": cls.pool_stats(),
+            "snapshot": dict(cls.snapshot_info),
+            "catalog": {
+                "enabled": cls.catalog is not None,
+                "ready": cls.catalog is not None and cls.catalog.ready,
+                "fresh": cls.catalog is not None and cls.catalog.is_fresh(settings.CATALOG_MAX_AGE)
+            },
+            "search_index": {
+                **cls.search_index.stats(),
+                "local_served": cls._search_local,
+                "upstream_fallbacks": cls._search_fallbacks
+            },
+            "facet_index": cls.facet_index.stats(),
+            "prefetch": cls.prefetch_stats(),
+            "descriptions": description_cache.stats(),
+            "compiled_queries": compiled_stats()
         }
-    }
-    """
-    
-    ANIME_BY_ID_QUERY = """
-    query ($id: Int) {
-        Media(id: $id, type: ANIME) {
-            id
-            title {
-                romaji
-                english
-                native
-            }
-            description
-            coverImage {
-                large
-                medium
-                color
-            }
-            bannerImage
-            meanScore
-            popularity
-            status
-            episodes
-            duration
-            genres
-            startDate {
-                year
-                month
-                day
-            }
-            endDate {
-                year
-                month
-                day
-            }
-            season
-            seasonYear
-            format
-            studios(isMain: true) {
-                nodes {
-                    name
-                }
-            }
-            synonyms
-            trailer {
-                id
-                site
-            }
-            nextAiringEpisode {
-                airingAt
-                episode
-            }
+    
+    @classmethod
+    def local_generation(cls) -> Tuple:
+        """Versions of mirrored and indexed data, changes whenever any of it does"""
+        return (
+            cls.search_index.version,
+            cls.facet_index.version,
+            cls.catalog.changed_at if cls.catalog is not None else None
+        )
+    
+    @classmethod
+    def _get_client(cls) -> httpx.AsyncClient:
+        """Return shared HTTP client, creating it lazily outside of lifespan"""
+        if cls._client is None or cls._client.is_closed:
+            cls._client = cls._build_client()
+        return cls._client
+    
+    @classmethod
+    def pool_stats(cls) -> Dict[str, Any]:
+        """Connection pool usage of the shared client"""
+        stats = {
+            "max_connections": settings.ANILIST_MAX_CONNECTIONS,
+            "connections": 0,
+            "idle": 0,
+            "in_flight": 0,
+            "waiting": 0
         }
-    }
-    """
+        pool = getattr(getattr(cls._client, "_transport", None), "_pool", None)
+        if pool is None or cls._client.is_closed:
+            return stats
+        connections = list(getattr(pool, "connections", []))
+        stats["connections"] = len(connections)
+        stats["idle"] = sum(1 for connection in connections if connection.is_idle())
+        requests = list(getattr(pool, "_requests", []))
+        stats["waiting"] = sum(1 for request in requests if getattr(request, "connection", None) is None)
+        stats["in_flight"] = len(requests) - stats["waiting"]
+        return stats
     
     @classmethod
-    async def _make_request(cls, query: str, variables: Optional[Dict] = None) -> Dict[str, Any]:
-        """Make a request to AniList API"""
+    async def _make_request(
+        cls,
+        query: CompiledQuery,
+        variables: Optional[Dict] = None,
+        query_type: Optional[str] = None,
+        stale_while_revalidate: bool = False,
+        priority: Priority = Priority.NORMAL
+    ) -> Dict[str, Any]:
+        """Make a request to AniList API, served from cache when possible"""
+        ttl = cls.CACHE_TTLS.get(query_type, 0) if settings.CACHE_ENABLED else 0
+        key = cls.cache.make_key(query.digest, variables)
+        stale = None
+        if ttl:
+            entry = await cls.cache.get(key, allow_stale=True)
+            if entry is not None:
+                if entry.is_fresh():
+                    cls._count_prefetch_hit(key)
+                    record_source(entry.etag, entry.fetched_at, entry.expires_at)
+                    return entry.value
+                if stale_while_revalidate and settings.CACHE_SWR_ENABLED:
+                    cls._schedule_refresh(key, query, variables, ttl, query_type)
+                    cls.cache.stale_served += 1
+                    record_source(entry.etag, entry.fetched_at, entry.expires_at)
+                    return entry.value
+                stale = entry
+            
+            # Join a running prefetch of this page instead of fetching it a second time.
+            # The prefetch is not shared through inflight: a shed speculative fetch must
+            # not fail the user request, which falls through to a normal fetch instead.
+            prefetch = cls._prefetching.get(key)
+            if prefetch is not None:
+                try:
+                    await asyncio.shield(prefetch)
+                except asyncio.CancelledError:
+                    if not prefetch.cancelled() or asyncio.current_task().cancelling():
+                        raise
+                entry = cls.cache.peek(key)
+                if entry is not None and entry.is_fresh():
+                    cls._count_prefetch_hit(key)
+                    record_source(entry.etag, entry.fetched_at, entry.expires_at)
+                    return entry.value
+        
         try:
-            async with httpx.AsyncClient(timeout=cls.TIMEOUT) as client:
-                response = await client.post(
-                    cls.BASE_URL,
-                    json={"query": query, "variables": variables or {}},
-                    headers={"Content-Type": "application/json"}
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                if "errors" in data:
-                    logger.error(f"AniList API Error: {data['errors']}")
-                    raise AniListException(f"AniList API Error: {data['errors']}")
-                
-                return data.get("data", {})
-        except httpx.TimeoutException:
-            logger.error("Request to AniList timed out")
-            raise AniListException("Request to AniList timed out")
-        except httpx.HTTPError as e:
-            logger.error(f"HTTP Error: {e}")
-            raise AniListException(f"Failed to connect to AniList: {str(e)}")
-        except Exception as e:
-            logger.error(f"Unexpected error: {e}")
-            raise AniListException(f"Unexpected error: {str(e)}")
+            # Concurrent callers with the same query share one upstream request
+            data = await cls.inflight.do(
+                key,
+                lambda: cls._fetch_and_store(key, query, variables, ttl, priority, query_type)
+            )
+        except AniListException as e:
+            if stale is None:
+                raise
+            logger.warning(f"AniList unavailable, serving stale {query_type} data: {e}")
+            cls.cache.stale_served += 1
+            record_source(stale.etag, stale.fetched_at, stale.expires_at)
+            return stale.value
+        
+        entry = cls.cache.peek(key) if ttl else None
+        if entry is not None:
+            record_source(entry.etag, entry.fetched_at, entry.expires_at)
+        return data
     
     @classmethod
-    async def get_trending_anime(cls, page: int = 1, per_page: int = 30) -> List[BannerAnime]:
-        """Get trending anime for banner"""
+    async def _fetch_and_store(
+        cls,
+        key: str,
+        query: CompiledQuery,
+        variables: Optional[Dict],
+        ttl: int,
+        priority: Priority = Priority.NORMAL,
+        query_type: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Fetch query from AniList and store the result in cache
+
+        Cached queries hold the shared tier's fill lock while fetching, so other
+        worker processes wait for this fetch instead of repeating it.
+        """
+        if not ttl:
+            return await cls._fetch(query, variables, priority, query_type)
+        async with cls.cache.fill_lock(key, settings.CACHE_FILL_LOCK_TIMEOUT) as locked:
+            if locked:
+                # Another worker may have stored it while we waited for the lock
+                entry = await cls.cache.get_shared(key)
+                if entry is not None:
+                    return entry.value
+            data = await cls._fetch(query, variables, priority, query_type)
+            await cls.cache.set(key, data, ttl)
+        return data
+    
+    @classmethod
+    def _schedule_refresh(
+        cls,
+        key: str,
+        query: CompiledQuery,
+        variables: Optional[Dict],
+        ttl: int,
+        query_type: Optional[str] = None
+    ) -> None:
+        """Refresh cache entry in a background task"""
+        if cls.inflight.is_running(key):
+            return
+        task = asyncio.create_task(cls._refresh(key, query, variables, ttl, query_type))
+        cls._background_tasks.add(task)
+        task.add_done_callback(cls._background_tasks.discard)
+    
+    @classmethod
+    async def _refresh(
+        cls,
+        key: str,
+        query: CompiledQuery,
+        variables: Optional[Dict],
+        ttl: int,
+        query_type: Optional[str] = None
+    ) -> None:
+        """Refetch cache entry, keeping the old one if AniList fails
+
+        A running prefetch of the same key is joined first; the entry is only
+        refetched when the prefetch was shed or failed.
+        """
+        prefetch = cls._prefetching.get(key)
+        if prefetch is not None:
+            await asyncio.wait([prefetch])
+            entry = cls.cache.peek(key)
+            if entry is not None and entry.is_fresh():
+                return
         try:
-            data = await cls._make_request(cls.TRENDING_ANIME_QUERY, {"page": page, "perPage": per_page})
-            
-            anime_list = []
-            for media in data.get("Page", {}).get("media", []):
-                try:
-                    banner_anime = cls._parse_anime_to_banner(media)
-                    anime_list.append(banner_anime)
-                except Exception as e:
-                    logger.warning(f"Failed to parse anime {media.get('id')}: {e}")
-                    continue
-            
-            return anime_list
-        except AniListException:
-            raise
+            await cls.inflight.do(
+                key,
+                lambda: cls._fetch_and_store(key, query, variables, ttl, Priority.LOW, query_type)
+            )
         except Exception as e:
-            logger.error(f"Error getting trending anime: {e}")
-            raise AniListException(f"Error getting trending anime: {str(e)}")
+            logger.warning(f"Background refresh failed: {e}")
     
     @classmethod
-    async def get_popular_anime(cls, page: int = 1, per_page: int = 30) -> List[BannerAnime]:
-        """Get popular anime"""
+    def _schedule_prefetch(
+        cls,
+        filters: Dict[str, Any],
+        page: int,
+        per_page: int,
+        query_type: str,
+        fields: Optional[FrozenSet[str]] = None
+    ) -> None:
+        """Fetch a list page into the cache in the background before it is requested"""
+        if not (settings.CACHE_ENABLED and settings.PREFETCH_ENABLED):
+            return
+        if query_type not in {t.strip() for t in settings.PREFETCH_QUERY_TYPES.split(",")}:
+            return
+        query, variables = page_query(filters, fields, page, per_page)
+        key = cls.cache.make_key(query.digest, variables)
+        if key in cls._prefetching or cls.inflight.is_running(key):
+            return
+        entry = cls.cache.peek(key)
+        if entry is not None and entry.is_fresh():
+            return
+        if cls.rate_limiter.budget() < 1 + settings.PREFETCH_MIN_TOKENS:
+            cls.prefetch_counts["skipped"] += 1
+            return
+        cls.prefetch_counts["scheduled"] += 1
+        task = asyncio.create_task(cls._prefetch(key, query, variables, cls.CACHE_TTLS[query_type], query_type))
+        cls._prefetching[key] = task
+        cls._background_tasks.add(task)
+        task.add_done_callback(cls._background_tasks.discard)
+    
+    @classmethod
+    async def _prefetch(cls, key: str, query: CompiledQuery, variables: Dict, ttl: int, query_type: str) -> None:
+        """Speculative fetch, dropped by the rate limiter when there is no spare budget"""
         try:
-            data = await cls._make_request(cls.POPULAR_ANIME_QUERY, {"page": page, "perPage": per_page})
+            await cls._fetch_and_store(key, query, variables, ttl, Priority.SPECULATIVE, query_type)
+            cls._prefetched.set(key, True)
+            cls.prefetch_counts["completed"] += 1
+        except RequestShed:
+            cls.prefetch_counts["shed"] += 1
+        except Exception as e:
+            cls.prefetch_counts["failed"] += 1
+            logger.debug(f"Prefetch failed: {e}")
+        finally:
+            cls._prefetching.pop(key, None)
+    
+    @classmethod
+    def _count_prefetch_hit(cls, key: str) -> None:
+        """Count the first request served from a prefetched entry"""
+        if cls._prefetched.peek(key) is not None:
+            cls._prefetched.delete(key)
+            cls.prefetch_counts["hits"] += 1
+    
+    @classmethod
+    def prefetch_stats(cls) -> Dict[str, Any]:
+        """Prefetch counters; hit_ratio is the share of completed prefetches that were used"""
+        completed = cls.prefetch_counts["completed"]
+        return {
+            **cls.prefetch_counts,
+            "running": len(cls._prefetching),
+            "hit_ratio": round(cls.prefetch_counts["hits"] / completed, 4) if completed else 0.0
+        }
+    
+    @classmethod
+    def _hot_queries(cls) -> List[Tuple[CompiledQuery, Dict, str]]:
+        """Queries kept warm by the cache warmer (CACHE_WARM_KEYS)"""
+        queries = []
+        for spec in settings.CACHE_WARM_KEYS.split(","):
+            parts = spec.strip().split(":")
+            if not parts[0]:
+                continue
+            query_type = parts[0]
+            page = int(parts[1]) if len(parts) > 1 else 1
+            per_page = int(parts[2]) if len(parts) > 2 else 30
+            if query_type == "trending":
+                queries.append((*page_query(cls.TRENDING_FILTERS, page=page, per_page=per_page), query_type))
+            elif query_type == "popular":
+                queries.append((*page_query(cls.POPULAR_FILTERS, page=page, per_page=per_page), query_type))
+            elif query_type == "seasonal":
+                season, year = current_season()
+                queries.append((
+                    *page_query(cls.seasonal_filters(season, year), page=page, per_page=per_page),
+                    query_type
+                ))
+            else:
+                logger.warning(f"Unknown hot key type in CACHE_WARM_KEYS: {query_type}")
+        return queries
+    
+    @classmethod
+    async def warm_hot_keys(cls, ahead: int = 0) -> int:
+        """Refresh hot queries that are missing or expire within `ahead` seconds"""
+        if not settings.CACHE_ENABLED:
+            return 0
+        refreshed = 0
+        now = time.time()
+        for query, variables, query_type in cls._hot_queries():
+            key = cls.cache.make_key(query.digest, variables)
+            entry = cls.cache.peek(key)
+            if entry is not None and entry.expires_at - now > ahead:
+                continue
+            await cls._refresh(key, query, variables, cls.CACHE_TTLS[query_type], query_type)
+            refreshed += 1
+        return refreshed
+    
+    @classmethod
+    async def _fetch(
+        cls,
+        query: CompiledQuery,
+        variables: Optional[Dict] = None,
+        priority: Priority = Priority.NORMAL,
+        query_type: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Send query to AniList API, retrying throttled and transient failures"""
+        max_retries = settings.ANILIST_MAX_RETRIES
+        label = query_type or "other"
+        for attempt in range(max_retries + 1):
+            # Fail fast instead of waiting for timeouts while AniList is down
+            if not cls.breaker.allow():
+                UPSTREAM_ERRORS.inc(query_type=label, error="circuit_open")
+                raise AniListUnavailableException(
+                    f"AniList unavailable, retry in {cls.breaker.retry_after():.0f}s"
+                )
+            try:
+                await cls.rate_limiter.acquire(priority, timeout=settings.ANILIST_QUEUE_TIMEOUT)
+            except asyncio.TimeoutError:
+                cls.breaker.release()
+                UPSTREAM_ERRORS.inc(query_type=label, error="queue_timeout")
+                logger.error("AniList rate limit budget exhausted")
+                raise AniListRateLimitException("AniList rate limit budget exhausted")
+            except BaseException:
+                # Shed or cancelled before reaching AniList
+                cls.breaker.release()
+                raise
             
-            anime_list = []
-            for media in data.get("Page", {}).get("media", []):
-                try:
-                    banner_anime = cls._parse_anime_to_banner(media)
-                    anime_list.append(banner_anime)
-                except Exception as e:
-                    logger.warning(f"Failed to parse anime {media.get('id')}: {e}")
-                    continue
+            # Delay before retry; None means exponential backoff
+            retry_delay = None
+            response = None
+            started = time.monotonic()
+            try:
+                response = await cls._get_client().post(
+                    cls.BASE_URL,
+                    json={"query": query.text, "variables": variables or {}}
+                )
+                duration = time.monotonic() - started
+                cls.rate_limiter.update_from_headers(response.headers, response.status_code)
+                # 429 and 4xx answers still mean AniList is up
+                cls.breaker.record(response.status_code < 500, duration, f"HTTP {response.status_code}")
+                UPSTREAM_LATENCY.observe(duration, query_type=label)
+                UPSTREAM_RESPONSES.inc(query_type=label, status=str(response.status_code))
+                
+                if response.status_code == 429:
+                    UPSTREAM_ERRORS.inc(query_type=label, error="rate_limited")
+                    error = AniListRateLimitException("AniList rate limit exceeded")
+                    # The limiter is paused for Retry-After, the next acquire waits for it
+                    retry_delay = 0
+                elif response.status_code >= 500:
+                    UPSTREAM_ERRORS.inc(query_type=label, error="http")
+                    error = AniListException(f"AniList server error: {response.status_code}")
+                else:
+                    response.raise_for_status()
+                    data = response.json()
+                    
+                    if "errors" in data:
+                        UPSTREAM_ERRORS.inc(query_type=label, error="graphql")
+                        logger.error(f"AniList API Error: {data['errors']}")
+                        raise AniListException(f"AniList API Error: {data['errors']}")
+                    
+                    return data.get("data", {})
+            except AniListException:
+                raise
+            except httpx.TimeoutException:
+                error = AniListException("Request to AniList timed out")
+                cls._record_failure(label, "timeout", started, str(error))
+            except httpx.TransportError as e:
+                error = AniListException(f"Failed to connect to AniList: {str(e)}")
+                cls._record_failure(label, "transport", started, str(error))
+            except httpx.HTTPError as e:
+                if response is None:
+                    cls._record_failure(label, "http", started, str(e))
+                else:
+                    UPSTREAM_ERRORS.inc(query_type=label, error="http")
+                logger.error(f"HTTP Error: {e}")
+                raise AniListException(f"Failed to connect to AniList: {str(e)}")
+            except asyncio.CancelledError:
+                if response is None:
+                    cls.breaker.release()
+                raise
+            except Exception as e:
+                if response is None:
+                    cls._record_failure(label, "unexpected", started, str(e))
+                else:
+                    UPSTREAM_ERRORS.inc(query_type=label, error="unexpected")
+                logger.error(f"Unexpected error: {e}")
+                raise AniListException(f"Unexpected error: {str(e)}")
             
-            return anime_list
+            if attempt >= max_retries:
+                logger.error(str(error))
+                raise error
+            
+            if retry_delay is None:
+                retry_delay = backoff_delay(attempt, settings.ANILIST_BACKOFF_BASE, settings.ANILIST_BACKOFF_MAX)
+            cls.rate_limiter.retries += 1
+            logger.warning(f"{error}, retry {attempt + 1}/{max_retries} in {retry_delay:.2f}s")
+            await asyncio.sleep(retry_delay)
+    
+    @classmethod
+    def _record_failure(cls, label: str, error: str, started: float, message: str) -> None:
+        """Account an attempt that got no response from AniList"""
+        duration = time.monotonic() - started
+        cls.breaker.record(False, duration, message)
+        UPSTREAM_LATENCY.observe(duration, query_type=label)
+        UPSTREAM_ERRORS.inc(query_type=label, error=error)
+    
+    @classmethod
+    def catalog_sync_query(cls, page: int, per_page: int) -> Tuple[CompiledQuery, Dict[str, Any]]:
+        """Page of the catalog mirror crawl"""
+        return page_query(
+            cls.CATALOG_SYNC_FILTERS,
+            page=page,
+            per_page=per_page,
+            extra=cls.CATALOG_SYNC_EXTRA,
+            page_info=True
+        )
+    
+    @classmethod
+    def seasonal_filters(cls, season: str, year: int) -> Dict[str, Any]:
+        """Media filters of a season page"""
+        return {"season": season.upper(), "seasonYear": year, "sort": ["POPULARITY_DESC"]}
+    
+    @classmethod
+    def genre_filters(cls, genre: str) -> Dict[str, Any]:
+        """Media filters of a genre page"""
+        return {"genre": genre, "sort": ["POPULARITY_DESC"]}
+    
+    @classmethod
+    async def _get_media_page(
+        cls,
+        filters: Dict[str, Any],
+        page: int,
+        per_page: int,
+        query_type: str,
+        fields: Optional[FrozenSet[str]] = None,
+        stale_while_revalidate: bool = False
+    ) -> List[BannerAnime]:
+        """Fetch one page of filtered media, fetching only `fields` from AniList when given"""
+        try:
+            query, variables = page_query(filters, fields, page, per_page)
+            data = await cls._make_request(
+                query,
+                variables,
+                query_type=query_type,
+                stale_while_revalidate=stale_while_revalidate
+            )
+            anime_list = cls._parse_media_list(data.get("Page", {}).get("media", []), index=fields is None)
         except AniListException:
             raise
         except Exception as e:
-            logger.error(f"Error getting popular anime: {e}")
-            raise AniListException(f"Error getting popular anime: {str(e)}")
+            logger.error(f"Error getting {query_type} anime: {e}")
+            raise AniListException(f"Error getting {query_type} anime: {str(e)}")
+        if len(anime_list) >= per_page:
+            # Users paging through a list usually ask for the next page shortly
+            cls._schedule_prefetch(filters, page + 1, per_page, query_type, fields)
+        return anime_list
     
     @classmethod
-    async def get_seasonal_anime(cls, season: str, year: int, page: int = 1, per_page: int = 30) -> List[BannerAnime]:
+    async def get_trending_anime(
+        cls,
+        page: int = 1,
+        per_page: int = 30,
+        fields: Optional[FrozenSet[str]] = None
+    ) -> List[BannerAnime]:
+        """Get trending anime for banner"""
+        # Always from AniList: trending changes without touching updatedAt, so the mirror lags
+        return await cls._get_media_page(
+            cls.TRENDING_FILTERS, page, per_page, "trending", fields, stale_while_revalidate=True
+        )
+    
+    @classmethod
+    async def get_popular_anime(
+        cls,
+        page: int = 1,
+        per_page: int = 30,
+        fields: Optional[FrozenSet[str]] = None
+    ) -> List[BannerAnime]:
+        """Get popular anime"""
+        # Always from AniList, like trending
+        return await cls._get_media_page(
+            cls.POPULAR_FILTERS, page, per_page, "popular", fields, stale_while_revalidate=True
+        )
+    
+    @classmethod
+    async def get_seasonal_anime(
+        cls,
+        season: str,
+        year: int,
+        page: int = 1,
+        per_page: int = 30,
+        fields: Optional[FrozenSet[str]] = None
+    ) -> List[BannerAnime]:
         """Get seasonal anime"""
+        anime_list = await cls._from_mirror(
+            sort="popularity", season=season.upper(), season_year=year,
+            limit=per_page, offset=(page - 1) * per_page
+        )
+        if anime_list is not None:
+            return anime_list
+        return await cls._get_media_page(
+            cls.seasonal_filters(season, year), page, per_page, "seasonal", fields,
+            stale_while_revalidate=(season.upper(), year) == current_season()
+        )
+    
+    @classmethod
+    async def get_anime_by_genre(
+        cls,
+        genre: str,
+        page: int = 1,
+        per_page: int = 30,
+        fields: Optional[FrozenSet[str]] = None
+    ) -> List[BannerAnime]:
+        """Get anime by genre"""
+        # Получаем английское название жанра
+        english_genre = cls.GENRE_MAPPING.get(genre, genre)
+        
+        anime_list = await cls._from_mirror(
+            sort="popularity", genre=english_genre, limit=per_page, offset=(page - 1) * per_page
+        )
+        if anime_list is not None:
+            return anime_list
+        return await cls._get_media_page(cls.genre_filters(english_genre), page, per_page, "genre", fields)
+    
+    @classmethod
+    def crawl_filters(
+        cls,
+        season: Optional[str] = None,
+        year: Optional[int] = None,
+        genre: Optional[str] = None,
+        format: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Media filters of a crawl, ordered by id so pages stay stable while it runs"""
+        filters = {
+            "season": season.upper() if season else None,
+            "seasonYear": year,
+            "genre": cls.GENRE_MAPPING.get(genre, genre) if genre else None,
+            "format_in": [format.upper()] if format else None,
+            "status": status.upper() if status else None,
+            "sort": cls.CRAWL_SORT,
+        }
+        return {name: value for name, value in filters.items() if value is not None}
+    
+    @classmethod
+    async def _crawl_page(
+        cls,
+        filters: Dict[str, Any],
+        page: int,
+        per_page: int,
+        fields: Optional[FrozenSet[str]] = None
+    ) -> Tuple[List[BannerAnime], bool]:
+        """One crawl page and whether AniList has more"""
+        query, variables = page_query(filters, fields, page, per_page, page_info=True)
+        data = await cls._make_request(query, variables, query_type="crawl", priority=Priority.LOW)
+        page_data = data.get("Page") or {}
+        anime_list = cls._parse_media_list(page_data.get("media") or [], index=fields is None)
+        return anime_list, bool((page_data.get("pageInfo") or {}).get("hasNextPage"))
+    
+    @classmethod
+    async def crawl(
+        cls,
+        filters: Dict[str, Any],
+        start_page: int = 1,
+        per_page: int = 50,
+        max_pages: Optional[int] = None,
+        fields: Optional[FrozenSet[str]] = None,
+        concurrency: Optional[int] = None
+    ) -> AsyncIterator[Tuple[int, List[BannerAnime], bool]]:
+        """Page through a filtered media list, yielding (page, anime, has_more) in order
+
+        Up to `concurrency` pages are fetched ahead of the consumer, so at most
+        that many pages are held in memory however long the crawl runs.
+        Crawl pages are not cached and go out at low priority.
+        """
+        concurrency = max(1, concurrency or settings.CRAWL_CONCURRENCY)
+        last_page = start_page + max_pages - 1 if max_pages else None
+        pending: Deque[asyncio.Task] = deque()
+        next_page = start_page
+
+        def schedule() -> None:
+            nonlocal next_page
+            while len(pending) < concurrency and (last_page is None or next_page <= last_page):
+                pending.append(asyncio.create_task(cls._crawl_page(filters, next_page, per_page, fields)))
+                next_page += 1
+
+        page = start_page
         try:
-            variables = {
-                "page": page,
-                "perPage": per_page,
-                "season": season.upper(),
-                "seasonYear": year
-            }
-            data = await cls._make_request(cls.SEASONAL_ANIME_QUERY, variables)
+            schedule()
+            while pending:
+                anime_list, has_more = await pending.popleft()
+                if not has_more:
+                    yield page, anime_list, False
+                    return
+                schedule()
+                yield page, anime_list, True
+                page += 1
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+    
+    @classmethod
+    async def search_anime(
+        cls,
+        query: str,
+        page: int = 1,
+        per_page: int = 30,
+        fields: Optional[FrozenSet[str]] = None
+    ) -> List[BannerAnime]:
+        """Search anime by title, using the local index before AniList
+
+        While the mirror is incomplete only a page of exact or prefix title matches
+        is served locally; otherwise AniList answers and local matches only fill up
+        a short first page below its results.
+        """
+        matches = cls.search_index.search_matches(query, limit=per_page, offset=(page - 1) * per_page)
+        if matches and (cls._index_complete() or (
+            len(matches) >= per_page and all(prefixed for _, prefixed in matches)
+        )):
+            cls._search_local += 1
+            cls._record_index(cls.search_index)
+            return [anime for anime, _ in matches]
+        cls._search_fallbacks += 1
+        anime_list = await cls._get_media_page({"search": query}, page, per_page, "search", fields)
+        if page == 1 and len(anime_list) < per_page:
+            anime_list = cls._merge_matches(anime_list, [], matches, per_page)
+        return anime_list
+    
+    @classmethod
+    async def suggest_anime(cls, query: str, limit: int = 10) -> List[BannerAnime]:
+        """Typeahead suggestions from the local index, AniList search as fallback
+
+        While the mirror is incomplete, prefix matches lead, AniList results follow
+        and fuzzy-only matches come last.
+        """
+        matches = cls.search_index.search_matches(query, limit=limit, typeahead=True)
+        prefixed = [anime for anime, is_prefix in matches if is_prefix]
+        if matches and (cls._index_complete() or len(prefixed) >= limit):
+            cls._search_local += 1
+            cls._record_index(cls.search_index)
+            return [anime for anime, _ in matches] if cls._index_complete() else prefixed
+        cls._search_fallbacks += 1
+        anime_list = await cls._get_media_page({"search": query}, 1, limit, "search", None)
+        return cls._merge_matches(prefixed, anime_list, matches, limit)
+    
+    @classmethod
+    def _index_complete(cls) -> bool:
+        """Whether the search index holds the whole catalog"""
+        return cls.catalog is not None and cls.catalog.ready
+    
+    @staticmethod
+    def _merge_matches(
+        first: List[BannerAnime],
+        second: List[BannerAnime],
+        matches: List[Tuple[BannerAnime, bool]],
+        limit: int
+    ) -> List[BannerAnime]:
+        """first, then second, then remaining local matches, without duplicates"""
+        merged: List[BannerAnime] = []
+        seen = set()
+        for anime in itertools.chain(first, second, (anime for anime, _ in matches)):
+            if anime.id not in seen and len(merged) < limit:
+                seen.add(anime.id)
+                merged.append(anime)
+        return merged
+    
+    @classmethod
+    async def get_anime_by_id(cls, anime_id: int) -> Optional[BannerAnime]:
+        """Get anime by ID"""
+        try:
+            if cls.catalog is not None:
+                anime = await asyncio.to_thread(cls.catalog.get, anime_id)
+                if anime is not None:
+                    cls._record_mirror()
+                    return anime
             
-            anime_list = []
-            for media in data.get("Page", {}).get("media", []):
-                try:
-                    banner_anime = cls._parse_anime_to_banner(media)
-                    anime_list.append(banner_anime)
-                except Exception as e:
-                    logger.warning(f"Failed to parse anime {media.get('id')}: {e}")
-                    continue
+            data = await cls._make_request(
+                media_query(extra=cls.DETAIL_EXTRA),
+                {"id": anime_id},
+                query_type="detail",
+                priority=Priority.HIGH
+            )
             
-            return anime_list
+            media = data.get("Media")
+            if not media:
+                return None
+            
+            anime = cls._parse_anime_to_banner(media)
+            if cls.catalog is not None:
+                await asyncio.to_thread(cls.catalog.upsert, [(media, anime)])
+            return anime
         except AniListException:
             raise
         except Exception as e:
-            logger.error(f"Error getting seasonal anime: {e}")
-            raise AniListException(f"Error getting seasonal anime: {str(e)}")
+            logger.error(f"Error getting anime by ID: {e}")
+            raise AniListException(f"Error getting anime by ID: {str(e)}")
     
     @classmethod
-    async def get_anime_by_genre(cls, genre: str, page: int = 1, per_page: int = 30) -> List[BannerAnime]:
-        """Get anime by genre"""
+    async def get_anime_by_ids(cls, anime_ids: List[int]) -> List[BannerAnime]:
+        """Get several anime by ID, fetching only the ones missing from cache"""
         try:
-            # Маппинг русских жанров на английские
-            genre_mapping = {
-                "Экшен": "Action",
-                "action": "Action",
-                "Романтика": "Romance",
-                "romance": "Romance",
-                "Комедия": "Comedy",
-                "comedy": "Comedy",
-                "Драма": "Drama",
-                "drama": "Drama",
-                "Фэнтези": "Fantasy",
-                "fantasy": "Fantasy",
-                "Приключения": "Adventure",
-                "adventure": "Adventure",
-                "Научная фантастика": "Sci-Fi",
-                "scifi": "Sci-Fi",
-                "Ужасы": "Horror",
-                "horror": "Horror",
-                "Мистика": "Mystery",
-                "mystery": "Mystery",
-                "Спорт": "Sports",
-                "sports": "Sports",
-                "Триллер": "Thriller",
-                "thriller": "Thriller",
-                "Сверхъестественное": "Supernatural",
-                "supernatural": "Supernatural",
-                "Историческое": "Historical",
-                "historical": "Historical"
-            }
+            anime_ids = list(dict.fromkeys(anime_ids))
+            ttl = cls.CACHE_TTLS["detail"] if settings.CACHE_ENABLED else 0
             
-            # Получаем английское название жанра
-            english_genre = genre_mapping.get(genre, genre)
+            mirrored: Dict[int, BannerAnime] = {}
+            if cls.catalog is not None:
+                mirrored = await asyncio.to_thread(cls.catalog.get_many, anime_ids)
+                if mirrored:
+                    cls._record_mirror()
             
-            variables = {
-                "page": page,
-                "perPage": per_page,
-                "genre": english_genre
-            }
-            data = await cls._make_request(cls.GENRE_ANIME_QUERY, variables)
+            media_by_id: Dict[int, Dict] = {}
+            stale_by_id: Dict[int, CacheEntry] = {}
+            missing = []
+            for anime_id in anime_ids:
+                if anime_id in mirrored:
+                    continue
+                entry = None
+                if ttl:
+                    entry = await cls.cache.get(cls._detail_key(anime_id), allow_stale=True)
+                if entry is not None and entry.value.get("Media"):
+                    if entry.is_fresh():
+                        media_by_id[anime_id] = entry.value["Media"]
+                        record_source(entry.etag, entry.fetched_at, entry.expires_at)
+                        continue
+                    stale_by_id[anime_id] = entry
+                missing.append(anime_id)
+            
+            chunks = [missing[i:i + cls.BATCH_SIZE] for i in range(0, len(missing), cls.BATCH_SIZE)]
+            results = await asyncio.gather(
+                *(cls._fetch_ids(chunk, ttl) for chunk in chunks),
+                return_exceptions=True
+            )
+            for chunk, result in zip(chunks, results):
+                if isinstance(result, Exception):
+                    # Stale details can stand in for the failed chunk only if every ID has one,
+                    # a partial list would be cached as if it were complete
+                    if any(anime_id not in stale_by_id for anime_id in chunk):
+                        raise result
+                    logger.warning(f"Batch fetch failed, serving {len(chunk)} stale entries: {result}")
+                    cls.cache.stale_served += len(chunk)
+                    for anime_id in chunk:
+                        entry = stale_by_id[anime_id]
+                        media_by_id[anime_id] = entry.value["Media"]
+                        # Expired sources: max-age 0 and the response is not kept
+                        record_source(entry.etag, entry.fetched_at, entry.expires_at)
+                else:
+                    media_by_id.update(result)
             
             anime_list = []
-            for media in data.get("Page", {}).get("media", []):
+            for anime_id in anime_ids:
+                if anime_id in mirrored:
+                    anime_list.append(mirrored[anime_id])
+                    continue
+                media = media_by_id.get(anime_id)
+                if not media:
+                    continue
                 try:
-                    banner_anime = cls._parse_anime_to_banner(media)
-                    anime_list.append(banner_anime)
+                    anime_list.append(cls._parse_anime_to_banner(media))
                 except Exception as e:
-                    logger.warning(f"Failed to parse anime {media.get('id')}: {e}")
-                    continue
+                    logger.warning(f"Failed to parse anime {anime_id}: {e}")
             
             return anime_list
         except AniListException:
             raise
         except Exception as e:
-            logger.error(f"Error getting anime by genre: {e}")
-            raise AniListException(f"Error getting anime by genre: {str(e)}")
+            logger.error(f"Error getting anime by IDs: {e}")
+            raise AniListException(f"Error getting anime by IDs: {str(e)}")
     
     @classmethod
-    async def search_anime(cls, query: str, page: int = 1, per_page: int = 30) -> List[BannerAnime]:
-        """Search anime by title"""
+    def _detail_key(cls, anime_id: int) -> str:
+        """Cache key of the detail query of one anime"""
+        return cls.cache.make_key(media_query(extra=cls.DETAIL_EXTRA).digest, {"id": anime_id})
+    
+    @classmethod
+    async def _fetch_ids(cls, anime_ids: List[int], ttl: int) -> Dict[int, Dict]:
+        """Fetch up to BATCH_SIZE anime in one id_in query and cache them per ID"""
+        # Same selection as the detail query so results can be cached per ID
+        query, variables = page_query(
+            {"id_in": anime_ids}, per_page=len(anime_ids), extra=cls.DETAIL_EXTRA
+        )
+        data = await cls._make_request(query, variables, query_type="batch", priority=Priority.HIGH)
+        
+        media_by_id = {}
+        for media in data.get("Page", {}).get("media", []):
+            media_by_id[media["id"]] = media
+            if ttl:
+                entry = await cls.cache.set(cls._detail_key(media["id"]), {"Media": media}, ttl)
+                record_source(entry.etag, entry.fetched_at, entry.expires_at)
+        if not ttl:
+            # Uncached upstream data, already expired for HTTP and response caching
+            now = time.time()
+            record_source(None, now, now)
+        return media_by_id
+    
+    @classmethod
+    async def get_home_feed(
+        cls,
+        per_page: int = 20,
+        genres: Optional[List[str]] = None,
+        fields: Optional[FrozenSet[str]] = None
+    ) -> HomeFeedResponse:
+        """Get trending, popular, seasonal and genre rows in one upstream request"""
         try:
-            variables = {
-                "page": page,
-                "perPage": per_page,
-                "search": query
+            season, year = current_season()
+            if genres is None:
+                genres = [genre.strip() for genre in settings.HOME_FEED_GENRES.split(",") if genre.strip()]
+            genres = list(dict.fromkeys(cls.GENRE_MAPPING.get(genre, genre) for genre in genres))
+            
+            # alias -> (media filters, query type of the standalone list with the same data)
+            sections = {
+                "trending": (cls.TRENDING_FILTERS, "trending"),
+                "popular": (cls.POPULAR_FILTERS, "popular"),
+                "seasonal": (cls.seasonal_filters(season, year), "seasonal"),
             }
-            data = await cls._make_request(cls.SEARCH_ANIME_QUERY, variables)
+            for i, genre in enumerate(genres):
+                sections[f"genre{i}"] = (cls.genre_filters(genre), "genre")
             
-            anime_list = []
-            for media in data.get("Page", {}).get("media", []):
-                try:
-                    banner_anime = cls._parse_anime_to_banner(media)
-                    anime_list.append(banner_anime)
-                except Exception as e:
-                    logger.warning(f"Failed to parse anime {media.get('id')}: {e}")
-                    continue
+            query, variables = aliased_page_query(
+                {alias: filters for alias, (filters, _) in sections.items()},
+                fields,
+                per_page
+            )
+            with track_sources() as sources:
+                data = await cls._make_request(query, variables, query_type="home", stale_while_revalidate=True)
+            await cls._seed_sections(query, variables, data, sections, fields, per_page)
             
-            return anime_list
+            feed = {
+                alias: cls._parse_media_list((data.get(alias) or {}).get("media", []), index=fields is None)
+                for alias in sections
+            }
+            return HomeFeedResponse(
+                trending=feed["trending"],
+                popular=feed["popular"],
+                seasonal=feed["seasonal"],
+                genres={genre: feed[f"genre{i}"] for i, genre in enumerate(genres)},
+                season=season,
+                seasonYear=year,
+                updated_at=sources.updated_at
+            )
         except AniListException:
             raise
         except Exception as e:
-            logger.error(f"Error searching anime: {e}")
-            raise AniListException(f"Error searching anime: {str(e)}")
+            logger.error(f"Error getting home feed: {e}")
+            raise AniListException(f"Error getting home feed: {str(e)}")
     
     @classmethod
-    async def get_anime_by_id(cls, anime_id: int) -> Optional[BannerAnime]:
-        """Get anime by ID"""
+    async def _seed_sections(
+        cls,
+        query: CompiledQuery,
+        variables: Dict,
+        data: Dict,
+        sections: Dict[str, Tuple[Dict, str]],
+        fields: Optional[FrozenSet[str]],
+        per_page: int
+    ) -> None:
+        """Store each section of a composite response under its standalone query key"""
+        if not settings.CACHE_ENABLED:
+            return
+        entry = cls.cache.peek(cls.cache.make_key(query.digest, variables))
+        if entry is None or not entry.is_fresh():
+            return
+        for alias, (filters, query_type) in sections.items():
+            if alias not in data:
+                continue
+            section_query, section_variables = page_query(filters, fields, 1, per_page)
+            key = cls.cache.make_key(section_query.digest, section_variables)
+            existing = cls.cache.peek(key)
+            if existing is not None and existing.fetched_at >= entry.fetched_at:
+                continue
+            await cls.cache.set(key, {"Page": data[alias]}, cls.CACHE_TTLS[query_type], fetched_at=entry.fetched_at)
+    
+    @classmethod
+    async def _from_mirror(cls, **filters) -> Optional[List[BannerAnime]]:
+        """List anime from the local catalog mirror, None when it cannot serve the query or is outdated"""
+        if cls.catalog is None or not cls.catalog.is_fresh(settings.CATALOG_MAX_AGE):
+            return None
         try:
-            data = await cls._make_request(cls.ANIME_BY_ID_QUERY, {"id": anime_id})
-            
-            media = data.get("Media")
-            if not media:
-                return None
-            
-            return cls._parse_anime_to_banner(media)
-        except AniListException:
-            raise
+            anime_list = await asyncio.to_thread(cls.catalog.list, **filters)
         except Exception as e:
-            logger.error(f"Error getting anime by ID: {e}")
-            raise AniListException(f"Error getting anime by ID: {str(e)}")
+            logger.warning(f"Catalog mirror query failed: {e}")
+            return None
+        if not anime_list:
+            return None
+        cls._record_mirror()
+        return anime_list
+    
+    @classmethod
+    def _record_mirror(cls) -> None:
+        """Register the catalog mirror as data source of the current response"""
+        changed_at = cls.catalog.changed_at
+        record_source(f"catalog:{changed_at}", changed_at)
+    
+    @staticmethod
+    def _record_index(index: Any) -> None:
+        """Register an in-memory index as data source of the current response"""
+        record_source(f"{type(index).__name__}:{BOOT_ID}:{index.version}", index.changed_at)
+    
+    @classmethod
+    def _parse_media_list(cls, media_list: List[Dict], index: bool = True) -> List[BannerAnime]:
+        """Parse list of AniList media, skipping broken items"""
+        parsed = parse_media_list(media_list)
+        if index:
+            for media, anime in parsed:
+                cls._index_media(media, anime)
+        return [anime for _, anime in parsed]
+    
+    @classmethod
+    async def get_catalog(
+        cls,
+        genres: Optional[List[str]] = None,
+        season: Optional[str] = None,
+        year: Optional[int] = None,
+        format: Optional[str] = None,
+        status: Optional[str] = None,
+        sort: str = "popularity",
+        order: str = "desc",
+        limit: int = 20,
+        offset: int = 0
+    ) -> CatalogResponse:
+        """Filter the locally indexed catalog by several facets without calling AniList"""
+        cls._record_index(cls.facet_index)
+        animes, total = cls.facet_index.query(
+            genres=[cls.GENRE_MAPPING.get(genre, genre) for genre in genres or []],
+            season=season.upper() if season else None,
+            year=year,
+            format=format.upper() if format else None,
+            status=status.upper() if status else None,
+            sort=sort,
+            descending=order == "desc",
+            limit=limit,
+            offset=offset
+        )
+        return CatalogResponse(animes=animes, total=total, has_more=offset + len(animes) < total)
     
     @classmethod
     async def get_popular_genres(cls, limit: int = 10) -> List[str]:
@@ -486,71 +1227,21 @@ class AniListService:
         return popular_genres[:limit]
     
     @classmethod
-    def _clean_description(cls, description: Optional[str]) -> Optional[str]:
-        """Clean HTML tags from description"""
-        if not description:
-            return description
-        # Remove HTML tags
-        clean = re.sub('<[^<]+?>', '', description)
-        # Remove extra whitespace
-        clean = re.sub(r'\s+', ' ', clean).strip()
-        # Truncate to reasonable length
-        if len(clean) > 500:
-            clean = clean[:500] + "..."
-        return clean
+    def _index_media(cls, media: Dict, anime: BannerAnime) -> None:
+        """Keep local indexes current with everything we see"""
+        cls.search_index.add_media(media, anime)
+        cls.facet_index.add(anime)
     
     @classmethod
-    def _parse_anime_to_banner(cls, media: Dict) -> BannerAnime:
-        """Parse AniList media data to BannerAnime schema"""
-        
-        # Extract title
-        title_obj = media.get("title", {})
-        title = title_obj.get("english") or title_obj.get("romaji") or "Unknown"
-        
-        # Extract cover image
-        cover_image_data = media.get("coverImage", {})
-        cover_image = CoverImage(
-            large=cover_image_data.get("large"),
-            medium=cover_image_data.get("medium"),
-            color=cover_image_data.get("color")
-        )
-        
-        # Extract start date
-        start_date = None
-        if media.get("startDate"):
-            start_date_obj = media.get("startDate", {})
-            year = start_date_obj.get("year")
-            month = start_date_obj.get("month") or 1
-            day = start_date_obj.get("day") or 1
-            if year:
-                start_date = f"{year}-{month:02d}-{day:02d}"
-        
-        # Extract studio
-        studio = None
-        studios = media.get("studios", {}).get("nodes", [])
-        if studios:
-            studio = studios[0].get("name")
-        
-        # Clean description
-        description = cls._clean_description(media.get("description"))
-        
-        return BannerAnime(
-            id=media.get("id"),
-            title=title,
-            description=description,
-            coverImage=cover_image,
-            bannerImage=media.get("bannerImage"),
-            meanScore=media.get("meanScore"),
-            popularity=media.get("popularity"),
-            status=media.get("status"),
-            episodes=media.get("episodes"),
-            genres=media.get("genres", []),
-            startDate=start_date,
-            season=media.get("season"),
-            seasonYear=media.get("seasonYear"),
-            format=media.get("format"),
-            studio=studio
-        )
+    def _parse_anime_to_banner(cls, media: Dict, index: bool = True) -> BannerAnime:
+        """Parse AniList media data to BannerAnime schema
+
+        Projected (partial) media must not be indexed, pass index=False for it.
+        """
+        anime = parse_media(media)
+        if index:
+            cls._index_media(media, anime)
+        return anime
 
 
 # Create a singleton instance
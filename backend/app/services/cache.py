@@ -0,0 +1,606 @@
+"""Two-tier cache for AniList responses"""
+import asyncio
+import errno
+import hashlib
+import json
+import logging
+import os
+import struct
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(value: Any) -> str:
+    """Stable hash of a JSON payload"""
+    raw = json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheEntry:
+    """Cached upstream payload with its freshness information"""
+    value: Any
+    fetched_at: float
+    expires_at: float
+    # Content hash of value, computed once when the entry is created (used for ETags)
+    etag: str = ""
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        """Check whether the entry is still within its TTL"""
+        return (now or time.time()) < self.expires_at
+
+    def to_bytes(self) -> bytes:
+        """Serialize entry for a shared backend"""
+        return json.dumps(
+            {"v": self.value, "f": self.fetched_at, "e": self.expires_at, "t": self.etag},
+            separators=(",", ":")
+        ).encode("utf-8")
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "CacheEntry":
+        """Deserialize entry stored by a shared backend"""
+        data = json.loads(raw)
+        return cls(
+            value=data["v"],
+            fetched_at=data["f"],
+            expires_at=data["e"],
+            etag=data.get("t") or content_hash(data["v"])
+        )
+
+
+class LRUCache:
+    """Bounded in-process LRU of cache entries"""
+
+    def __init__(self, max_size: int = 1000):
+        self.max_size = max_size
+        self._data: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Get entry and mark it as recently used"""
+        entry = self._data.get(key)
+        if entry is not None:
+            self._data.move_to_end(key)
+        return entry
+
+    def peek(self, key: str) -> Optional[CacheEntry]:
+        """Get entry without changing LRU order"""
+        return self._data.get(key)
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        """Store entry, evicting least recently used ones over the limit"""
+        self._data[key] = entry
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        """Remove entry if present"""
+        self._data.pop(key, None)
+
+    def items(self) -> List[Tuple[str, CacheEntry]]:
+        """(key, entry) pairs from least to most recently used"""
+        return list(self._data.items())
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SharedCacheBackend(ABC):
+    """Cache tier shared between application instances"""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """Get serialized entry"""
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        """Store serialized entry for ttl seconds"""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Remove entry"""
+
+    async def close(self) -> None:
+        """Release backend resources"""
+
+    @asynccontextmanager
+    async def lock(self, key: str, timeout: float) -> AsyncIterator[bool]:
+        """Hold the fill lock of key across instances, yields whether it was acquired
+
+        Backends without cross-instance locking yield False right away.
+        """
+        yield False
+
+    def stats(self) -> Dict[str, Any]:
+        """Backend counters"""
+        return {}
+
+
+class InMemoryBackend(SharedCacheBackend):
+    """Local stand-in for a shared backend (tests and single-instance setups)"""
+
+    def __init__(self):
+        self._data: Dict[str, tuple] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if time.time() >= expires_at:
+            self._data.pop(key, None)
+            return None
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        self._data[key] = (value, time.time() + ttl)
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+
+class RedisBackend(SharedCacheBackend):
+    """Redis shared tier (requires the optional redis package)"""
+
+    def __init__(self, url: str, prefix: str = "vilibrity:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("redis package is required for CACHE_SHARED_BACKEND=redis") from e
+        self._redis = redis.from_url(url)
+        self._prefix = prefix
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._redis.get(self._prefix + key)
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        await self._redis.set(self._prefix + key, value, ex=max(1, int(ttl)))
+
+    async def delete(self, key: str) -> None:
+        await self._redis.delete(self._prefix + key)
+
+    async def close(self) -> None:
+        await self._redis.close()
+
+
+class MmapBackend(SharedCacheBackend):
+    """Shared tier for the worker processes of one host, in a memory-mapped file
+
+    Layout: header, a hash index of fixed-size slots (key digest, position,
+    length, expiry) with linear probing, then a ring buffer of entry bytes.
+    Positions grow monotonically; an entry is valid while it has not been
+    overwritten, i.e. its position is within the last data_size bytes written.
+    The index is guarded by an fcntl lock on the first byte of the file, fill
+    locks of keys by locks on byte ranges past its end. Both are polled without
+    blocking, so a worker holding them never stalls another one's event loop.
+    fcntl locks only exclude other processes; fill lock ranges held by
+    coroutines of this process are tracked separately.
+    Put the file on tmpfs (/dev/shm, the default) so it stays in memory.
+    """
+
+    MAGIC = b"VSHM"
+    VERSION = 1
+    # Slots probed per key before the oldest one is reused
+    PROBES = 8
+    # Fill locks are hashed onto this many byte ranges past the end of the file
+    KEY_LOCKS = 1 << 16
+    LOCK_POLL = 0.02
+    # Index lock holders only copy a few bytes, retry soon
+    INDEX_POLL = 0.0005
+
+    # magic, version, reserved, slot count, data size, head (next write position)
+    _HEADER = struct.Struct("<4sHHIQQ")
+    _HEAD_OFFSET = _HEADER.size - 8
+    _SLOT = struct.Struct("<20sQId")
+
+    def __init__(self, path: str, size: int = 64 * 1024 * 1024, slots: int = 8192):
+        try:
+            import fcntl
+            import mmap
+        except ImportError as e:
+            raise RuntimeError("CACHE_SHARED_BACKEND=mmap needs fcntl and mmap (Unix)") from e
+        self._fcntl = fcntl
+        self.path = path
+        self.slot_count = slots
+        self._index_offset = 64
+        self._data_offset = self._index_offset + slots * self._SLOT.size
+        # Ring buffer starts page aligned
+        self._data_offset += -self._data_offset % mmap.PAGESIZE
+        self.data_size = max(size - self._data_offset, mmap.PAGESIZE)
+        self._lock_base = self._data_offset + self.data_size
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.too_large = 0
+        self.lock_waits = 0
+        self.lock_timeouts = 0
+        self.index_waits = 0
+        # Fill lock ranges held by coroutines of this process
+        self._held: Set[int] = set()
+
+        self._fd = self._open(path, self._lock_base)
+        self._mm = mmap.mmap(self._fd, self._lock_base)
+
+    def _open(self, path: str, total: int) -> int:
+        """Open the shared file, creating it or replacing one with another geometry"""
+        fcntl = self._fcntl
+        expected = (self.MAGIC, self.VERSION, 0, self.slot_count, self.data_size)
+        while True:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            fcntl.lockf(fd, fcntl.LOCK_EX, 1, 0)
+            try:
+                current = os.stat(path).st_ino
+            except FileNotFoundError:
+                current = None
+            if current != os.fstat(fd).st_ino:
+                # Replaced by another worker while we waited for the lock
+                os.close(fd)
+                continue
+            size = os.fstat(fd).st_size
+            if size == 0:
+                # New file: the extended range reads as zeros, i.e. an empty index
+                os.ftruncate(fd, total)
+                os.pwrite(fd, self._HEADER.pack(*expected, 0), 0)
+                logger.info(f"Shared cache file initialized: {path} ({total} bytes, {self.slot_count} slots)")
+            elif size != total or self._HEADER.unpack(os.pread(fd, self._HEADER.size, 0))[:5] != expected:
+                # Other geometry (changed settings): processes still mapping the old
+                # file keep it, new ones start on a fresh file
+                os.unlink(path)
+                os.close(fd)
+                continue
+            fcntl.lockf(fd, fcntl.LOCK_UN, 1, 0)
+            return fd
+
+    @staticmethod
+    def _digest(key: str) -> bytes:
+        """Fixed-size index key"""
+        return hashlib.sha1(key.encode("utf-8")).digest()
+
+    def _head(self) -> int:
+        return struct.unpack_from("<Q", self._mm, self._HEAD_OFFSET)[0]
+
+    def _slot(self, index: int) -> Tuple[bytes, int, int, float]:
+        return self._SLOT.unpack_from(self._mm, self._index_offset + index * self._SLOT.size)
+
+    def _write_slot(self, index: int, digest: bytes, position: int, length: int, expires_at: float) -> None:
+        self._SLOT.pack_into(self._mm, self._index_offset + index * self._SLOT.size, digest, position, length, expires_at)
+
+    def _probe(self, digest: bytes) -> range:
+        start = int.from_bytes(digest[:8], "little") % self.slot_count
+        return range(start, start + self.PROBES)
+
+    def _find(self, digest: bytes, head: int, now: float) -> Optional[Tuple[int, int, int]]:
+        """(slot, position, length) of a live entry for digest"""
+        for i in self._probe(digest):
+            index = i % self.slot_count
+            slot_digest, position, length, expires_at = self._slot(index)
+            if slot_digest == digest and length:
+                if now >= expires_at or position < head - self.data_size:
+                    return None
+                return index, position, length
+        return None
+
+    @asynccontextmanager
+    async def _index_lock(self, exclusive: bool) -> AsyncIterator[None]:
+        """Hold the index lock, waiting for other workers without blocking the event loop
+
+        The body must not await: fcntl locks belong to the process, so only the
+        event loop running one body at a time keeps callers in this process apart.
+        """
+        fcntl = self._fcntl
+        mode = (fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH) | fcntl.LOCK_NB
+        waited = False
+        while True:
+            try:
+                fcntl.lockf(self._fd, mode, 1, 0)
+                break
+            except OSError as e:
+                if e.errno not in (errno.EACCES, errno.EAGAIN):
+                    raise
+                if not waited:
+                    waited = True
+                    self.index_waits += 1
+                await asyncio.sleep(self.INDEX_POLL)
+        try:
+            yield
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, 0)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        digest = self._digest(key)
+        async with self._index_lock(exclusive=False):
+            found = self._find(digest, self._head(), time.time())
+            if found is None:
+                self.misses += 1
+                return None
+            _, position, length = found
+            start = self._data_offset + position % self.data_size
+            self.hits += 1
+            return self._mm[start:start + length]
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        length = len(value)
+        # Large entries would flush most of the ring at once
+        if not length or length > self.data_size // 4:
+            self.too_large += 1
+            return
+        digest = self._digest(key)
+        now = time.time()
+        async with self._index_lock(exclusive=True):
+            head = self._head()
+            offset = head % self.data_size
+            if offset + length > self.data_size:
+                # Entries never wrap, skip the tail of the ring
+                head += self.data_size - offset
+                offset = 0
+            start = self._data_offset + offset
+            self._mm[start:start + length] = value
+            new_head = head + length
+
+            # Same key, else the first free, expired or overwritten slot, else the oldest one
+            match = reusable = oldest = None
+            for i in self._probe(digest):
+                index = i % self.slot_count
+                slot_digest, position, slot_length, expires_at = self._slot(index)
+                if slot_digest == digest:
+                    match = index
+                    break
+                if reusable is None and (
+                    not slot_length or now >= expires_at or position < new_head - self.data_size
+                ):
+                    reusable = index
+                if oldest is None or position < oldest[1]:
+                    oldest = (index, position)
+            target = match if match is not None else reusable if reusable is not None else oldest[0]
+            self._write_slot(target, digest, head, length, now + ttl)
+            struct.pack_into("<Q", self._mm, self._HEAD_OFFSET, new_head)
+            self.writes += 1
+
+    async def delete(self, key: str) -> None:
+        digest = self._digest(key)
+        async with self._index_lock(exclusive=True):
+            found = self._find(digest, self._head(), time.time())
+            if found is not None:
+                self._write_slot(found[0], b"", 0, 0, 0.0)
+
+    @asynccontextmanager
+    async def lock(self, key: str, timeout: float) -> AsyncIterator[bool]:
+        """Hold the fill lock of key across worker processes and coroutines
+
+        Polls a non-blocking lock so waiting does not block the event loop. The
+        fcntl lock only excludes other processes: it belongs to the process, so a
+        second coroutine here would be granted it again. Ranges held in this
+        process are tracked in _held and waited for the same way.
+        """
+        fcntl = self._fcntl
+        offset = self._lock_base + int.from_bytes(self._digest(key)[:4], "little") % self.KEY_LOCKS
+        deadline = time.monotonic() + timeout
+        acquired = False
+        waited = False
+        while True:
+            if offset not in self._held:
+                try:
+                    fcntl.lockf(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB, 1, offset)
+                    self._held.add(offset)
+                    acquired = True
+                    break
+                except OSError:
+                    pass
+            if not waited:
+                waited = True
+                self.lock_waits += 1
+            if time.monotonic() >= deadline:
+                self.lock_timeouts += 1
+                break
+            await asyncio.sleep(self.LOCK_POLL)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                self._held.discard(offset)
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, offset)
+
+    async def close(self) -> None:
+        self._mm.close()
+        os.close(self._fd)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "slots": self.slot_count,
+            "data_size": self.data_size,
+            # Read without the index lock, a stats call never waits for other workers
+            "bytes_written": self._head(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "too_large": self.too_large,
+            "lock_waits": self.lock_waits,
+            "lock_timeouts": self.lock_timeouts,
+            "index_waits": self.index_waits,
+        }
+
+
+def default_mmap_path() -> str:
+    """Shared cache file on tmpfs when available"""
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, "vilibrity-cache")
+
+
+def create_shared_backend(
+    name: str,
+    redis_url: Optional[str] = None,
+    mmap_path: Optional[str] = None,
+    mmap_size: int = 64 * 1024 * 1024,
+    mmap_slots: int = 8192
+) -> Optional[SharedCacheBackend]:
+    """Create shared cache tier by its settings name"""
+    name = (name or "none").lower()
+    if name == "none":
+        return None
+    if name == "memory":
+        return InMemoryBackend()
+    if name == "redis":
+        if not redis_url:
+            raise RuntimeError("REDIS_URL must be set for CACHE_SHARED_BACKEND=redis")
+        return RedisBackend(redis_url)
+    if name == "mmap":
+        return MmapBackend(mmap_path or default_mmap_path(), mmap_size, mmap_slots)
+    raise ValueError(f"Unknown shared cache backend: {name}")
+
+
+class ResponseCache:
+    """In-process LRU in front of an optional shared backend"""
+
+    def __init__(
+        self,
+        max_size: int = 1000,
+        shared: Optional[SharedCacheBackend] = None,
+        stale_ttl: int = 0
+    ):
+        self.local = LRUCache(max_size)
+        self.shared = shared
+        # How long expired entries are kept for stale-while-revalidate and error fallback
+        self.stale_ttl = stale_ttl
+        self.hits = 0
+        self.shared_hits = 0
+        # Expired entries handed out by the caller (stale-while-revalidate or error fallback)
+        self.stale_served = 0
+        self.misses = 0
+        self.shared_errors = 0
+
+    @staticmethod
+    def make_key(query: str, variables: Optional[Dict] = None) -> str:
+        """Build cache key from GraphQL query (text or precomputed digest) and variables"""
+        digest = hashlib.sha1()
+        digest.update(query.encode("utf-8"))
+        digest.update(json.dumps(variables or {}, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+        return digest.hexdigest()
+
+    async def get(self, key: str, allow_stale: bool = False) -> Optional[CacheEntry]:
+        """Get entry from the local tier, then from the shared tier
+
+        With allow_stale an expired entry within the stale window is returned too,
+        the caller checks is_fresh() to decide whether to revalidate it.
+        """
+        now = time.time()
+        local_entry = self.local.get(key)
+        if local_entry is not None and local_entry.is_fresh(now):
+            self.hits += 1
+            return local_entry
+
+        if self.shared is not None:
+            try:
+                raw = await self.shared.get(key)
+            except Exception as e:
+                self.shared_errors += 1
+                logger.warning(f"Shared cache get failed: {e}")
+                raw = None
+            if raw is not None:
+                entry = CacheEntry.from_bytes(raw)
+                if entry.is_fresh(now):
+                    self.local.set(key, entry)
+                    self.shared_hits += 1
+                    return entry
+                if local_entry is None or entry.fetched_at > local_entry.fetched_at:
+                    local_entry = entry
+
+        self.misses += 1
+        if allow_stale and local_entry is not None and now < local_entry.expires_at + self.stale_ttl:
+            return local_entry
+        return None
+
+    async def get_shared(self, key: str) -> Optional[CacheEntry]:
+        """Fresh entry another instance stored in the shared tier, copied to the local tier"""
+        if self.shared is None:
+            return None
+        try:
+            raw = await self.shared.get(key)
+        except Exception as e:
+            self.shared_errors += 1
+            logger.warning(f"Shared cache get failed: {e}")
+            return None
+        if raw is None:
+            return None
+        entry = CacheEntry.from_bytes(raw)
+        if not entry.is_fresh():
+            return None
+        self.local.set(key, entry)
+        self.shared_hits += 1
+        return entry
+
+    @asynccontextmanager
+    async def fill_lock(self, key: str, timeout: float) -> AsyncIterator[bool]:
+        """Hold the shared tier's fill lock of key, yields whether it was acquired"""
+        if self.shared is None:
+            yield False
+            return
+        async with self.shared.lock(key, timeout) as acquired:
+            yield acquired
+
+    def peek(self, key: str) -> Optional[CacheEntry]:
+        """Get local entry without touching counters or LRU order"""
+        return self.local.peek(key)
+
+    async def set(self, key: str, value: Any, ttl: int, fetched_at: Optional[float] = None) -> CacheEntry:
+        """Store value in both tiers"""
+        fetched_at = fetched_at or time.time()
+        entry = CacheEntry(
+            value=value,
+            fetched_at=fetched_at,
+            expires_at=fetched_at + ttl,
+            etag=content_hash(value)
+        )
+        self.local.set(key, entry)
+        if self.shared is not None:
+            try:
+                # Keep the entry in the shared tier for the stale window as well
+                await self.shared.set(key, entry.to_bytes(), ttl + self.stale_ttl)
+            except Exception as e:
+                self.shared_errors += 1
+                logger.warning(f"Shared cache set failed: {e}")
+        return entry
+
+    async def delete(self, key: str) -> None:
+        """Remove entry from both tiers"""
+        self.local.delete(key)
+        if self.shared is not None:
+            await self.shared.delete(key)
+
+    def clear(self) -> None:
+        """Drop the local tier"""
+        self.local.clear()
+
+    async def close(self) -> None:
+        """Close shared backend"""
+        if self.shared is not None:
+            await self.shared.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters"""
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            "size": len(self.local),
+            "max_size": self.local.max_size,
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "stale_served": self.stale_served,
+            "misses": self.misses,
+            "evictions": self.local.evictions,
+            "shared_errors": self.shared_errors,
+            "shared": self.shared.stats() if self.shared is not None else None,
+            "hit_rate": round((self.hits + self.shared_hits) / lookups, 4) if lookups else 0.0
+        }
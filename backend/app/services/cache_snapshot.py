@@ -0,0 +1,166 @@
+"""On-disk snapshot of the response cache and indexed anime for warm restarts
+
+File layout: a fixed header (magic, version, written_at, entry and anime
+counts) followed by a zlib-compressed body of length-prefixed records.
+Cache entries are written as key, etag, fetched_at, expires_at and the JSON
+payload; anime as JSON field lists (see media_parser.anime_to_record) with
+their titles. Files are replaced atomically, so readers never see a partial one.
+"""
+import asyncio
+import json
+import logging
+import os
+import struct
+import time
+import zlib
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from app.schemas.anime import BannerAnime
+from app.services.cache import CacheEntry
+from app.services.media_parser import anime_from_record, anime_to_record
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"VCSN"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sHdII")
+_ENTRY = struct.Struct("<ddHBI")
+_LENGTH = struct.Struct("<I")
+
+AnimeRecord = Tuple[BannerAnime, Sequence[str]]
+
+
+def _dumps(value) -> bytes:
+    """Compact JSON bytes"""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def encode_snapshot(entries: Iterable[Tuple[str, CacheEntry]], anime: Iterable[AnimeRecord]) -> bytes:
+    """Binary snapshot of cache entries and anime records"""
+    body = bytearray()
+    entry_count = 0
+    for key, entry in entries:
+        key_raw = key.encode("utf-8")
+        etag_raw = entry.etag.encode("ascii")
+        value_raw = _dumps(entry.value)
+        body += _ENTRY.pack(entry.fetched_at, entry.expires_at, len(key_raw), len(etag_raw), len(value_raw))
+        body += key_raw + etag_raw + value_raw
+        entry_count += 1
+    anime_count = 0
+    for item, titles in anime:
+        record_raw = _dumps([anime_to_record(item), list(titles)])
+        body += _LENGTH.pack(len(record_raw)) + record_raw
+        anime_count += 1
+    header = _HEADER.pack(MAGIC, VERSION, time.time(), entry_count, anime_count)
+    # Level 1: most of the size win of higher levels at a fraction of the CPU on shutdown
+    return header + zlib.compress(bytes(body), 1)
+
+
+def decode_snapshot(raw: bytes) -> Tuple[float, List[Tuple[str, CacheEntry]], List[AnimeRecord]]:
+    """written_at, cache entries and anime records of a snapshot, ValueError when it is damaged"""
+    if len(raw) < _HEADER.size:
+        raise ValueError("truncated snapshot header")
+    magic, version, written_at, entry_count, anime_count = _HEADER.unpack_from(raw)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"unsupported snapshot format {magic!r} v{version}")
+    try:
+        body = memoryview(zlib.decompress(raw[_HEADER.size:]))
+        entries, anime = _decode_body(body, entry_count, anime_count)
+    except (zlib.error, struct.error, KeyError, IndexError, TypeError) as e:
+        # Left half-written by a crash or damaged on disk
+        raise ValueError(f"corrupt snapshot body: {e}") from e
+    return written_at, entries, anime
+
+
+def _decode_body(
+    body: memoryview,
+    entry_count: int,
+    anime_count: int
+) -> Tuple[List[Tuple[str, CacheEntry]], List[AnimeRecord]]:
+    """Cache entries and anime records of a decompressed snapshot body"""
+    offset = 0
+    entries = []
+    for _ in range(entry_count):
+        fetched_at, expires_at, key_len, etag_len, value_len = _ENTRY.unpack_from(body, offset)
+        offset += _ENTRY.size
+        key = bytes(body[offset:offset + key_len]).decode("utf-8")
+        offset += key_len
+        etag = bytes(body[offset:offset + etag_len]).decode("ascii")
+        offset += etag_len
+        value = json.loads(body[offset:offset + value_len].tobytes())
+        offset += value_len
+        entries.append((key, CacheEntry(value=value, fetched_at=fetched_at, expires_at=expires_at, etag=etag)))
+    anime = []
+    for _ in range(anime_count):
+        (length,) = _LENGTH.unpack_from(body, offset)
+        offset += _LENGTH.size
+        record, titles = json.loads(body[offset:offset + length].tobytes())
+        offset += length
+        anime.append((anime_from_record(record), titles))
+    return entries, anime
+
+
+def write_snapshot(path: str, entries: Iterable[Tuple[str, CacheEntry]], anime: Iterable[AnimeRecord]) -> int:
+    """Atomically replace the snapshot at path, returns its size in bytes"""
+    raw = encode_snapshot(entries, anime)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    # Per-process temp file: several workers may write the same snapshot, the last one wins
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(raw)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(raw)
+
+
+def read_snapshot(path: str) -> Optional[Tuple[float, List[Tuple[str, CacheEntry]], List[AnimeRecord]]]:
+    """Decoded snapshot at path, None when there is none, ValueError when it is damaged"""
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+    except FileNotFoundError:
+        return None
+    return decode_snapshot(raw)
+
+
+class CacheSnapshotter:
+    """Periodically writes the service cache snapshot"""
+
+    def __init__(self, service, path: str, interval: int = 300):
+        self.service = service
+        self.path = path
+        self.interval = interval
+        self.runs = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start snapshot loop in background"""
+        if self.interval > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Cache snapshotter started (interval={self.interval}s)")
+
+    async def stop(self) -> None:
+        """Stop snapshot loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Cache snapshotter stopped")
+
+    async def _run(self) -> None:
+        """Write a snapshot every interval"""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.service.save_snapshot(self.path)
+                self.runs += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cache snapshot failed: {e}")
@@ -0,0 +1,47 @@
+"""Background scheduler that keeps hot AniList queries warm"""
+import asyncio
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CacheWarmer:
+    """Periodically refreshes hot cache keys before they expire"""
+
+    def __init__(self, service, interval: int = 60, ahead: int = 120):
+        self.service = service
+        self.interval = interval
+        self.ahead = ahead
+        self.runs = 0
+        self.refreshed = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start warmer loop in background"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Cache warmer started (interval={self.interval}s)")
+
+    async def stop(self) -> None:
+        """Stop warmer loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Cache warmer stopped")
+
+    async def _run(self) -> None:
+        """Warm hot keys every interval"""
+        while True:
+            try:
+                self.refreshed += await self.service.warm_hot_keys(ahead=self.ahead)
+                self.runs += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cache warmer run failed: {e}")
+            await asyncio.sleep(self.interval)
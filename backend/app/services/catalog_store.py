@@ -0,0 +1,280 @@
+"""Local SQLite mirror of the AniList catalog"""
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.schemas.anime import BannerAnime, CoverImage
+
+logger = logging.getLogger(__name__)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS anime (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    title_romaji TEXT,
+    title_english TEXT,
+    title_native TEXT,
+    synonyms TEXT,
+    description TEXT,
+    cover_large TEXT,
+    cover_medium TEXT,
+    cover_color TEXT,
+    banner_image TEXT,
+    mean_score INTEGER,
+    popularity INTEGER,
+    trending INTEGER,
+    status TEXT,
+    episodes INTEGER,
+    genres TEXT,
+    start_date TEXT,
+    season TEXT,
+    season_year INTEGER,
+    format TEXT,
+    studio TEXT,
+    updated_at INTEGER,
+    content_hash TEXT NOT NULL,
+    synced_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_anime_popularity ON anime (popularity DESC, id);
+CREATE INDEX IF NOT EXISTS idx_anime_score ON anime (mean_score DESC, id);
+CREATE INDEX IF NOT EXISTS idx_anime_trending ON anime (status, trending DESC, id);
+CREATE INDEX IF NOT EXISTS idx_anime_season ON anime (season, season_year, popularity DESC, id);
+CREATE INDEX IF NOT EXISTS idx_anime_updated ON anime (updated_at);
+
+CREATE TABLE IF NOT EXISTS anime_genre (
+    genre TEXT NOT NULL,
+    popularity INTEGER,
+    anime_id INTEGER NOT NULL,
+    PRIMARY KEY (genre, anime_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_anime_genre_popularity ON anime_genre (genre, popularity DESC, anime_id);
+CREATE INDEX IF NOT EXISTS idx_anime_genre_anime ON anime_genre (anime_id);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+COLUMNS = (
+    "id", "title", "title_romaji", "title_english", "title_native", "synonyms",
+    "description", "cover_large", "cover_medium", "cover_color", "banner_image",
+    "mean_score", "popularity", "trending", "status", "episodes", "genres",
+    "start_date", "season", "season_year", "format", "studio", "updated_at"
+)
+
+# Allowed ORDER BY clauses for list queries
+SORTS = {
+    "trending": "trending DESC, id",
+    "popularity": "popularity DESC, id",
+    "score": "mean_score DESC, id",
+}
+
+
+def row_from_media(media: Dict, anime: BannerAnime) -> Tuple:
+    """Build anime table row from raw AniList media and its parsed form"""
+    title = media.get("title") or {}
+    return (
+        anime.id,
+        anime.title,
+        title.get("romaji"),
+        title.get("english"),
+        title.get("native"),
+        json.dumps(media.get("synonyms") or [], ensure_ascii=False),
+        anime.description,
+        anime.coverImage.large,
+        anime.coverImage.medium,
+        anime.coverImage.color,
+        anime.bannerImage,
+        anime.meanScore,
+        anime.popularity,
+        media.get("trending"),
+        anime.status,
+        anime.episodes,
+        json.dumps(anime.genres or [], ensure_ascii=False),
+        anime.startDate,
+        anime.season,
+        anime.seasonYear,
+        anime.format,
+        anime.studio,
+        media.get("updatedAt"),
+    )
+
+
+def anime_from_row(row: sqlite3.Row) -> BannerAnime:
+    """Build BannerAnime from anime table row"""
+    return BannerAnime(
+        id=row["id"],
+        title=row["title"],
+        description=row["description"],
+        coverImage=CoverImage(
+            large=row["cover_large"],
+            medium=row["cover_medium"],
+            color=row["cover_color"]
+        ),
+        bannerImage=row["banner_image"],
+        meanScore=row["mean_score"],
+        popularity=row["popularity"],
+        status=row["status"],
+        episodes=row["episodes"],
+        genres=json.loads(row["genres"]) if row["genres"] else [],
+        startDate=row["start_date"],
+        season=row["season"],
+        seasonYear=row["season_year"],
+        format=row["format"],
+        studio=row["studio"]
+    )
+
+
+class CatalogStore:
+    """Embedded SQLite store of BannerAnime records with indexed list queries"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        state = self.get_state()
+        # Lists are served only after one full crawl has completed
+        self.ready = int(state.get("watermark", 0)) > 0
+        # Time the last crawl completed
+        self.synced_at = float(state.get("synced_at", 0))
+        # Time of the last content change, used as a validator for mirrored responses
+        self.changed_at = self._conn.execute("SELECT MAX(synced_at) FROM anime").fetchone()[0] or time.time()
+
+    def close(self) -> None:
+        """Close database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def upsert(self, items: Iterable[Tuple[Dict, BannerAnime]]) -> int:
+        """Insert or update media, touching only rows whose content changed"""
+        changed = 0
+        now = time.time()
+        placeholders = ", ".join("?" for _ in range(len(COLUMNS) + 2))
+        updates = ", ".join(f"{column} = excluded.{column}" for column in COLUMNS[1:])
+        sql = (
+            f"INSERT INTO anime ({', '.join(COLUMNS)}, content_hash, synced_at) VALUES ({placeholders}) "
+            f"ON CONFLICT(id) DO UPDATE SET {updates}, content_hash = excluded.content_hash, "
+            f"synced_at = excluded.synced_at WHERE anime.content_hash != excluded.content_hash"
+        )
+        with self._lock, self._conn:
+            for media, anime in items:
+                row = row_from_media(media, anime)
+                content_hash = hashlib.sha1(repr(row).encode("utf-8")).hexdigest()
+                cursor = self._conn.execute(sql, row + (content_hash, now))
+                if cursor.rowcount:
+                    changed += 1
+                    self._conn.execute("DELETE FROM anime_genre WHERE anime_id = ?", (anime.id,))
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO anime_genre (genre, popularity, anime_id) VALUES (?, ?, ?)",
+                        [(genre, anime.popularity, anime.id) for genre in (anime.genres or [])]
+                    )
+        if changed:
+            self.changed_at = now
+        return changed
+
+    def get(self, anime_id: int) -> Optional[BannerAnime]:
+        """Get anime by ID"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM anime WHERE id = ?", (anime_id,)).fetchone()
+        return anime_from_row(row) if row else None
+
+    def get_many(self, anime_ids: List[int]) -> Dict[int, BannerAnime]:
+        """Get several anime by ID"""
+        if not anime_ids:
+            return {}
+        placeholders = ", ".join("?" for _ in anime_ids)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM anime WHERE id IN ({placeholders})", list(anime_ids)
+            ).fetchall()
+        return {row["id"]: anime_from_row(row) for row in rows}
+
+    def list(
+        self,
+        sort: str = "popularity",
+        limit: int = 30,
+        offset: int = 0,
+        status: Optional[str] = None,
+        season: Optional[str] = None,
+        season_year: Optional[int] = None,
+        genre: Optional[str] = None
+    ) -> List[BannerAnime]:
+        """List anime filtered by status, season or genre using the indexes"""
+        order = SORTS[sort]
+        conditions = []
+        params: List[Any] = []
+        if genre is not None:
+            # Walk the (genre, popularity) index and join back to anime
+            sql = "SELECT anime.* FROM anime_genre JOIN anime ON anime.id = anime_genre.anime_id"
+            conditions.append("anime_genre.genre = ?")
+            params.append(genre)
+            if sort == "popularity":
+                order = "anime_genre.popularity DESC, anime_genre.anime_id"
+        else:
+            sql = "SELECT * FROM anime"
+        if status is not None:
+            conditions.append("anime.status = ?" if genre is not None else "status = ?")
+            params.append(status)
+        if season is not None:
+            conditions.append("anime.season = ?" if genre is not None else "season = ?")
+            params.append(season)
+        if season_year is not None:
+            conditions.append("anime.season_year = ?" if genre is not None else "season_year = ?")
+            params.append(season_year)
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += f" ORDER BY {order} LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [anime_from_row(row) for row in rows]
+
+    def search_records(self) -> List[Tuple[BannerAnime, List[str]]]:
+        """All anime with their titles and synonyms (for the local search index)"""
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM anime").fetchall()
+        return [
+            (
+                anime_from_row(row),
+                [row["title_romaji"], row["title_english"], row["title_native"]]
+                + (json.loads(row["synonyms"]) if row["synonyms"] else [])
+            )
+            for row in rows
+        ]
+
+    def count(self) -> int:
+        """Number of mirrored anime"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM anime").fetchone()[0]
+
+    def get_state(self) -> Dict[str, str]:
+        """Sync state values"""
+        with self._lock:
+            return {row[0]: row[1] for row in self._conn.execute("SELECT key, value FROM sync_state")}
+
+    def set_state(self, **values: Any) -> None:
+        """Update sync state values"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)",
+                [(key, str(value)) for key, value in values.items()]
+            )
+        if int(values.get("watermark", 0)) > 0:
+            self.ready = True
+        if "synced_at" in values:
+            self.synced_at = float(values["synced_at"])
+
+    def is_fresh(self, max_age: float) -> bool:
+        """Whether a completed crawl is recent enough to serve lists from"""
+        return self.ready and time.time() - self.synced_at <= max_age
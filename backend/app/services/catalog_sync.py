@@ -0,0 +1,151 @@
+"""Incremental sync of the local catalog mirror from AniList"""
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from app.core.errors import AniListException
+from app.services.rate_limiter import Priority
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogSync:
+    """Pages through AniList by UPDATED_AT_DESC and upserts changed media
+
+    A crawl stops at the first page older than the watermark of the previous
+    completed crawl. Long initial crawls are split into runs of max_pages; the
+    next run resumes at the page holding the last media crawled, stepping back
+    while the catalog has shifted so that page starts past it.
+    """
+
+    def __init__(self, service, store, interval: int = 3600, max_pages: int = 100, page_size: int = 50):
+        self.service = service
+        self.store = store
+        self.interval = interval
+        self.max_pages = max_pages
+        self.page_size = page_size
+        self.runs = 0
+        self.last_changed = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start sync loop in background"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Catalog sync started (interval={self.interval}s)")
+
+    async def stop(self) -> None:
+        """Stop sync loop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Catalog sync stopped")
+
+    async def _run(self) -> None:
+        """Sync every interval, continue right away while a crawl is unfinished"""
+        while True:
+            complete = True
+            try:
+                complete = await self.sync_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Catalog sync failed: {e}")
+            await asyncio.sleep(self.interval if complete else 1)
+
+    async def sync_once(self) -> bool:
+        """Run one crawl step; returns True when the crawl reached the watermark"""
+        state = await asyncio.to_thread(self.store.get_state)
+        watermark = int(state.get("watermark", 0))
+        pending = int(state.get("pending_watermark", 0))
+        page = int(state.get("resume_page", 1))
+        # Last media upserted by the interrupted crawl; page positions drift between runs,
+        # so the resumed run re-reads the page holding it and checks nothing slid past
+        cursor_id = int(state.get("cursor_id", 0))
+        cursor_updated = int(state.get("cursor_updated", 0))
+        verify = cursor_id > 0 and page > 1
+        if verify:
+            page -= 1
+        changed = 0
+
+        for _ in range(self.max_pages):
+            try:
+                query, variables = self.service.catalog_sync_query(page, self.page_size)
+                data = await self.service._make_request(
+                    query, variables, query_type="catalog_sync", priority=Priority.LOW
+                )
+            except AniListException:
+                await self._save_progress(page, pending, cursor_id, cursor_updated)
+                raise
+
+            page_data = data.get("Page") or {}
+            media_list = page_data.get("media") or []
+            if verify:
+                if page > 1 and not self._reaches_cursor(media_list, cursor_id, cursor_updated):
+                    # Media removed or re-sorted ahead of the cursor moved its successors onto
+                    # earlier pages; step back until the page overlaps what was already crawled
+                    logger.info(f"Catalog sync page {page} starts past the resume cursor, stepping back")
+                    page -= 1
+                    continue
+                verify = False
+
+            items = []
+            for media in media_list:
+                try:
+                    items.append((media, self.service._parse_anime_to_banner(media)))
+                except Exception as e:
+                    logger.warning(f"Failed to parse anime {media.get('id')}: {e}")
+            changed += await asyncio.to_thread(self.store.upsert, items)
+
+            updated = [media.get("updatedAt") or 0 for media in media_list]
+            if updated:
+                pending = max(pending, max(updated))
+                cursor_id, cursor_updated = media_list[-1].get("id") or 0, updated[-1]
+            has_next = (page_data.get("pageInfo") or {}).get("hasNextPage", False)
+            if not has_next or not updated or min(updated) <= watermark:
+                await asyncio.to_thread(
+                    self.store.set_state,
+                    watermark=max(watermark, pending),
+                    pending_watermark=0,
+                    resume_page=1,
+                    cursor_id=0,
+                    cursor_updated=0,
+                    synced_at=time.time()
+                )
+                self._finish(changed)
+                return True
+            page += 1
+
+        await self._save_progress(page, pending, cursor_id, cursor_updated)
+        self._finish(changed)
+        return False
+
+    @staticmethod
+    def _reaches_cursor(media_list, cursor_id: int, cursor_updated: int) -> bool:
+        """Whether a page starts at or before the cursor, so nothing after it is skipped"""
+        if not media_list:
+            return False
+        if any(media.get("id") == cursor_id for media in media_list):
+            return True
+        return (media_list[0].get("updatedAt") or 0) > cursor_updated
+
+    async def _save_progress(self, page: int, pending: int, cursor_id: int, cursor_updated: int) -> None:
+        """Persist where an unfinished crawl resumes"""
+        await asyncio.to_thread(
+            self.store.set_state,
+            resume_page=page,
+            pending_watermark=pending,
+            cursor_id=cursor_id,
+            cursor_updated=cursor_updated
+        )
+
+    def _finish(self, changed: int) -> None:
+        """Record run results"""
+        self.runs += 1
+        self.last_changed = changed
+        logger.info(f"Catalog sync run {self.runs}: {changed} anime changed")
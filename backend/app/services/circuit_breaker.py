@@ -0,0 +1,148 @@
+"""Circuit breaker for upstream calls"""
+import logging
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(str, Enum):
+    """Breaker states"""
+    CLOSED = "closed"  # calls pass, outcomes are recorded
+    OPEN = "open"  # calls fail fast until open_seconds have passed
+    HALF_OPEN = "half_open"  # a few probe calls decide whether to close again
+
+
+class CircuitBreaker:
+    """Opens when too many of the recent calls failed or were slow
+
+    Outcomes of the last `window` calls are kept; once at least `min_calls`
+    are known, an error rate or slow call rate at or above its threshold opens
+    the circuit. After `open_seconds` up to `half_open_calls` probes are let
+    through: all of them succeeding closes the circuit, any failure reopens it.
+    """
+
+    def __init__(
+        self,
+        window: int = 20,
+        min_calls: int = 5,
+        error_rate: float = 0.5,
+        slow_call_seconds: float = 5.0,
+        slow_call_rate: float = 0.8,
+        open_seconds: float = 30.0,
+        half_open_calls: int = 1,
+        enabled: bool = True
+    ):
+        self.enabled = enabled
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.state = CircuitState.CLOSED
+        # (failed, slow) of recent calls
+        self._outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_successes = 0
+        self.opened = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now; a True in half-open takes a probe slot"""
+        if not self.enabled:
+            return True
+        if self.state is CircuitState.OPEN:
+            if time.monotonic() - self._opened_at < self.open_seconds:
+                self.rejected += 1
+                return False
+            self._transition(CircuitState.HALF_OPEN)
+        if self.state is CircuitState.HALF_OPEN:
+            if self._probes >= self.half_open_calls:
+                self.rejected += 1
+                return False
+            self._probes += 1
+        return True
+
+    def release(self) -> None:
+        """Give back a probe slot of a call that never reached upstream"""
+        if self.state is CircuitState.HALF_OPEN and self._probes > 0:
+            self._probes -= 1
+
+    def record(self, success: bool, duration: float, error: Optional[str] = None) -> None:
+        """Register the outcome of an upstream call"""
+        if not self.enabled:
+            return
+        slow = duration >= self.slow_call_seconds
+        if not success:
+            self.last_error = error
+
+        if self.state is CircuitState.HALF_OPEN:
+            self.release()
+            if not success or slow:
+                self._transition(CircuitState.OPEN)
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= self.half_open_calls:
+                self._transition(CircuitState.CLOSED)
+            return
+
+        if self.state is CircuitState.OPEN:
+            # Call started before the circuit opened
+            return
+
+        self._outcomes.append((not success, slow))
+        if len(self._outcomes) < self.min_calls:
+            return
+        failures, slow_calls = self._counts()
+        if failures / len(self._outcomes) >= self.error_rate or slow_calls / len(self._outcomes) >= self.slow_call_rate:
+            self._transition(CircuitState.OPEN)
+
+    def retry_after(self) -> float:
+        """Seconds until an open circuit lets a probe through"""
+        if self.state is not CircuitState.OPEN:
+            return 0.0
+        return max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+
+    def _counts(self) -> Tuple[int, int]:
+        """Failed and slow calls in the window"""
+        return (
+            sum(1 for failed, _ in self._outcomes if failed),
+            sum(1 for _, slow in self._outcomes if slow)
+        )
+
+    def _transition(self, state: CircuitState) -> None:
+        """Switch state and reset the bookkeeping of the new state"""
+        if state is CircuitState.OPEN:
+            self._opened_at = time.monotonic()
+            self.opened += 1
+            logger.warning(f"Circuit opened for {self.open_seconds}s (last error: {self.last_error})")
+        elif state is CircuitState.CLOSED:
+            logger.info("Circuit closed")
+        self.state = state
+        self._outcomes.clear()
+        self._probes = 0
+        self._probe_successes = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current state and window counters"""
+        if self.state is CircuitState.OPEN and self.retry_after() == 0.0:
+            state = CircuitState.HALF_OPEN  # next call is a probe
+        else:
+            state = self.state
+        failures, slow_calls = self._counts()
+        return {
+            "enabled": self.enabled,
+            "state": state.value,
+            "retry_after": round(self.retry_after(), 2),
+            "window_calls": len(self._outcomes),
+            "window_failures": failures,
+            "window_slow_calls": slow_calls,
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "last_error": self.last_error
+        }
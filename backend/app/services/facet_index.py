@@ -0,0 +1,147 @@
+"""Precomputed inverted indexes for local catalog filtering"""
+import heapq
+import logging
+import time
+from array import array
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.schemas.anime import BannerAnime
+
+logger = logging.getLogger(__name__)
+
+FACETS = ("genre", "season", "format", "status")
+
+
+def facet_values(anime: BannerAnime) -> Dict[str, Tuple]:
+    """Facet keys an anime belongs to"""
+    return {
+        "genre": tuple(sorted(set(anime.genres or []))),
+        "season": ((anime.season, anime.seasonYear),) if anime.season and anime.seasonYear else (),
+        "format": (anime.format,) if anime.format else (),
+        "status": (anime.status,) if anime.status else (),
+    }
+
+
+def _contains(ids: array, anime_id: int) -> bool:
+    """Membership test on a sorted id array"""
+    i = bisect_left(ids, anime_id)
+    return i < len(ids) and ids[i] == anime_id
+
+
+class FacetIndex:
+    """genre, (season, year), format and status -> sorted arrays of anime ids"""
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[Any, array]] = {facet: {} for facet in FACETS}
+        self._values: Dict[int, Dict[str, Tuple]] = {}
+        self._records: Dict[int, BannerAnime] = {}
+        # Bumped whenever an indexed record changes
+        self.version = 0
+        self.changed_at = time.time()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def add(self, anime: BannerAnime) -> None:
+        """Index anime or update its facets"""
+        values = facet_values(anime)
+        previous = self._records.get(anime.id)
+        old_values = self._values.get(anime.id)
+        self._records[anime.id] = anime
+        if old_values == values:
+            if previous != anime:
+                self._changed()
+            return
+
+        old_values = old_values or {facet: () for facet in FACETS}
+        for facet in FACETS:
+            postings = self._postings[facet]
+            for key in set(old_values[facet]) - set(values[facet]):
+                ids = postings.get(key)
+                if ids is not None:
+                    i = bisect_left(ids, anime.id)
+                    if i < len(ids) and ids[i] == anime.id:
+                        del ids[i]
+                    if not ids:
+                        del postings[key]
+            for key in set(values[facet]) - set(old_values[facet]):
+                insort(postings.setdefault(key, array("i")), anime.id)
+        self._values[anime.id] = values
+        self._changed()
+
+    def _candidates(
+        self,
+        genres: List[str],
+        season: Optional[str],
+        year: Optional[int],
+        format: Optional[str],
+        status: Optional[str]
+    ) -> Iterable[int]:
+        """Intersect posting lists of the requested facets"""
+        lists: List[array] = []
+        for genre in genres:
+            lists.append(self._postings["genre"].get(genre, array("i")))
+        if season is not None and year is not None:
+            lists.append(self._postings["season"].get((season, year), array("i")))
+        elif season is not None or year is not None:
+            # Only one half of the (season, year) key: union of the matching lists
+            merged = sorted({
+                anime_id
+                for (key_season, key_year), ids in self._postings["season"].items()
+                if (season is None or key_season == season) and (year is None or key_year == year)
+                for anime_id in ids
+            })
+            lists.append(array("i", merged))
+        if format is not None:
+            lists.append(self._postings["format"].get(format, array("i")))
+        if status is not None:
+            lists.append(self._postings["status"].get(status, array("i")))
+
+        if not lists:
+            return self._records.keys()
+        lists.sort(key=len)
+        smallest, rest = lists[0], lists[1:]
+        return [anime_id for anime_id in smallest if all(_contains(ids, anime_id) for ids in rest)]
+
+    def query(
+        self,
+        genres: Optional[List[str]] = None,
+        season: Optional[str] = None,
+        year: Optional[int] = None,
+        format: Optional[str] = None,
+        status: Optional[str] = None,
+        sort: str = "popularity",
+        descending: bool = True,
+        limit: int = 20,
+        offset: int = 0
+    ) -> Tuple[List[BannerAnime], int]:
+        """Filter by all given facets, sort locally and return a page with the total count"""
+        ids = list(self._candidates(genres or [], season, year, format, status))
+        field = "meanScore" if sort == "score" else "popularity"
+
+        def sort_key(anime_id: int) -> Tuple[int, int, int]:
+            value = getattr(self._records[anime_id], field)
+            if value is None:
+                # Unknown values go last in both directions
+                return (1, 0, anime_id)
+            return (0, -value if descending else value, anime_id)
+
+        page = heapq.nsmallest(offset + limit, ids, key=sort_key)[offset:]
+        return [self._records[anime_id] for anime_id in page], len(ids)
+
+    def _changed(self) -> None:
+        """Mark index content as changed"""
+        self.version += 1
+        self.changed_at = time.time()
+
+    def stats(self) -> Dict[str, int]:
+        """Index size counters"""
+        return {
+            "records": len(self._records),
+            "genres": len(self._postings["genre"]),
+            "seasons": len(self._postings["season"]),
+            "formats": len(self._postings["format"]),
+            "statuses": len(self._postings["status"]),
+            "version": self.version
+        }
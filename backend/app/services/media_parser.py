@@ -0,0 +1,161 @@
+"""Conversion of AniList media payloads to BannerAnime"""
+import logging
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import PARSE_ERRORS
+from app.schemas.anime import BannerAnime, CoverImage
+from app.services.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+_HTML_TAG = re.compile(r"<[^<]+?>")
+
+DESCRIPTION_LIMIT = 500
+
+
+def _strip_html(description: str) -> str:
+    """Remove HTML tags and collapse whitespace"""
+    # split/join collapses whitespace like re.sub(r"\s+", " ") + strip, several times faster
+    return " ".join(_HTML_TAG.sub("", description).split())
+
+
+def _truncate(clean: str) -> str:
+    """Shorten cleaned description for list responses"""
+    if len(clean) > DESCRIPTION_LIMIT:
+        return clean[:DESCRIPTION_LIMIT] + "..."
+    return clean
+
+
+class DescriptionCache:
+    """Bounded memo of cleaned descriptions keyed by (media id, hash of the raw text)
+
+    The same synopsis arrives with every trending, popular, seasonal, genre and
+    search page an anime appears on, so it is cleaned and truncated once.
+    """
+
+    def __init__(self, max_size: int = 5000):
+        self.entries = LRUCache(max_size)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, media_id: int, description: Optional[str]) -> Optional[str]:
+        """Cleaned and truncated description"""
+        if not description:
+            return description
+        key = (media_id, hash(description))
+        cleaned = self.entries.get(key)
+        if cleaned is not None:
+            self.hits += 1
+            return cleaned
+
+        self.misses += 1
+        cleaned = _truncate(_strip_html(description))
+        self.entries.set(key, cleaned)
+        return cleaned
+
+    def clear(self) -> None:
+        """Forget all cleaned descriptions"""
+        self.entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "max_size": self.entries.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.entries.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+description_cache = DescriptionCache(max_size=settings.DESCRIPTION_CACHE_MAX_ENTRIES)
+
+
+def _start_date(start_date: Optional[Dict]) -> Optional[str]:
+    """YYYY-MM-DD from an AniList FuzzyDate, None without a year"""
+    if not start_date or not start_date.get("year"):
+        return None
+    return f"{start_date['year']}-{start_date.get('month') or 1:02d}-{start_date.get('day') or 1:02d}"
+
+
+def parse_media(media: Dict) -> BannerAnime:
+    """Parse one AniList media object"""
+    anime_id = media.get("id")
+    if not isinstance(anime_id, int):
+        raise ValueError(f"invalid media id {anime_id!r}")
+
+    title = media.get("title") or {}
+    cover = media.get("coverImage") or {}
+    studios = (media.get("studios") or {}).get("nodes") or []
+    cover_image = CoverImage(
+        large=cover.get("large"),
+        medium=cover.get("medium"),
+        color=cover.get("color")
+    )
+    values = {
+        "id": anime_id,
+        "title": title.get("english") or title.get("romaji") or "Unknown",
+        "description": description_cache.get(anime_id, media.get("description")),
+        "coverImage": cover_image,
+        "bannerImage": media.get("bannerImage"),
+        "meanScore": media.get("meanScore"),
+        "popularity": media.get("popularity"),
+        "status": media.get("status"),
+        "episodes": media.get("episodes"),
+        "genres": media.get("genres", []),
+        "startDate": _start_date(media.get("startDate")),
+        "season": media.get("season"),
+        "seasonYear": media.get("seasonYear"),
+        "format": media.get("format"),
+        "studio": studios[0].get("name") if studios else None,
+    }
+    return BannerAnime(**values)
+
+
+def anime_to_record(anime: BannerAnime) -> List[Any]:
+    """Compact list of BannerAnime field values (cache snapshots)"""
+    cover = anime.coverImage
+    return [
+        anime.id, anime.title, anime.description, [cover.large, cover.medium, cover.color],
+        anime.bannerImage, anime.meanScore, anime.popularity, anime.status, anime.episodes,
+        anime.genres, anime.startDate, anime.season, anime.seasonYear, anime.format, anime.studio,
+    ]
+
+
+def anime_from_record(record: List[Any]) -> BannerAnime:
+    """BannerAnime from a list written by anime_to_record"""
+    (anime_id, title, description, cover, banner_image, mean_score, popularity, status,
+     episodes, genres, start_date, season, season_year, media_format, studio) = record
+    return BannerAnime(**{
+        "id": anime_id,
+        "title": title,
+        "description": description,
+        "coverImage": CoverImage(large=cover[0], medium=cover[1], color=cover[2]),
+        "bannerImage": banner_image,
+        "meanScore": mean_score,
+        "popularity": popularity,
+        "status": status,
+        "episodes": episodes,
+        "genres": genres,
+        "startDate": start_date,
+        "season": season,
+        "seasonYear": season_year,
+        "format": media_format,
+        "studio": studio,
+    })
+
+
+def parse_media_list(media_list: Iterable[Dict]) -> List[Tuple[Dict, BannerAnime]]:
+    """Parse a Page.media list into (media, anime) pairs, skipping broken items"""
+    parsed = []
+    for media in media_list:
+        try:
+            parsed.append((media, parse_media(media)))
+        except Exception as e:
+            PARSE_ERRORS.inc()
+            logger.warning(f"Failed to parse anime {media.get('id') if isinstance(media, dict) else None}: {e}")
+    return parsed
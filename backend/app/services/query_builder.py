@@ -0,0 +1,199 @@
+"""Compiled GraphQL documents for AniList media queries
+
+Documents are composed from a selection set and the names of the filters in use,
+filter values always travel as variables. Compiled documents are cached together
+with a digest of their text, which callers use as a cache key component instead
+of hashing the query on every request.
+"""
+import hashlib
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, NamedTuple, Optional, Tuple
+
+from app.schemas.anime import AnimeCatalogItem, BannerAnime
+
+# BannerAnime field -> AniList selection it is parsed from
+FIELD_SELECTIONS: Dict[str, str] = {
+    "id": "id",
+    "title": "title{romaji english native}",
+    "description": "description",
+    "coverImage": "coverImage{large medium color}",
+    "bannerImage": "bannerImage",
+    "meanScore": "meanScore",
+    "popularity": "popularity",
+    "status": "status",
+    "episodes": "episodes",
+    "genres": "genres",
+    "startDate": "startDate{year month day}",
+    "season": "season",
+    "seasonYear": "seasonYear",
+    "format": "format",
+    "studio": "studios(isMain:true){nodes{name}}",
+}
+
+# Raw media fields that are not part of BannerAnime (search index, catalog sync)
+EXTRA_SELECTIONS: Dict[str, str] = {
+    "synonyms": "synonyms",
+    "trending": "trending",
+    "updatedAt": "updatedAt",
+}
+
+# Supported media filters and their GraphQL variable types
+FILTER_TYPES: Dict[str, str] = {
+    "sort": "[MediaSort]",
+    "status": "MediaStatus",
+    "season": "MediaSeason",
+    "seasonYear": "Int",
+    "genre": "String",
+    "genre_in": "[String]",
+    "format_in": "[MediaFormat]",
+    "id_in": "[Int]",
+    "search": "String",
+}
+
+# Fields every projection keeps, the response schemas cannot do without them
+REQUIRED_FIELDS = frozenset({"id", "title", "coverImage"})
+
+# Named projections: card for thumbnail grids, banner for carousels, full for detail pages
+VIEWS: Dict[str, FrozenSet[str]] = {
+    "card": frozenset(AnimeCatalogItem.model_fields),
+    "banner": frozenset({
+        "id", "title", "description", "coverImage", "bannerImage", "meanScore",
+        "genres", "format", "episodes", "season", "seasonYear"
+    }),
+    "full": frozenset(BannerAnime.model_fields),
+}
+
+
+class CompiledQuery(NamedTuple):
+    """Minified GraphQL document and the digest of its text"""
+    text: str
+    digest: str
+
+
+def resolve_fields(view: Optional[str] = None, fields: Optional[str] = None) -> Optional[FrozenSet[str]]:
+    """Projected BannerAnime fields from view and comma-separated fields, None for everything"""
+    if view is None and not fields:
+        return None
+    selected = set(VIEWS[view]) if view is not None else set()
+    if fields:
+        requested = {field.strip() for field in fields.split(",") if field.strip()}
+        unknown = requested - set(FIELD_SELECTIONS)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        selected |= requested
+    selected |= REQUIRED_FIELDS
+    if selected >= set(FIELD_SELECTIONS):
+        return None
+    return frozenset(selected)
+
+
+def selection_set(fields: Optional[Iterable[str]] = None, extra: Iterable[str] = ()) -> str:
+    """Media selection for the given fields (all when None) plus extra raw fields, in a stable order"""
+    fields = set(FIELD_SELECTIONS) if fields is None else set(fields)
+    selections = [selection for field, selection in FIELD_SELECTIONS.items() if field in fields]
+    selections += [selection for field, selection in EXTRA_SELECTIONS.items() if field in extra]
+    return " ".join(selections)
+
+
+def compile_query(text: str) -> CompiledQuery:
+    """Wrap document text with its digest"""
+    return CompiledQuery(text, hashlib.sha1(text.encode("utf-8")).hexdigest())
+
+
+def _media_arguments(filters: Iterable[str], prefix: str = "") -> str:
+    """media(...) arguments bound to variables"""
+    return ",".join(["type:ANIME"] + [f"{name}:${prefix}{name}" for name in filters])
+
+
+def _check_filters(filters: Iterable[str]) -> None:
+    """Reject filters the builder does not know the type of"""
+    unknown = set(filters) - set(FILTER_TYPES)
+    if unknown:
+        raise ValueError(f"Unsupported media filters: {', '.join(sorted(unknown))}")
+
+
+@lru_cache(maxsize=256)
+def _compile_page(
+    filters: Tuple[str, ...],
+    fields: Optional[FrozenSet[str]],
+    extra: Tuple[str, ...],
+    page_info: bool
+) -> CompiledQuery:
+    """Page document for a set of filter names"""
+    _check_filters(filters)
+    declarations = ",".join(["$page:Int", "$perPage:Int"] + [f"${name}:{FILTER_TYPES[name]}" for name in filters])
+    info = "pageInfo{hasNextPage}" if page_info else ""
+    return compile_query(
+        f"query({declarations}){{Page(page:$page,perPage:$perPage){{{info}"
+        f"media({_media_arguments(filters)}){{{selection_set(fields, extra)}}}}}}}"
+    )
+
+
+def page_query(
+    filters: Dict[str, Any],
+    fields: Optional[FrozenSet[str]] = None,
+    page: int = 1,
+    per_page: int = 30,
+    extra: Tuple[str, ...] = (),
+    page_info: bool = False
+) -> Tuple[CompiledQuery, Dict[str, Any]]:
+    """Compiled Page query and its variables; filters with None values are left out"""
+    filters = {name: value for name, value in filters.items() if value is not None}
+    query = _compile_page(tuple(sorted(filters)), fields, tuple(extra), page_info)
+    return query, {"page": page, "perPage": per_page, **filters}
+
+
+@lru_cache(maxsize=64)
+def media_query(fields: Optional[FrozenSet[str]] = None, extra: Tuple[str, ...] = ()) -> CompiledQuery:
+    """Single Media(id:) document"""
+    return compile_query(f"query($id:Int){{Media(id:$id,type:ANIME){{{selection_set(fields, extra)}}}}}")
+
+
+@lru_cache(maxsize=64)
+def _compile_aliased(
+    sections: Tuple[Tuple[str, Tuple[str, ...]], ...],
+    fields: Optional[FrozenSet[str]]
+) -> CompiledQuery:
+    """Aliased multi-Page document, section variables are prefixed with the alias"""
+    declarations = ["$perPage:Int"]
+    pages = []
+    selection = selection_set(fields)
+    for alias, filters in sections:
+        _check_filters(filters)
+        declarations += [f"${alias}_{name}:{FILTER_TYPES[name]}" for name in filters]
+        pages.append(
+            f"{alias}:Page(page:1,perPage:$perPage){{media({_media_arguments(filters, f'{alias}_')}){{{selection}}}}}"
+        )
+    return compile_query(f"query({','.join(declarations)}){{{' '.join(pages)}}}")
+
+
+def aliased_page_query(
+    sections: Dict[str, Dict[str, Any]],
+    fields: Optional[FrozenSet[str]] = None,
+    per_page: int = 20
+) -> Tuple[CompiledQuery, Dict[str, Any]]:
+    """First pages of several filtered lists in one document
+
+    Each section's data equals page_query(filters, fields, 1, per_page) for the same filters.
+    """
+    sections = {
+        alias: {name: value for name, value in filters.items() if value is not None}
+        for alias, filters in sections.items()
+    }
+    query = _compile_aliased(
+        tuple((alias, tuple(sorted(filters))) for alias, filters in sections.items()),
+        fields
+    )
+    variables: Dict[str, Any] = {"perPage": per_page}
+    for alias, filters in sections.items():
+        variables.update({f"{alias}_{name}": value for name, value in filters.items()})
+    return query, variables
+
+
+def compiled_stats() -> Dict[str, int]:
+    """Sizes of the compiled document caches"""
+    return {
+        "pages": _compile_page.cache_info().currsize,
+        "media": media_query.cache_info().currsize,
+        "aliased": _compile_aliased.cache_info().currsize,
+    }
@@ -0,0 +1,182 @@
+"""Client-side rate limiter for AniList API"""
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+from enum import IntEnum
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Upstream request priority, lower value is served first"""
+    HIGH = 0  # detail pages
+    NORMAL = 1  # list endpoints
+    LOW = 2  # background refresh, sync
+    SPECULATIVE = 3  # prefetch: spare budget only, never waits
+
+
+class RequestShed(Exception):
+    """Speculative request dropped because there is no spare budget for it"""
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class RateLimiter:
+    """Token bucket with a priority queue that adapts to AniList rate limit headers"""
+
+    def __init__(self, rate_per_minute: int = 90, burst: int = 10, speculative_reserve: float = 0.0):
+        self.configured_rate = rate_per_minute
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._queue: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+        # Last values reported by AniList
+        self.upstream_limit: Optional[int] = None
+        self.upstream_remaining: Optional[int] = None
+        self.acquired = 0
+        self.throttled = 0
+        self.retries = 0
+        # Tokens speculative requests must leave for regular ones
+        self.speculative_reserve = speculative_reserve
+        self.shed = 0
+
+    def _refill(self) -> None:
+        """Add tokens for the time passed since last refill"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, priority: int = Priority.NORMAL, timeout: Optional[float] = None) -> None:
+        """Wait for a token; raises asyncio.TimeoutError if not granted in time
+
+        Speculative requests never queue, they raise RequestShed unless a spare
+        token is available right away.
+        """
+        self._refill()
+        if priority >= Priority.SPECULATIVE:
+            if (
+                not any(not item[2].done() for item in self._queue)
+                and self.tokens >= 1 + self.speculative_reserve
+                and time.monotonic() >= self._paused_until
+            ):
+                self.tokens -= 1
+                self.acquired += 1
+                return
+            self.shed += 1
+            raise RequestShed()
+        if not self._queue and self.tokens >= 1 and time.monotonic() >= self._paused_until:
+            self.tokens -= 1
+            self.acquired += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (int(priority), next(self._seq), future))
+        self._wake()
+        await asyncio.wait_for(future, timeout)
+
+    def _wake(self) -> None:
+        """Start dispatcher if it is not running in the current loop"""
+        loop = asyncio.get_running_loop()
+        if self._dispatcher is None or self._dispatcher.done() or self._dispatcher.get_loop() is not loop:
+            self._dispatcher = loop.create_task(self._dispatch())
+
+    async def _dispatch(self) -> None:
+        """Grant tokens to queued waiters in priority order"""
+        while self._queue:
+            future = self._queue[0][2]
+            if future.done():
+                # Waiter timed out or was cancelled
+                heapq.heappop(self._queue)
+                continue
+
+            now = time.monotonic()
+            if now < self._paused_until:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+
+            self._refill()
+            if self.tokens >= 1:
+                heapq.heappop(self._queue)
+                self.tokens -= 1
+                self.acquired += 1
+                future.set_result(None)
+                continue
+
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """Stop granting tokens for the given time"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+    def update_from_headers(self, headers: Mapping[str, str], status_code: int = 200) -> None:
+        """Adapt budget to X-RateLimit-* and Retry-After response headers"""
+        limit = _int_header(headers, "X-RateLimit-Limit")
+        if limit:
+            self.upstream_limit = limit
+            self.rate = min(self.configured_rate, limit) / 60.0
+
+        remaining = _int_header(headers, "X-RateLimit-Remaining")
+        if remaining is not None:
+            self.upstream_remaining = remaining
+            self._refill()
+            self.tokens = min(self.tokens, float(remaining))
+
+        if status_code == 429:
+            self.throttled += 1
+            retry_after = _int_header(headers, "Retry-After")
+            reset = _int_header(headers, "X-RateLimit-Reset")
+            if retry_after is None and reset:
+                retry_after = max(0, reset - int(time.time()))
+            delay = retry_after if retry_after is not None else 60
+            logger.warning(f"AniList rate limit hit, pausing upstream requests for {delay}s")
+            self.pause(delay)
+
+    def budget(self) -> float:
+        """Tokens available right now"""
+        self._refill()
+        if time.monotonic() < self._paused_until:
+            return 0.0
+        return self.tokens
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current limiter budget and queue"""
+        queued = [item for item in self._queue if not item[2].done()]
+        return {
+            "tokens": round(self.budget(), 2),
+            "capacity": self.capacity,
+            "rate_per_minute": round(self.rate * 60, 2),
+            "paused_for": round(max(0.0, self._paused_until - time.monotonic()), 2),
+            "queued": len(queued),
+            "queued_by_priority": {
+                p.name.lower(): sum(1 for item in queued if item[0] == p) for p in Priority
+            },
+            "upstream_limit": self.upstream_limit,
+            "upstream_remaining": self.upstream_remaining,
+            "acquired": self.acquired,
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "shed": self.shed
+        }
+
+
+def _int_header(headers: Mapping[str, str], name: str) -> Optional[int]:
+    """Parse integer header value"""
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return int(float(value))
+    except ValueError:
+        return None
@@ -0,0 +1,206 @@
+"""In-process title search index with typeahead and typo-tolerant matching"""
+import bisect
+import heapq
+import logging
+import math
+import re
+import time
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.schemas.anime import BannerAnime
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD = re.compile(r"[^\w]+", re.UNICODE)
+
+# Minimal share of query trigrams a title must contain to count as a fuzzy match
+MIN_SIMILARITY = 0.4
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip accents and punctuation, collapse whitespace"""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _NON_WORD.sub(" ", text).strip()
+
+
+def trigrams(text: str) -> Set[str]:
+    """Character trigrams of a normalized string, padded at word edges"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _Document:
+    """Indexed titles of one anime"""
+    __slots__ = ("titles", "grams", "popularity", "anime")
+
+    def __init__(self, titles: Tuple[str, ...], grams: Set[str], popularity: int, anime: BannerAnime):
+        self.titles = titles
+        self.grams = grams
+        self.popularity = popularity
+        self.anime = anime
+
+
+class SearchIndex:
+    """Title index over romaji, english, native titles and synonyms"""
+
+    def __init__(self):
+        self._docs: Dict[int, _Document] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        # Sorted (phrase, id) pairs, one per word position of each title, for prefix lookups
+        self._prefixes: List[Tuple[str, int]] = []
+        self._prefixes_dirty = False
+        self._max_popularity = 1
+        self.queries = 0
+        # Bumped whenever indexed titles or records change
+        self.version = 0
+        self.changed_at = time.time()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, anime: BannerAnime, titles: Iterable[Optional[str]]) -> None:
+        """Index anime by its titles, replacing a previous version"""
+        normalized = tuple(sorted({normalize(title) for title in titles if title} - {""}))
+        popularity = anime.popularity or 0
+        self._max_popularity = max(self._max_popularity, popularity)
+
+        existing = self._docs.get(anime.id)
+        if existing is not None and existing.titles == normalized:
+            if existing.anime != anime:
+                existing.popularity = popularity
+                existing.anime = anime
+                self._changed()
+            return
+        if existing is not None:
+            self.remove(anime.id)
+
+        grams: Set[str] = set()
+        for title in normalized:
+            grams |= trigrams(title)
+        self._docs[anime.id] = _Document(normalized, grams, popularity, anime)
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(anime.id)
+        for title in normalized:
+            words = title.split(" ")
+            for i in range(len(words)):
+                self._prefixes.append((" ".join(words[i:]), anime.id))
+        self._prefixes_dirty = True
+        self._changed()
+
+    def add_media(self, media: Dict, anime: BannerAnime) -> None:
+        """Index anime using raw AniList titles and synonyms"""
+        title = media.get("title") or {}
+        self.add(
+            anime,
+            [anime.title, title.get("romaji"), title.get("english"), title.get("native")]
+            + list(media.get("synonyms") or [])
+        )
+
+    def records(self) -> List[Tuple[BannerAnime, Tuple[str, ...]]]:
+        """Indexed anime with their normalized titles (re-adding them gives the same index)"""
+        return [(doc.anime, doc.titles) for doc in self._docs.values()]
+
+    def remove(self, anime_id: int) -> None:
+        """Drop anime from the index"""
+        doc = self._docs.pop(anime_id, None)
+        if doc is None:
+            return
+        for gram in doc.grams:
+            ids = self._postings.get(gram)
+            if ids is not None:
+                ids.discard(anime_id)
+                if not ids:
+                    del self._postings[gram]
+        self._prefixes = [item for item in self._prefixes if item[1] != anime_id]
+        self._changed()
+
+    def _prefix_matches(self, query: str) -> Dict[int, float]:
+        """Exact titles (1.2), titles starting with the query (1.0) or having a word starting with it (0.9)"""
+        if self._prefixes_dirty:
+            self._prefixes.sort()
+            self._prefixes_dirty = False
+        matches: Dict[int, float] = {}
+        i = bisect.bisect_left(self._prefixes, (query, -1))
+        while i < len(self._prefixes) and self._prefixes[i][0].startswith(query):
+            phrase, anime_id = self._prefixes[i]
+            doc = self._docs[anime_id]
+            if phrase in doc.titles:
+                score = 1.2 if phrase == query else 1.0
+            else:
+                score = 0.9
+            matches[anime_id] = max(matches.get(anime_id, 0.0), score)
+            i += 1
+        return matches
+
+    def _fuzzy_matches(self, query: str) -> Dict[int, float]:
+        """Titles sharing enough trigrams with the query"""
+        query_grams = trigrams(query)
+        counts: Counter = Counter()
+        for gram in query_grams:
+            ids = self._postings.get(gram)
+            if ids:
+                counts.update(ids)
+        matches = {}
+        for anime_id, common in counts.items():
+            similarity = common / len(query_grams)
+            if similarity >= MIN_SIMILARITY:
+                matches[anime_id] = 0.8 * similarity
+        return matches
+
+    def search(self, query: str, limit: int = 30, offset: int = 0, typeahead: bool = False) -> List[BannerAnime]:
+        """Rank matches by text score weighted with popularity
+
+        With typeahead the fuzzy pass is skipped when prefix matches fill the page.
+        """
+        return [anime for anime, _ in self.search_matches(query, limit, offset, typeahead)]
+
+    def search_matches(
+        self,
+        query: str,
+        limit: int = 30,
+        offset: int = 0,
+        typeahead: bool = False
+    ) -> List[Tuple[BannerAnime, bool]]:
+        """Ranked matches as in search, each with whether a title equals or starts with the query
+
+        Matches flagged False are fuzzy only, similar titles that may be no match at all.
+        """
+        self.queries += 1
+        query = normalize(query)
+        if not query:
+            return []
+
+        scores = self._prefix_matches(query)
+        prefixed = set(scores)
+        if len(query) >= 3 and not (typeahead and len(scores) >= offset + limit):
+            for anime_id, score in self._fuzzy_matches(query).items():
+                scores[anime_id] = max(scores.get(anime_id, 0.0), score)
+
+        max_log = math.log1p(self._max_popularity)
+        ranked = heapq.nsmallest(
+            offset + limit,
+            scores.items(),
+            key=lambda item: (
+                -item[1] * (0.7 + 0.3 * math.log1p(self._docs[item[0]].popularity) / max_log),
+                item[0]
+            )
+        )
+        return [(self._docs[anime_id].anime, anime_id in prefixed) for anime_id, _ in ranked[offset:offset + limit]]
+
+    def _changed(self) -> None:
+        """Mark index content as changed"""
+        self.version += 1
+        self.changed_at = time.time()
+
+    def stats(self) -> Dict[str, int]:
+        """Index size counters"""
+        return {
+            "documents": len(self._docs),
+            "trigrams": len(self._postings),
+            "prefixes": len(self._prefixes),
+            "queries": self.queries,
+            "version": self.version
+        }
@@ -0,0 +1,50 @@
+"""Single-flight coalescing of identical concurrent calls"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Share one in-flight call between concurrent callers with the same key"""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn once per key; concurrent callers await the same result"""
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            # Run as a separate task so a cancelled caller does not cancel the others
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def is_running(self, key: str) -> bool:
+        """Check whether a call for key is in flight"""
+        return key in self._inflight
+
+    def _done(self, key: str, task: asyncio.Task) -> None:
+        """Forget finished call"""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark exception as retrieved when every caller has gone away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """Coalescing counters"""
+        total = self.calls + self.coalesced
+        return {
+            "in_flight": len(self._inflight),
+            "upstream_calls": self.calls,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": round(self.coalesced / total, 4) if total else 0.0
+        }
@@ -0,0 +1,52 @@
+"""Unit tests for the opaque crawl cursor of the catalog endpoint"""
+import base64
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1.endpoints.anime import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    """A cursor decodes to the position it was issued for"""
+    cursor = encode_cursor({"genre": "Action", "sort": ["POPULARITY_DESC"]}, 3, 25, frozenset({"id", "title"}))
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == {
+        "filters": {"genre": "Action", "sort": ["POPULARITY_DESC"]},
+        "page": 3,
+        "per_page": 25,
+        "fields": frozenset({"id", "title"}),
+    }
+
+
+def test_cursor_without_projection():
+    """No projection round-trips as None"""
+    assert decode_cursor(encode_cursor({}, 1, 50, None))["fields"] is None
+
+
+def test_cursor_is_deterministic():
+    """Equal positions give equal cursors, so they can be cached"""
+    assert encode_cursor({"a": 1, "b": 2}, 2, 10, frozenset({"title", "id"})) == \
+        encode_cursor({"b": 2, "a": 1}, 2, 10, frozenset({"id", "title"}))
+
+
+def forged(state) -> str:
+    return base64.urlsafe_b64encode(json.dumps(state).encode("utf-8")).decode("ascii")
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    base64.urlsafe_b64encode(b"not json").decode("ascii"),
+    forged({"f": {}, "p": 1}),
+    forged({"f": {"unknown": 1}, "p": 1, "n": 20, "v": None}),
+    forged({"f": {}, "p": 0, "n": 20, "v": None}),
+    forged({"f": {}, "p": 1, "n": 500, "v": None}),
+    forged({"f": {}, "p": 1, "n": 20, "v": ["nope"]}),
+    forged([1, 2, 3]),
+])
+def test_invalid_cursor_is_rejected(cursor):
+    """Cursors not issued by the API are a 400"""
+    with pytest.raises(HTTPException) as e:
+        decode_cursor(cursor)
+    assert e.value.status_code == 400
@@ -0,0 +1,129 @@
+"""Unit tests for the batched multi-ID lookup and its endpoint"""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints.anime import rendered_cache
+from app.core.errors import AniListException
+from app.core.http_cache import track_sources
+from app.main import app
+from app.services.anilist_service import AniListService
+from app.services.cache import LRUCache, ResponseCache
+from app.services.rate_limiter import Priority
+from app.services.singleflight import SingleFlight
+
+
+def media(anime_id: int) -> dict:
+    return {"id": anime_id, "title": {"romaji": f"Title {anime_id}"}}
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Service with an empty cache, chunks of two ids and a fake id_in query"""
+    state = SimpleNamespace(chunks=[], failing=set())
+
+    async def fetch(query, variables, priority=Priority.NORMAL, query_type=None):
+        ids = variables["id_in"]
+        state.chunks.append(ids)
+        if state.failing & set(ids):
+            raise AniListException("AniList is down")
+        return {"Page": {"media": [media(anime_id) for anime_id in ids]}}
+
+    monkeypatch.setattr(AniListService, "cache", ResponseCache(max_size=100, stale_ttl=600))
+    monkeypatch.setattr(AniListService, "inflight", SingleFlight())
+    monkeypatch.setattr(AniListService, "catalog", None)
+    monkeypatch.setattr(AniListService, "_prefetching", {})
+    monkeypatch.setattr(AniListService, "_prefetched", LRUCache(10))
+    monkeypatch.setattr(AniListService, "BATCH_SIZE", 2)
+    monkeypatch.setattr(AniListService, "_fetch", fetch)
+    rendered_cache.clear()
+    return state
+
+
+def expire(*anime_ids: int) -> None:
+    for anime_id in anime_ids:
+        entry = AniListService.cache.peek(AniListService._detail_key(anime_id))
+        entry.expires_at = entry.fetched_at - 1
+
+
+def ids(anime_list) -> list:
+    return [anime.id for anime in anime_list]
+
+
+def test_missing_ids_fetched_in_chunks(upstream):
+    """Duplicates are dropped, ids are fetched BATCH_SIZE at a time and order is kept"""
+    result = asyncio.run(AniListService.get_anime_by_ids([5, 3, 5, 1, 4, 2]))
+    assert ids(result) == [5, 3, 1, 4, 2]
+    assert upstream.chunks == [[5, 3], [1, 4], [2]]
+
+
+def test_cached_ids_are_not_refetched(upstream):
+    """Each fetched anime is cached under its detail key"""
+    async def run():
+        await AniListService.get_anime_by_ids([1, 2])
+        return await AniListService.get_anime_by_ids([2, 3, 1])
+
+    assert ids(asyncio.run(run())) == [2, 3, 1]
+    assert upstream.chunks == [[1, 2], [3]]
+
+
+def test_failed_chunk_served_from_stale_entries(upstream):
+    """A failed chunk whose ids all have stale details is served from them, expired for HTTP caching"""
+    async def run():
+        await AniListService.get_anime_by_ids([1, 2, 3])
+        expire(1, 2)
+        upstream.failing = {1, 2}
+        with track_sources() as sources:
+            result = await AniListService.get_anime_by_ids([1, 2, 3])
+        return result, sources
+
+    result, sources = asyncio.run(run())
+    assert ids(result) == [1, 2, 3]
+    assert sources.expires_at < time.time()
+    assert AniListService.cache.stale_served == 2
+
+
+def test_failed_chunk_without_every_stale_entry_fails(upstream):
+    """A partial list is never returned as if it were complete"""
+    async def run():
+        await AniListService.get_anime_by_ids([1])
+        expire(1)
+        upstream.failing = {1, 2}
+        await AniListService.get_anime_by_ids([1, 2, 3])
+
+    with pytest.raises(AniListException):
+        asyncio.run(run())
+
+
+def test_endpoint_validates_ids(upstream):
+    """Malformed, empty and oversized id lists are rejected"""
+    client = TestClient(app)
+    assert client.get("/api/v1/anime/batch", params={"ids": "1,x"}).status_code == 400
+    assert client.get("/api/v1/anime/batch", params={"ids": ","}).status_code == 400
+    too_many = ",".join(str(i) for i in range(101))
+    assert client.get("/api/v1/anime/batch", params={"ids": too_many}).status_code == 400
+    assert upstream.chunks == []
+
+
+def test_endpoint_answers_503_instead_of_a_partial_list(upstream):
+    """A chunk that cannot be served fails the whole request"""
+    upstream.failing = {2}
+    response = TestClient(app).get("/api/v1/anime/batch", params={"ids": "1,2"})
+    assert response.status_code == 503
+
+
+def test_endpoint_does_not_keep_stale_responses(upstream):
+    """A response built from stale entries gets max-age 0 and is not rendered-cached"""
+    client = TestClient(app)
+    assert client.get("/api/v1/anime/batch", params={"ids": "1,2"}).status_code == 200
+    rendered_cache.clear()
+    expire(1, 2)
+    upstream.failing = {1, 2}
+    response = client.get("/api/v1/anime/batch", params={"ids": "1,2"})
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()] == [1, 2]
+    assert "max-age=0" in response.headers["cache-control"]
+    assert len(rendered_cache.local) == 0
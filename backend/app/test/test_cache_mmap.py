@@ -0,0 +1,258 @@
+"""Unit tests for the memory-mapped shared cache tier"""
+import asyncio
+import mmap
+import subprocess
+import sys
+
+import pytest
+
+from app.services.cache import MmapBackend
+
+# fcntl locks and shared mappings: Unix only
+pytest.importorskip("fcntl")
+
+SLOTS = 16
+# One page of index, one page of ring buffer
+SIZE = 2 * mmap.PAGESIZE
+
+
+def open_backend(path, size: int = SIZE, slots: int = SLOTS) -> MmapBackend:
+    return MmapBackend(str(path), size=size, slots=slots)
+
+
+def test_set_get_and_delete(tmp_path):
+    """Values round-trip and deleted keys miss"""
+    async def run():
+        backend = open_backend(tmp_path / "cache")
+        await backend.set("a", b"first", 60)
+        await backend.set("a", b"second", 60)
+        value = await backend.get("a")
+        await backend.delete("a")
+        deleted = await backend.get("a")
+        await backend.close()
+        return backend, value, deleted
+
+    backend, value, deleted = asyncio.run(run())
+    assert value == b"second"
+    assert deleted is None
+    assert backend.hits == 1
+    assert backend.misses == 1
+
+
+def test_expired_entry_misses(tmp_path):
+    """Entries are not served past their ttl"""
+    async def run():
+        backend = open_backend(tmp_path / "cache")
+        await backend.set("a", b"value", 0)
+        value = await backend.get("a")
+        await backend.close()
+        return value
+
+    assert asyncio.run(run()) is None
+
+
+def test_entries_are_shared_between_mappings(tmp_path):
+    """A second mapping of the same file, as in another worker, sees the writes"""
+    async def run():
+        writer = open_backend(tmp_path / "cache")
+        reader = open_backend(tmp_path / "cache")
+        await writer.set("a", b"value", 60)
+        value = await reader.get("a")
+        await writer.close()
+        await reader.close()
+        return value
+
+    assert asyncio.run(run()) == b"value"
+
+
+def test_ring_wraparound_drops_overwritten_entries(tmp_path):
+    """Once the ring wraps, entries whose bytes were overwritten miss and newer ones survive"""
+    async def run():
+        backend = open_backend(tmp_path / "cache")
+        assert backend.data_size == mmap.PAGESIZE
+        chunk = backend.data_size // 4 - 24
+        values = {f"key{i}": bytes([i]) * chunk for i in range(6)}
+        for key, value in values.items():
+            await backend.set(key, value, 60)
+        found = {key: await backend.get(key) for key in values}
+        stats = backend.stats()
+        await backend.close()
+        return values, found, stats
+
+    values, found, stats = asyncio.run(run())
+    assert stats["bytes_written"] > stats["data_size"]
+    assert found["key0"] is None
+    assert found["key1"] is None
+    for key in ("key2", "key3", "key4", "key5"):
+        assert found[key] == values[key]
+
+
+def test_entries_never_wrap_across_the_ring_end(tmp_path):
+    """An entry that does not fit before the end of the ring starts over at its beginning"""
+    async def run():
+        backend = open_backend(tmp_path / "cache")
+        for i in range(4):
+            await backend.set(f"key{i}", b"x" * 1000, 60)
+        head_before = backend.stats()["bytes_written"]
+        await backend.set("tail", b"y" * 1000, 60)
+        value = await backend.get("tail")
+        head_after = backend.stats()["bytes_written"]
+        await backend.close()
+        return backend.data_size, head_before, head_after, value
+
+    data_size, head_before, head_after, value = asyncio.run(run())
+    assert head_before == 4000
+    assert value == b"y" * 1000
+    # 1000 bytes from offset 4000 would cross the end, the entry is written at offset 0
+    assert head_after == data_size + 1000
+
+
+def test_oversized_value_is_not_stored(tmp_path):
+    """Values above a quarter of the ring are skipped"""
+    async def run():
+        backend = open_backend(tmp_path / "cache")
+        await backend.set("big", b"x" * (backend.data_size // 2), 60)
+        value = await backend.get("big")
+        await backend.close()
+        return backend, value
+
+    backend, value = asyncio.run(run())
+    assert value is None
+    assert backend.too_large == 1
+
+
+def test_reopen_with_same_geometry_keeps_entries(tmp_path):
+    """Restarted workers reuse the existing file"""
+    async def run():
+        first = open_backend(tmp_path / "cache")
+        await first.set("a", b"value", 60)
+        await first.close()
+        second = open_backend(tmp_path / "cache")
+        value = await second.get("a")
+        await second.close()
+        return value
+
+    assert asyncio.run(run()) == b"value"
+
+
+def test_other_geometry_replaces_the_file(tmp_path):
+    """Changed settings start a fresh file while old mappings keep working on theirs"""
+    path = tmp_path / "cache"
+
+    async def run():
+        old = open_backend(path)
+        await old.set("a", b"old", 60)
+        inode = path.stat().st_ino
+        new = open_backend(path, slots=SLOTS * 2)
+        replaced = path.stat().st_ino != inode
+        missing = await new.get("a")
+        await new.set("a", b"new", 60)
+        old_value = await old.get("a")
+        new_value = await new.get("a")
+        await old.close()
+        await new.close()
+        return replaced, missing, old_value, new_value
+
+    replaced, missing, old_value, new_value = asyncio.run(run())
+    assert replaced
+    assert missing is None
+    assert old_value == b"old"
+    assert new_value == b"new"
+
+
+def test_fill_lock_is_granted_when_free(tmp_path):
+    """An uncontended fill lock is acquired without waiting"""
+    async def run():
+        backend = open_backend(tmp_path / "cache")
+        async with backend.lock("a", timeout=0.1) as locked:
+            pass
+        await backend.close()
+        return backend, locked
+
+    backend, locked = asyncio.run(run())
+    assert locked
+    assert backend.lock_waits == 0
+
+
+def test_fill_lock_excludes_coroutines_of_one_process(tmp_path):
+    """A second coroutine waits for the fill lock held by the first one"""
+    async def run():
+        backend = open_backend(tmp_path / "cache")
+        events = []
+
+        async def fill(name):
+            async with backend.lock("a", timeout=1.0) as locked:
+                events.append((name, "start", locked))
+                await asyncio.sleep(0.05)
+                events.append((name, "end", locked))
+
+        await asyncio.gather(fill("first"), fill("second"))
+        await backend.close()
+        return backend, events
+
+    backend, events = asyncio.run(run())
+    assert events == [
+        ("first", "start", True), ("first", "end", True),
+        ("second", "start", True), ("second", "end", True),
+    ]
+    assert backend.lock_waits == 1
+
+
+def test_fill_lock_held_in_process_times_out(tmp_path):
+    """A coroutine gives up on a fill lock another coroutine keeps past the timeout"""
+    async def run():
+        backend = open_backend(tmp_path / "cache")
+        async with backend.lock("a", timeout=0.1) as first:
+            async with backend.lock("a", timeout=0.05) as second:
+                pass
+        async with backend.lock("a", timeout=0.05) as third:
+            pass
+        await backend.close()
+        return backend, first, second, third
+
+    backend, first, second, third = asyncio.run(run())
+    assert (first, second, third) == (True, False, True)
+    assert backend.lock_timeouts == 1
+
+
+HOLD_INDEX_LOCK = """
+import fcntl, os, sys, time
+fd = os.open(sys.argv[1], os.O_RDWR)
+fcntl.lockf(fd, fcntl.LOCK_EX, 1, 0)
+print("locked", flush=True)
+time.sleep(float(sys.argv[2]))
+"""
+
+
+def test_index_lock_held_by_another_worker_does_not_block_the_loop(tmp_path):
+    """Waiting for the index lock of another process keeps the event loop running"""
+    path = tmp_path / "cache"
+    backend = open_backend(path)
+    holder = subprocess.Popen(
+        [sys.executable, "-c", HOLD_INDEX_LOCK, str(path), "0.2"], stdout=subprocess.PIPE, text=True
+    )
+    try:
+        assert holder.stdout.readline().strip() == "locked"
+
+        async def run():
+            ticks = 0
+
+            async def tick():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            ticker = asyncio.create_task(tick())
+            await backend.set("a", b"value", 60)
+            value = await backend.get("a")
+            ticker.cancel()
+            await backend.close()
+            return ticks, value
+
+        ticks, value = asyncio.run(run())
+    finally:
+        holder.wait()
+    assert value == b"value"
+    assert backend.index_waits == 1
+    assert ticks >= 5
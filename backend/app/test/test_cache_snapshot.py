@@ -0,0 +1,90 @@
+"""Unit tests for the on-disk cache snapshot"""
+import asyncio
+import time
+import zlib
+
+import pytest
+
+from app.schemas.anime import BannerAnime, CoverImage
+from app.services.anilist_service import AniListService
+from app.services.cache import CacheEntry
+from app.services.cache_snapshot import (
+    _HEADER, decode_snapshot, encode_snapshot, read_snapshot, write_snapshot
+)
+
+
+def anime(anime_id: int) -> BannerAnime:
+    return BannerAnime(
+        id=anime_id,
+        title=f"Title {anime_id}",
+        description="Synopsis",
+        coverImage=CoverImage(large="https://img/large.jpg", color="#ffffff"),
+        genres=["Action", "Drama"],
+        seasonYear=2024
+    )
+
+
+def entries():
+    now = time.time()
+    return [
+        ("key-a", CacheEntry(value={"Page": {"media": [{"id": 1}]}}, fetched_at=now, expires_at=now + 60, etag="a1")),
+        ("key-b", CacheEntry(value={"Media": None}, fetched_at=now - 120, expires_at=now - 60, etag="b2")),
+    ]
+
+
+def test_encode_decode_round_trip():
+    """Entries and anime come back unchanged"""
+    cached = entries()
+    records = [(anime(1), ["Title 1", "Alt"]), (anime(2), [])]
+    written_at, decoded_entries, decoded_anime = decode_snapshot(encode_snapshot(cached, records))
+
+    assert written_at == pytest.approx(time.time(), abs=5)
+    assert [key for key, _ in decoded_entries] == ["key-a", "key-b"]
+    for (_, original), (_, restored) in zip(cached, decoded_entries):
+        assert restored == original
+    assert [(item.model_dump(), titles) for item, titles in decoded_anime] == \
+        [(item.model_dump(), titles) for item, titles in records]
+
+
+def test_write_and_read_file(tmp_path):
+    """Snapshots written to disk read back, a missing file is None"""
+    path = str(tmp_path / "snapshots" / "cache.bin")
+    assert read_snapshot(path) is None
+    size = write_snapshot(path, entries(), [(anime(1), ["Title 1"])])
+    assert size == (tmp_path / "snapshots" / "cache.bin").stat().st_size
+    _, decoded_entries, decoded_anime = read_snapshot(path)
+    assert len(decoded_entries) == 2
+    assert decoded_anime[0][0].id == 1
+    assert not list((tmp_path / "snapshots").glob("*.tmp"))
+
+
+def valid_snapshot() -> bytes:
+    return encode_snapshot(entries(), [(anime(1), ["Title 1"])])
+
+
+@pytest.mark.parametrize("damage", [
+    pytest.param(lambda raw: raw[:10], id="truncated header"),
+    pytest.param(lambda raw: b"XXXX" + raw[4:], id="wrong magic"),
+    pytest.param(lambda raw: raw[:_HEADER.size] + b"not zlib at all", id="body not zlib"),
+    pytest.param(lambda raw: raw[:len(raw) // 2], id="truncated body"),
+])
+def test_damaged_snapshot_raises_value_error(damage):
+    """Every kind of damage surfaces as ValueError"""
+    with pytest.raises(ValueError):
+        decode_snapshot(damage(valid_snapshot()))
+
+
+def test_truncated_body_records_raise_value_error():
+    """A complete zlib stream missing records is reported as damaged too"""
+    raw = valid_snapshot()
+    body = zlib.decompress(raw[_HEADER.size:])
+    with pytest.raises(ValueError):
+        decode_snapshot(raw[:_HEADER.size] + zlib.compress(body[:len(body) // 3]))
+
+
+def test_service_starts_empty_on_damaged_snapshot(tmp_path):
+    """A half-written snapshot is skipped instead of failing startup"""
+    path = tmp_path / "cache.bin"
+    raw = valid_snapshot()
+    path.write_bytes(raw[:len(raw) - 20])
+    assert asyncio.run(AniListService.load_snapshot(str(path))) == 0
@@ -0,0 +1,160 @@
+"""Unit tests for the catalog mirror, its incremental sync and the lists served from it"""
+import asyncio
+import time
+
+import pytest
+
+from app.schemas.anime import BannerAnime, CoverImage
+from app.services.anilist_service import AniListService
+from app.services.catalog_store import CatalogStore
+from app.services.catalog_sync import CatalogSync
+
+
+def media(anime_id: int, updated_at: int, **values):
+    return {
+        "id": anime_id,
+        "title": {"romaji": f"Title {anime_id}"},
+        "updatedAt": updated_at,
+        "popularity": values.pop("popularity", 1000 - anime_id),
+        **values,
+    }
+
+
+def parse(item) -> BannerAnime:
+    return BannerAnime(
+        id=item["id"],
+        title=item["title"]["romaji"],
+        coverImage=CoverImage(),
+        popularity=item.get("popularity"),
+        genres=item.get("genres", []),
+        season=item.get("season"),
+        seasonYear=item.get("seasonYear"),
+    )
+
+
+class FakeAniList:
+    """UPDATED_AT_DESC pages over a mutable media list"""
+
+    def __init__(self, items):
+        self.media = items
+        self.pages = []
+
+    def catalog_sync_query(self, page, per_page):
+        return "query", {"page": page, "perPage": per_page}
+
+    async def _make_request(self, query, variables, **kwargs):
+        self.pages.append(variables["page"])
+        ordered = sorted(self.media, key=lambda item: -item["updatedAt"])
+        start = (variables["page"] - 1) * variables["perPage"]
+        return {"Page": {
+            "pageInfo": {"hasNextPage": start + variables["perPage"] < len(ordered)},
+            "media": ordered[start:start + variables["perPage"]],
+        }}
+
+    @staticmethod
+    def _parse_anime_to_banner(item):
+        return parse(item)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CatalogStore(str(tmp_path / "catalog.sqlite3"))
+    yield store
+    store.close()
+
+
+def test_upsert_touches_changed_rows_only(store):
+    """Re-upserting identical media changes nothing"""
+    items = [(item, parse(item)) for item in (media(1, 10), media(2, 20))]
+    assert store.upsert(items) == 2
+    assert store.upsert(items) == 0
+    changed = media(2, 30, popularity=5)
+    assert store.upsert([(changed, parse(changed))]) == 1
+    assert store.get(2).popularity == 5
+    assert store.count() == 2
+
+
+def test_list_filters_and_sorts(store):
+    """Lists use the genre and season filters, most popular first"""
+    items = [
+        media(1, 10, popularity=10, genres=["Action"], season="WINTER", seasonYear=2024),
+        media(2, 10, popularity=30, genres=["Action", "Drama"], season="SPRING", seasonYear=2024),
+        media(3, 10, popularity=20, genres=["Drama"], season="WINTER", seasonYear=2024),
+    ]
+    store.upsert([(item, parse(item)) for item in items])
+    assert [anime.id for anime in store.list(genre="Action")] == [2, 1]
+    assert [anime.id for anime in store.list(season="WINTER", season_year=2024)] == [3, 1]
+    assert [anime.id for anime in store.list(limit=1, offset=1)] == [3]
+
+
+def test_freshness_follows_the_last_completed_sync(store):
+    """The mirror serves lists only for max_age after a completed crawl"""
+    assert not store.is_fresh(3600)
+    store.set_state(watermark=100, synced_at=time.time() - 10)
+    assert store.ready and store.is_fresh(3600)
+    assert not store.is_fresh(5)
+
+
+def test_sync_crawls_until_the_watermark(store):
+    """A completed crawl stores every media; the next one stops at the watermark"""
+    upstream = FakeAniList([media(i, 1000 - i) for i in range(25)])
+    sync = CatalogSync(upstream, store, max_pages=10, page_size=10)
+    assert asyncio.run(sync.sync_once())
+    assert store.count() == 25
+    assert store.ready and store.is_fresh(60)
+    assert store.get_state()["watermark"] == "1000"
+
+    upstream.media.append(media(99, 2000))
+    upstream.pages.clear()
+    assert asyncio.run(sync.sync_once())
+    assert upstream.pages == [1]
+    assert store.get(99) is not None
+    assert store.get_state()["watermark"] == "2000"
+
+
+def test_resumed_crawl_does_not_skip_media_shifted_onto_crawled_pages(store):
+    """Media removed between runs move later media forward, the resumed run steps back"""
+    items = [media(i, 1000 - i) for i in range(100)]
+    upstream = FakeAniList(items)
+    sync = CatalogSync(upstream, store, max_pages=3, page_size=10)
+    assert not asyncio.run(sync.sync_once())
+    assert store.get_state()["cursor_id"] == "29"
+
+    upstream.media = [item for item in items if not 1 <= item["id"] <= 15]
+    while not asyncio.run(sync.sync_once()):
+        pass
+    assert [item["id"] for item in upstream.media if store.get(item["id"]) is None] == []
+    assert store.get_state()["cursor_id"] == "0"
+
+
+@pytest.fixture
+def mirrored(store, monkeypatch):
+    """Service reading lists from a synced mirror, AniList stubbed"""
+    item = media(1, 10, season="WINTER", seasonYear=2024)
+    store.upsert([(item, parse(item))])
+    store.set_state(watermark=10, synced_at=time.time())
+    calls = []
+
+    async def get_media_page(filters, page, per_page, query_type, fields, **kwargs):
+        calls.append(query_type)
+        return []
+
+    monkeypatch.setattr(AniListService, "catalog", store)
+    monkeypatch.setattr(AniListService, "_get_media_page", get_media_page)
+    return calls
+
+
+def test_trending_and_popular_always_come_from_anilist(mirrored):
+    """Counters the sync does not refresh are never served from the mirror"""
+    asyncio.run(AniListService.get_trending_anime())
+    asyncio.run(AniListService.get_popular_anime())
+    assert mirrored == ["trending", "popular"]
+
+
+def test_outdated_mirror_falls_back_to_anilist(mirrored, store, monkeypatch):
+    """Lists come from the mirror while it is fresh, from AniList once it is not"""
+    assert [anime.id for anime in asyncio.run(AniListService.get_seasonal_anime("winter", 2024))] == [1]
+    assert mirrored == []
+    store.set_state(synced_at=time.time() - 10 ** 6)
+    asyncio.run(AniListService.get_seasonal_anime("winter", 2024))
+    assert mirrored == ["seasonal"]
@@ -0,0 +1,102 @@
+"""Unit tests for the upstream circuit breaker"""
+from app.services.circuit_breaker import CircuitBreaker, CircuitState
+
+
+def tripped(open_seconds: float = 60.0, **kwargs) -> CircuitBreaker:
+    """Breaker opened by two failed calls"""
+    breaker = CircuitBreaker(min_calls=2, error_rate=0.5, open_seconds=open_seconds, **kwargs)
+    breaker.record(False, 0.1, "boom")
+    breaker.record(False, 0.1, "boom")
+    return breaker
+
+
+def test_stays_closed_below_min_calls():
+    """A single failure is not enough evidence to open"""
+    breaker = CircuitBreaker(min_calls=5)
+    breaker.record(False, 0.1, "boom")
+    assert breaker.state is CircuitState.CLOSED
+    assert breaker.allow()
+
+
+def test_stays_closed_below_error_rate():
+    """Occasional failures among successes keep the circuit closed"""
+    breaker = CircuitBreaker(min_calls=4, error_rate=0.5)
+    for success in (True, False, True, True, False, True):
+        breaker.record(success, 0.1)
+    assert breaker.state is CircuitState.CLOSED
+
+
+def test_opens_on_error_rate_and_rejects():
+    """Reaching the error rate opens the circuit and calls fail fast"""
+    breaker = tripped()
+    assert breaker.state is CircuitState.OPEN
+    assert breaker.opened == 1
+    assert breaker.last_error == "boom"
+    assert not breaker.allow()
+    assert breaker.rejected == 1
+    assert 59 < breaker.retry_after() <= 60
+
+
+def test_opens_on_slow_calls():
+    """Successful but slow calls open the circuit too"""
+    breaker = CircuitBreaker(min_calls=2, slow_call_seconds=1.0, slow_call_rate=1.0)
+    breaker.record(True, 2.0)
+    breaker.record(True, 3.0)
+    assert breaker.state is CircuitState.OPEN
+
+
+def test_half_open_probe_success_closes():
+    """After open_seconds one probe is let through and its success closes the circuit"""
+    breaker = tripped(open_seconds=0)
+    assert breaker.snapshot()["state"] == "half_open"
+    assert breaker.allow()
+    assert breaker.state is CircuitState.HALF_OPEN
+    # Only half_open_calls probes at a time
+    assert not breaker.allow()
+    breaker.record(True, 0.1)
+    assert breaker.state is CircuitState.CLOSED
+    assert breaker.snapshot()["window_calls"] == 0
+
+
+def test_half_open_probe_failure_reopens():
+    """A failed probe opens the circuit again"""
+    breaker = tripped(open_seconds=0)
+    assert breaker.allow()
+    breaker.open_seconds = 60
+    breaker.record(False, 0.1, "still down")
+    assert breaker.state is CircuitState.OPEN
+    assert breaker.opened == 2
+    assert not breaker.allow()
+
+
+def test_half_open_needs_every_probe_to_succeed():
+    """With several probes the circuit closes only after all of them succeeded"""
+    breaker = tripped(open_seconds=0, half_open_calls=2)
+    assert breaker.allow() and breaker.allow()
+    breaker.record(True, 0.1)
+    assert breaker.state is CircuitState.HALF_OPEN
+    breaker.record(True, 0.1)
+    assert breaker.state is CircuitState.CLOSED
+
+
+def test_release_returns_probe_slot():
+    """A probe that never reached upstream frees its slot"""
+    breaker = tripped(open_seconds=0)
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+
+def test_late_outcome_while_open_is_ignored():
+    """Calls started before the circuit opened do not reset it"""
+    breaker = tripped()
+    breaker.record(True, 0.1)
+    assert breaker.state is CircuitState.OPEN
+
+
+def test_disabled_breaker_always_allows():
+    """Disabled breaker ignores outcomes"""
+    breaker = CircuitBreaker(min_calls=1, enabled=False)
+    breaker.record(False, 0.1, "boom")
+    assert breaker.state is CircuitState.CLOSED
+    assert breaker.allow()
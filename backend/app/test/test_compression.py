@@ -0,0 +1,143 @@
+"""Unit tests for content coding negotiation, the compression middleware and stored variants"""
+import gzip
+from types import SimpleNamespace
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.core import compression
+from app.core.compression import CompressionMiddleware, compress, negotiate
+from app.core.http_cache import RenderedResponse
+
+BODY = b'{"data": "' + b"anime " * 500 + b'"}'
+
+
+@pytest.fixture
+def no_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+
+
+def test_negotiate_prefers_brotli():
+    """br wins over gzip whenever the client accepts it"""
+    pytest.importorskip("brotli")
+    assert negotiate("gzip, deflate, br") == "br"
+    assert negotiate("br;q=0.1, gzip") == "br"
+    assert negotiate("br;q=0, gzip") == "gzip"
+
+
+def test_negotiate_without_brotli(no_brotli):
+    """gzip is used when brotli is not installed"""
+    assert negotiate("gzip, deflate, br") == "gzip"
+    assert negotiate("br") is None
+
+
+@pytest.mark.parametrize("header,expected", [
+    ("gzip", "gzip"),
+    ("*", "gzip"),
+    ("gzip;q=0", None),
+    ("gzip;q=oops", None),
+    ("identity", None),
+    ("", None),
+])
+def test_negotiate_gzip_and_identity(no_brotli, header, expected):
+    """Zero or malformed quality disables a coding, unknown codings mean identity"""
+    assert negotiate(header) == expected
+
+
+def test_compress_round_trip():
+    """Dynamic and static levels both decode back to the body"""
+    assert gzip.decompress(compress(BODY, "gzip")) == BODY
+    assert gzip.decompress(compress(BODY, "gzip", static=True)) == BODY
+    brotli = pytest.importorskip("brotli")
+    assert brotli.decompress(compress(BODY, "br")) == BODY
+    assert brotli.decompress(compress(BODY, "br", static=True)) == BODY
+
+
+@pytest.fixture
+def client():
+    async def large(request):
+        return Response(BODY, media_type="application/json")
+
+    async def small(request):
+        return JSONResponse({"id": 1})
+
+    async def encoded(request):
+        return Response(gzip.compress(BODY), media_type="application/json", headers={"Content-Encoding": "gzip"})
+
+    app = Starlette(routes=[Route("/large", large), Route("/small", small), Route("/encoded", encoded)])
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    return TestClient(app)
+
+
+def test_middleware_compresses_large_bodies(client):
+    """Bodies above the minimum size are compressed with the negotiated coding"""
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.content == BODY
+
+
+def test_middleware_brotli(client):
+    """Clients accepting br get brotli"""
+    pytest.importorskip("brotli")
+    response = client.get("/large", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert response.content == BODY
+
+
+def test_middleware_leaves_small_and_encoded_bodies(client):
+    """Small bodies and responses that already have a coding pass through"""
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.json() == {"id": 1}
+
+    response = client.get("/encoded", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == BODY
+
+    response = client.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.content == BODY
+
+
+def rendered(body: bytes = BODY) -> RenderedResponse:
+    return RenderedResponse(
+        body=body, etag='W/"x"', last_modified=None, max_age=60, stale_while_revalidate=0, expires_at=None
+    )
+
+
+def request(accept_encoding: str):
+    return SimpleNamespace(headers={"accept-encoding": accept_encoding})
+
+
+def test_rendered_variants_are_compressed_once():
+    """Each coding is compressed on first request and reused afterwards"""
+    response = rendered()
+    body, encoding = response.encoded(request("gzip"))
+    assert encoding == "gzip" and gzip.decompress(body) == BODY
+    assert response.encoded(request("gzip"))[0] is body
+    assert list(response.variants) == ["gzip"]
+
+    brotli = pytest.importorskip("brotli")
+    body, encoding = response.encoded(request("gzip, br"))
+    assert encoding == "br" and brotli.decompress(body) == BODY
+    assert set(response.variants) == {"gzip", "br"}
+
+
+def test_rendered_identity_and_small_bodies():
+    """Identity clients and bodies below the minimum size get the plain body"""
+    response = rendered()
+    assert response.encoded(request("identity")) == (BODY, None)
+    small = rendered(b'{"id": 1}')
+    assert small.encoded(request("gzip, br")) == (b'{"id": 1}', None)
+    assert response.variants == {} and small.variants == {}
+
+
+def test_rendered_to_response_sets_content_encoding():
+    """Stored variants are sent with their Content-Encoding"""
+    response = rendered().to_response(request("gzip"), {})
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(response.body) == BODY
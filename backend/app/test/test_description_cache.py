@@ -0,0 +1,59 @@
+"""Unit tests for the memo of cleaned descriptions"""
+from app.services import media_parser
+from app.services.media_parser import DESCRIPTION_LIMIT, DescriptionCache, parse_media
+
+
+def test_cleans_and_truncates():
+    """HTML is stripped, whitespace collapsed and long text cut at the limit"""
+    cache = DescriptionCache()
+    assert cache.get(1, "<i>Space</i>\n\n cowboys <br>") == "Space cowboys"
+    long_text = cache.get(2, "word " * DESCRIPTION_LIMIT)
+    assert len(long_text) == DESCRIPTION_LIMIT + 3 and long_text.endswith("...")
+
+
+def test_empty_descriptions_pass_through():
+    """None and empty text are returned as they are and not cached"""
+    cache = DescriptionCache()
+    assert cache.get(1, None) is None
+    assert cache.get(1, "") == ""
+    assert (cache.hits, cache.misses, len(cache.entries)) == (0, 0, 0)
+
+
+def test_same_text_is_cleaned_once(monkeypatch):
+    """Repeated descriptions of an anime are served from the memo"""
+    cache = DescriptionCache()
+    calls = []
+    strip = media_parser._strip_html
+    monkeypatch.setattr(media_parser, "_strip_html", lambda text: calls.append(text) or strip(text))
+    first = cache.get(1, "<b>Synopsis</b>")
+    second = cache.get(1, "<b>Synopsis</b>")
+    assert first == second == "Synopsis"
+    assert len(calls) == 1
+    assert cache.stats()["hit_rate"] == 0.5
+
+
+def test_changed_text_or_other_media_is_a_new_entry():
+    """Keys include the media id and the raw text, an edited synopsis is cleaned again"""
+    cache = DescriptionCache()
+    cache.get(1, "Old synopsis")
+    assert cache.get(1, "New synopsis") == "New synopsis"
+    cache.get(2, "Old synopsis")
+    assert (cache.hits, cache.misses) == (0, 3)
+
+
+def test_bounded_size():
+    """Least recently used descriptions are evicted over max_size"""
+    cache = DescriptionCache(max_size=2)
+    for media_id in range(3):
+        cache.get(media_id, f"Synopsis {media_id}")
+    assert len(cache.entries) == 2
+    assert cache.stats()["evictions"] == 1
+
+
+def test_parser_uses_the_shared_cache(monkeypatch):
+    """parse_media looks descriptions up in the module cache"""
+    cache = DescriptionCache()
+    monkeypatch.setattr(media_parser, "description_cache", cache)
+    for _ in range(3):
+        parse_media({"id": 5, "description": "<p>Text</p>"})
+    assert (cache.hits, cache.misses) == (2, 1)
@@ -0,0 +1,97 @@
+"""Unit tests for the genre/season/format/status inverted indexes"""
+from app.schemas.anime import BannerAnime, CoverImage
+from app.services.facet_index import FacetIndex
+
+
+def anime(anime_id: int, genres=(), season=None, year=None, format=None, status=None, popularity=None, score=None):
+    return BannerAnime(
+        id=anime_id,
+        title=f"Title {anime_id}",
+        coverImage=CoverImage(),
+        genres=list(genres),
+        season=season,
+        seasonYear=year,
+        format=format,
+        status=status,
+        popularity=popularity,
+        meanScore=score,
+    )
+
+
+def build_index() -> FacetIndex:
+    index = FacetIndex()
+    for item in (
+        anime(1, ["Action", "Drama"], "WINTER", 2024, "TV", "FINISHED", popularity=500, score=80),
+        anime(2, ["Action"], "WINTER", 2024, "MOVIE", "FINISHED", popularity=900, score=70),
+        anime(3, ["Action", "Comedy"], "SPRING", 2024, "TV", "RELEASING", popularity=300, score=90),
+        anime(4, ["Drama"], "WINTER", 2023, "TV", "FINISHED", popularity=100),
+        anime(5, ["Comedy"], popularity=None, score=60),
+    ):
+        index.add(item)
+    return index
+
+
+def ids(result) -> list:
+    return [item.id for item in result[0]]
+
+
+def test_facets_intersect():
+    """Every given facet must match"""
+    index = build_index()
+    assert ids(index.query(genres=["Action"])) == [2, 1, 3]
+    assert ids(index.query(genres=["Action", "Drama"])) == [1]
+    assert ids(index.query(genres=["Action"], format="TV", status="FINISHED")) == [1]
+    assert ids(index.query(genres=["Action"], season="WINTER", year=2024)) == [2, 1]
+
+
+def test_season_or_year_alone_matches_either_half():
+    """Season without year matches all years, year without season all seasons"""
+    index = build_index()
+    assert ids(index.query(season="WINTER")) == [2, 1, 4]
+    assert ids(index.query(year=2024)) == [2, 1, 3]
+
+
+def test_unknown_facet_value_matches_nothing():
+    """A value no anime has gives an empty page"""
+    index = build_index()
+    assert index.query(genres=["Action", "Horror"]) == ([], 0)
+    assert index.query(format="OVA") == ([], 0)
+
+
+def test_no_filters_list_everything_with_unknown_values_last():
+    """Anime without popularity or score sort after the rest in both directions"""
+    index = build_index()
+    assert ids(index.query()) == [2, 1, 3, 4, 5]
+    assert ids(index.query(descending=False)) == [4, 3, 1, 2, 5]
+    assert ids(index.query(sort="score")) == [3, 1, 2, 5, 4]
+
+
+def test_paging_reports_total():
+    """Pages slice the sorted matches, total counts all of them"""
+    index = build_index()
+    page, total = index.query(genres=["Action"], limit=2, offset=1)
+    assert [item.id for item in page] == [1, 3]
+    assert total == 3
+
+
+def test_update_moves_anime_between_postings():
+    """Re-added anime leave the lists of facets they no longer have"""
+    index = build_index()
+    version = index.version
+    index.add(anime(2, ["Drama"], "SUMMER", 2025, "TV", "FINISHED", popularity=900))
+    assert ids(index.query(genres=["Action"])) == [1, 3]
+    assert ids(index.query(genres=["Drama"], season="SUMMER", year=2025)) == [2]
+    assert index.query(format="MOVIE") == ([], 0)
+    assert index.stats()["formats"] == 1
+    assert index.version == version + 1
+
+
+def test_unchanged_record_does_not_bump_version():
+    """Re-adding identical data leaves the version alone, a changed record bumps it"""
+    index = build_index()
+    version = index.version
+    index.add(anime(4, ["Drama"], "WINTER", 2023, "TV", "FINISHED", popularity=100))
+    assert index.version == version
+    index.add(anime(4, ["Drama"], "WINTER", 2023, "TV", "FINISHED", popularity=150))
+    assert index.version == version + 1
+    assert index.query(genres=["Drama"], year=2023)[0][0].popularity == 150
@@ -0,0 +1,114 @@
+"""Unit tests for the home feed fetched with one aliased GraphQL query"""
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.services.anilist_service import AniListService
+from app.services.cache import LRUCache, ResponseCache
+from app.services.facet_index import FacetIndex
+from app.services.query_builder import aliased_page_query, page_query
+from app.services.rate_limiter import Priority
+from app.services.search_index import SearchIndex
+from app.services.singleflight import SingleFlight
+
+PER_PAGE = 2
+
+
+def test_aliased_query_prefixes_variables_per_section():
+    """Each section gets its own Page alias and variables, unset filters are dropped"""
+    query, variables = aliased_page_query(
+        {"top": {"sort": ["TRENDING_DESC"], "genre": None}, "action": {"genre": "Action"}},
+        per_page=5
+    )
+    assert "top:Page(" in query.text and "action:Page(" in query.text
+    assert variables == {"perPage": 5, "top_sort": ["TRENDING_DESC"], "action_genre": "Action"}
+
+
+def test_aliased_query_is_compiled_once():
+    """Same sections with other values reuse the compiled document"""
+    first, _ = aliased_page_query({"a": {"genre": "Action"}})
+    second, _ = aliased_page_query({"a": {"genre": "Drama"}})
+    assert first is second
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Service with an empty cache and AniList answering every alias of a query"""
+    state = SimpleNamespace(calls=[])
+
+    async def fetch(query, variables, priority=Priority.NORMAL, query_type=None):
+        state.calls.append(query_type)
+        aliases = sorted({name.split("_")[0] for name in variables if "_" in name})
+        return {
+            alias: {"media": [
+                {"id": 100 * number + i, "title": {"romaji": f"{alias} {i}"}} for i in range(variables["perPage"])
+            ]}
+            for number, alias in enumerate(aliases, 1)
+        }
+
+    monkeypatch.setattr(settings, "PREFETCH_ENABLED", False)
+    monkeypatch.setattr(settings, "HOME_FEED_GENRES", "Action,Drama")
+    monkeypatch.setattr(AniListService, "cache", ResponseCache(max_size=100, stale_ttl=600))
+    monkeypatch.setattr(AniListService, "inflight", SingleFlight())
+    monkeypatch.setattr(AniListService, "search_index", SearchIndex())
+    monkeypatch.setattr(AniListService, "facet_index", FacetIndex())
+    monkeypatch.setattr(AniListService, "catalog", None)
+    monkeypatch.setattr(AniListService, "_background_tasks", set())
+    monkeypatch.setattr(AniListService, "_prefetching", {})
+    monkeypatch.setattr(AniListService, "_prefetched", LRUCache(10))
+    monkeypatch.setattr(AniListService, "_fetch", fetch)
+    return state
+
+
+def test_home_feed_is_one_upstream_call(upstream):
+    """All rows come from a single request, genre rows keyed by their names"""
+    feed = asyncio.run(AniListService.get_home_feed(per_page=PER_PAGE))
+    assert upstream.calls == ["home"]
+    assert list(feed.genres) == ["Action", "Drama"]
+    rows = [feed.trending, feed.popular, feed.seasonal, feed.genres["Action"], feed.genres["Drama"]]
+    assert all(len(row) == PER_PAGE for row in rows)
+    assert len({anime.id for row in rows for anime in row}) == PER_PAGE * len(rows)
+    assert feed.season and feed.seasonYear
+
+
+def test_home_feed_genres_are_mapped_and_deduplicated(upstream):
+    """Localized genre names map to AniList ones, repeated genres give one row"""
+    feed = asyncio.run(AniListService.get_home_feed(per_page=PER_PAGE, genres=["Экшен", "Action", "drama"]))
+    assert list(feed.genres) == ["Action", "Drama"]
+
+
+def test_home_feed_seeds_standalone_lists(upstream):
+    """First pages of trending and popular are cached from the home response"""
+    async def run():
+        feed = await AniListService.get_home_feed(per_page=PER_PAGE)
+        trending = await AniListService.get_trending_anime(per_page=PER_PAGE)
+        popular = await AniListService.get_popular_anime(per_page=PER_PAGE)
+        return feed, trending, popular
+
+    feed, trending, popular = asyncio.run(run())
+    assert upstream.calls == ["home"]
+    assert [anime.id for anime in trending] == [anime.id for anime in feed.trending]
+    assert [anime.id for anime in popular] == [anime.id for anime in feed.popular]
+
+
+def test_seeding_keeps_newer_standalone_entries(upstream):
+    """A section only replaces standalone entries fetched before the home response"""
+    sections = {"trending": (AniListService.TRENDING_FILTERS, "trending")}
+    data = {"trending": {"media": [{"id": 1, "title": {"romaji": "Home"}}]}}
+    cache = AniListService.cache
+
+    async def seed(standalone_age: float):
+        cache.clear()
+        home_query, home_variables = aliased_page_query({"trending": AniListService.TRENDING_FILTERS}, None, PER_PAGE)
+        await cache.set(cache.make_key(home_query.digest, home_variables), data, ttl=60, fetched_at=time.time() - 30)
+        query, variables = page_query(AniListService.TRENDING_FILTERS, None, 1, PER_PAGE)
+        key = cache.make_key(query.digest, variables)
+        await cache.set(key, {"Page": {"media": []}}, ttl=600, fetched_at=time.time() - standalone_age)
+        await AniListService._seed_sections(home_query, home_variables, data, sections, None, PER_PAGE)
+        return cache.peek(key).value
+
+    assert asyncio.run(seed(standalone_age=10)) == {"Page": {"media": []}}
+    assert asyncio.run(seed(standalone_age=60)) == {"Page": data["trending"]}
@@ -0,0 +1,125 @@
+"""Unit tests for ETag/Last-Modified validators and 304 responses"""
+import time
+from email.utils import formatdate
+from typing import List
+
+from fastapi import Request
+from pydantic import BaseModel
+
+from app.core.http_cache import (
+    conditional_response, etag_matches, not_modified_since, record_source, track_sources
+)
+
+
+def make_request(path: str = "/api/v1/anime/trending", query: str = "", **headers) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "scheme": "http",
+        "server": ("test", 80),
+        "root_path": "",
+        "path": path,
+        "query_string": query.encode("ascii"),
+        "headers": [(name.replace("_", "-").encode("ascii"), value.encode("ascii")) for name, value in headers.items()],
+    })
+
+
+class Item(BaseModel):
+    id: int
+
+
+def test_etag_matches_weak_comparison():
+    """Weak and strong forms, lists and * all match"""
+    etag = 'W/"abc"'
+    assert etag_matches(make_request(if_none_match='W/"abc"'), etag)
+    assert etag_matches(make_request(if_none_match='"abc"'), etag)
+    assert etag_matches(make_request(if_none_match='"x", W/"abc"'), etag)
+    assert etag_matches(make_request(if_none_match="*"), etag)
+    assert not etag_matches(make_request(if_none_match='"abd"'), etag)
+    assert not etag_matches(make_request(), etag)
+
+
+def test_not_modified_since():
+    """Second precision, ignored with If-None-Match or a malformed date"""
+    fetched_at = time.time() - 100
+    since = formatdate(fetched_at + 1, usegmt=True)
+    assert not_modified_since(make_request(if_modified_since=since), fetched_at)
+    assert not not_modified_since(make_request(if_modified_since=formatdate(fetched_at - 10, usegmt=True)), fetched_at)
+    assert not not_modified_since(make_request(if_modified_since=since, if_none_match='"x"'), fetched_at)
+    assert not not_modified_since(make_request(if_modified_since="yesterday"), fetched_at)
+
+
+def test_etag_combines_source_tags():
+    """The ETag depends on the URL and the set of tags, not on recording order"""
+    with track_sources() as first:
+        record_source("a", 1.0)
+        record_source("b", 2.0)
+    with track_sources() as second:
+        record_source("b", 2.0)
+        record_source("a", 1.0)
+    request = make_request(query="page=1")
+    assert first.etag(request) == second.etag(request)
+    assert first.etag(request) != first.etag(make_request(query="page=2"))
+
+    with track_sources() as untagged:
+        record_source("a", 1.0)
+        record_source(None, 2.0)
+    assert untagged.etag(request) is None
+
+
+def test_trackers_nest():
+    """Sources of an inner tracker also count for the outer one"""
+    with track_sources() as outer:
+        record_source("a", 1.0, 100.0)
+        with track_sources() as inner:
+            record_source("b", 5.0, 50.0)
+    assert len(inner.sources) == 1
+    assert len(outer.sources) == 2
+    assert outer.fetched_at == 5.0
+    assert outer.expires_at == 50.0
+    assert not outer.has_local
+
+
+def response_for(request: Request, sources, max_age: int = 300):
+    return conditional_response(request, [Item(id=1)], List[Item], sources, max_age=max_age, stale_while_revalidate=30)
+
+
+def test_full_response_carries_validators():
+    """200 with ETag, Last-Modified and max-age capped by the data expiry"""
+    now = time.time()
+    with track_sources() as sources:
+        record_source("a", now - 10, now + 60)
+    response = response_for(make_request(), sources)
+    assert response.status_code == 200
+    assert response.body == b'[{"id":1}]'
+    assert response.headers["etag"] == sources.etag(make_request())
+    assert response.headers["last-modified"] == formatdate(now - 10, usegmt=True)
+    max_age = int(response.headers["cache-control"].split("max-age=")[1].split(",")[0])
+    assert 58 <= max_age <= 60
+    assert "stale-while-revalidate=30" in response.headers["cache-control"]
+
+
+def test_matching_validators_answer_304():
+    """If-None-Match or If-Modified-Since with the current copy give an empty 304"""
+    now = time.time()
+    with track_sources() as sources:
+        record_source("a", now - 10, now + 60)
+    etag = response_for(make_request(), sources).headers["etag"]
+
+    not_modified = response_for(make_request(if_none_match=etag), sources)
+    assert not_modified.status_code == 304
+    assert not_modified.body == b""
+    assert not_modified.headers["etag"] == etag
+
+    since = formatdate(now, usegmt=True)
+    assert response_for(make_request(if_modified_since=since), sources).status_code == 304
+    assert response_for(make_request(if_none_match='W/"other"'), sources).status_code == 200
+
+
+def test_untagged_sources_hash_the_body():
+    """Without precomputed tags the ETag is a hash of the body, still usable for 304"""
+    with track_sources() as sources:
+        record_source(None, time.time())
+    etag = response_for(make_request(), sources).headers["etag"]
+    assert etag.startswith('W/"')
+    assert response_for(make_request(if_none_match=etag), sources).status_code == 304
@@ -0,0 +1,70 @@
+"""Unit tests for the AniList media parser"""
+import pytest
+from pydantic import ValidationError
+
+from app.core.metrics import PARSE_ERRORS
+from app.services.media_parser import anime_from_record, anime_to_record, parse_media, parse_media_list
+
+
+def full_media(anime_id: int = 1) -> dict:
+    return {
+        "id": anime_id,
+        "title": {"romaji": "Shingeki no Kyojin", "english": "Attack on Titan", "native": "進撃の巨人"},
+        "description": "<p>Humanity  fights<br>titans.</p>",
+        "coverImage": {"large": "https://img/l.jpg", "medium": "https://img/m.jpg", "color": "#e4a15d"},
+        "bannerImage": "https://img/banner.jpg",
+        "meanScore": 85,
+        "popularity": 900000,
+        "status": "FINISHED",
+        "episodes": 25,
+        "genres": ["Action", "Drama"],
+        "startDate": {"year": 2013, "month": 4, "day": None},
+        "season": "SPRING",
+        "seasonYear": 2013,
+        "format": "TV",
+        "studios": {"nodes": [{"name": "Wit Studio"}, {"name": "Production I.G"}]},
+    }
+
+
+def test_parse_full_media():
+    """Every field is mapped, the english title and the main studio win"""
+    anime = parse_media(full_media())
+    assert anime.title == "Attack on Titan"
+    assert anime.description == "Humanity fightstitans."
+    assert (anime.coverImage.large, anime.coverImage.color) == ("https://img/l.jpg", "#e4a15d")
+    assert anime.startDate == "2013-04-01"
+    assert anime.studio == "Wit Studio"
+    assert (anime.meanScore, anime.episodes, anime.format) == (85, 25, "TV")
+
+
+def test_parse_sparse_media():
+    """Projected queries leave most fields out, they parse to defaults"""
+    anime = parse_media({"id": 7, "title": {"romaji": "Only Romaji"}})
+    assert anime.title == "Only Romaji"
+    assert anime.genres == []
+    assert anime.startDate is None and anime.studio is None and anime.description is None
+    assert parse_media({"id": 8}).title == "Unknown"
+    assert parse_media({"id": 9, "startDate": {"year": None}}).startDate is None
+
+
+def test_invalid_media_rejected():
+    """A missing id or wrongly typed field raises instead of building a broken model"""
+    with pytest.raises(ValueError):
+        parse_media({"title": {"romaji": "No id"}})
+    with pytest.raises(ValidationError):
+        parse_media({"id": 1, "genres": "Action"})
+
+
+def test_list_skips_broken_items():
+    """Broken items are counted and left out, the rest keep their order"""
+    before = sum(PARSE_ERRORS._values.values())
+    parsed = parse_media_list([full_media(1), {"id": "x"}, None, full_media(2)])
+    assert [anime.id for _, anime in parsed] == [1, 2]
+    assert parsed[0][0]["id"] == 1
+    assert sum(PARSE_ERRORS._values.values()) == before + 2
+
+
+def test_record_round_trip():
+    """Compact snapshot records rebuild the same model"""
+    anime = parse_media(full_media())
+    assert anime_from_record(anime_to_record(anime)) == anime
@@ -0,0 +1,103 @@
+"""Unit tests for the Prometheus text exposition and the request metrics middleware"""
+import re
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import metrics
+from app.core.metrics import MetricsMiddleware, Registry
+from app.main import app
+
+# name{labels} value, as in the text exposition format 0.0.4
+SAMPLE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_][a-zA-Z0-9_]*="(\\.|[^"\\])*",?)*\})? (-?[0-9.e+-]+|\+Inf|NaN)$')
+
+
+def test_counter_exposition():
+    """Counters get the _total suffix, sorted series and escaped label values"""
+    registry = Registry()
+    counter = registry.counter("requests", "Requests served", ["route"])
+    counter.inc(route="/b")
+    counter.inc(2.5, route='/a"\n')
+    assert registry.render() == (
+        "# HELP requests Requests served\n"
+        "# TYPE requests counter\n"
+        'requests_total{route="/a\\"\\n"} 2.5\n'
+        'requests_total{route="/b"} 1\n'
+    )
+
+
+def test_histogram_buckets_are_cumulative():
+    """Each bucket counts observations up to its bound, +Inf counts all"""
+    registry = Registry()
+    histogram = registry.histogram("latency_seconds", "Latency", ["kind"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, kind="x")
+    lines = registry.render().splitlines()
+    assert lines[2:] == [
+        'latency_seconds_bucket{kind="x",le="0.1"} 1',
+        'latency_seconds_bucket{kind="x",le="1"} 3',
+        'latency_seconds_bucket{kind="x",le="+Inf"} 4',
+        'latency_seconds_sum{kind="x"} 4.25',
+        'latency_seconds_count{kind="x"} 4',
+    ]
+
+
+def test_collector_families():
+    """Collected counters get _total, gauges keep their name"""
+    registry = Registry()
+    registry.add_collector(lambda: [
+        ("hits", "counter", "Cache hits", [({"cache": "a"}, 3)]),
+        ("size", "gauge", "Entries", [({}, 0.5)]),
+    ])
+    assert registry.render().splitlines() == [
+        "# HELP hits Cache hits",
+        "# TYPE hits counter",
+        'hits_total{cache="a"} 3',
+        "# HELP size Entries",
+        "# TYPE size gauge",
+        "size 0.5",
+    ]
+
+
+def test_middleware_labels_by_route_template(monkeypatch):
+    """Requests are recorded per route template, unknown paths share one label"""
+    registry = Registry()
+    monkeypatch.setattr(metrics, "HTTP_REQUESTS", registry.counter("http_requests", "Requests", ["method", "route", "status"]))
+    monkeypatch.setattr(metrics, "HTTP_DURATION", registry.histogram("http_duration", "Duration", ["method", "route"]))
+
+    api = FastAPI()
+
+    @api.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    client = TestClient(MetricsMiddleware(api))
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/missing")
+    rendered = registry.render()
+    assert 'http_requests_total{method="GET",route="/items/{item_id}",status="200"} 2' in rendered
+    assert 'http_requests_total{method="GET",route="unmatched",status="404"} 1' in rendered
+    assert 'http_duration_count{method="GET",route="/items/{item_id}"} 2' in rendered
+
+
+def test_metrics_endpoint_is_valid_exposition():
+    """Every family is announced with HELP and TYPE before its samples, every sample parses"""
+    response = TestClient(app).get("/api/v1/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    announced = set()
+    for line in response.text.splitlines():
+        if line.startswith("# HELP "):
+            continue
+        if line.startswith("# TYPE "):
+            _, _, name, metric_type = line.split(" ")
+            assert metric_type in ("counter", "gauge", "histogram")
+            announced.add(name)
+            continue
+        assert SAMPLE.match(line), line
+        name = line.split("{")[0].split(" ")[0]
+        assert re.sub(r"_(total|bucket|sum|count)$", "", name) in announced or name in announced, line
+    assert "anilist_request_duration_seconds" in announced
+    assert "cache_hit_ratio" in announced
@@ -0,0 +1,167 @@
+"""Unit tests for next-page prefetching and how user requests and refreshes join it"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.anilist_service import AniListService
+from app.services.cache import LRUCache, ResponseCache
+from app.services.facet_index import FacetIndex
+from app.services.query_builder import page_query
+from app.services.rate_limiter import Priority, RateLimiter, RequestShed
+from app.services.search_index import SearchIndex
+from app.services.singleflight import SingleFlight
+
+PER_PAGE = 2
+
+
+def page(number: int) -> dict:
+    return {"Page": {"media": [
+        {"id": number * 10 + i, "title": {"romaji": f"Title {number}-{i}"}} for i in range(PER_PAGE)
+    ]}}
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Fresh service state with AniList replaced by a gated fake"""
+    calls = []
+    state = SimpleNamespace(calls=calls, gate=None, shed=False)
+
+    async def fetch(query, variables, priority=Priority.NORMAL, query_type=None):
+        calls.append((variables["page"], priority))
+        if priority >= Priority.SPECULATIVE and state.shed:
+            raise RequestShed()
+        if state.gate is not None:
+            await state.gate.wait()
+        return page(variables["page"])
+
+    monkeypatch.setattr(AniListService, "cache", ResponseCache(max_size=100, stale_ttl=600))
+    monkeypatch.setattr(AniListService, "inflight", SingleFlight())
+    monkeypatch.setattr(AniListService, "rate_limiter", RateLimiter(rate_per_minute=600, burst=20, speculative_reserve=3))
+    monkeypatch.setattr(AniListService, "search_index", SearchIndex())
+    monkeypatch.setattr(AniListService, "facet_index", FacetIndex())
+    monkeypatch.setattr(AniListService, "catalog", None)
+    monkeypatch.setattr(AniListService, "_background_tasks", set())
+    monkeypatch.setattr(AniListService, "_prefetching", {})
+    monkeypatch.setattr(AniListService, "_prefetched", LRUCache(100))
+    monkeypatch.setattr(AniListService, "prefetch_counts", dict.fromkeys(AniListService.prefetch_counts, 0))
+    monkeypatch.setattr(AniListService, "_fetch", fetch)
+    return state
+
+
+async def get_page(number: int, stale_while_revalidate: bool = False):
+    return await AniListService._get_media_page(
+        {"sort": ["POPULARITY_DESC"]}, number, PER_PAGE, "popular",
+        stale_while_revalidate=stale_while_revalidate
+    )
+
+
+async def drain() -> None:
+    while AniListService._background_tasks:
+        await asyncio.gather(*AniListService._background_tasks)
+
+
+def cache_key(number: int) -> str:
+    query, variables = page_query({"sort": ["POPULARITY_DESC"]}, None, number, PER_PAGE)
+    return AniListService.cache.make_key(query.digest, variables)
+
+
+def test_full_page_prefetches_the_next_one(upstream):
+    """A full page schedules page + 1 at speculative priority, the next request is a cache hit"""
+    async def scenario():
+        await get_page(1)
+        await drain()
+        second = await get_page(2)
+        await drain()
+        return second
+
+    second = asyncio.run(scenario())
+    assert [anime.id for anime in second] == [20, 21]
+    assert upstream.calls[:2] == [(1, Priority.NORMAL), (2, Priority.SPECULATIVE)]
+    assert (2, Priority.NORMAL) not in upstream.calls
+    assert AniListService.prefetch_counts["completed"] >= 1
+    assert AniListService.prefetch_counts["hits"] == 1
+
+
+def test_prefetch_skipped_without_spare_budget(upstream):
+    """Prefetches never use the tokens reserved for user requests"""
+    AniListService.rate_limiter.tokens = 2
+
+    async def scenario():
+        await get_page(1)
+        await drain()
+
+    asyncio.run(scenario())
+    assert upstream.calls == [(1, Priority.NORMAL)]
+    assert AniListService.prefetch_counts["skipped"] == 1
+
+
+def test_request_joins_running_prefetch(upstream):
+    """A request for a page being prefetched waits for it instead of fetching twice"""
+    async def scenario():
+        await get_page(1)
+        upstream.gate = asyncio.Event()
+        assert cache_key(2) in AniListService._prefetching
+        request = asyncio.create_task(get_page(2))
+        await asyncio.sleep(0)
+        upstream.gate.set()
+        second = await request
+        upstream.gate = None
+        await drain()
+        return second
+
+    second = asyncio.run(scenario())
+    assert [anime.id for anime in second] == [20, 21]
+    assert [call for call in upstream.calls if call[0] == 2] == [(2, Priority.SPECULATIVE)]
+
+
+def test_shed_prefetch_falls_back_to_a_normal_fetch(upstream):
+    """A prefetch dropped by the rate limiter does not fail the joined request"""
+    upstream.shed = True
+
+    async def scenario():
+        await get_page(1)
+        second = await get_page(2)
+        await drain()
+        return second
+
+    second = asyncio.run(scenario())
+    assert [anime.id for anime in second] == [20, 21]
+    assert [call for call in upstream.calls if call[0] == 2] == [(2, Priority.SPECULATIVE), (2, Priority.NORMAL)]
+    assert AniListService.prefetch_counts["shed"] >= 1
+
+
+def test_stale_hit_does_not_refetch_a_page_being_prefetched(upstream):
+    """The background refresh of a stale entry joins the running prefetch"""
+    async def scenario():
+        entry = await AniListService.cache.set(cache_key(2), page(2), ttl=60)
+        entry.expires_at = entry.fetched_at - 1
+        await get_page(1)
+        upstream.gate = asyncio.Event()
+        assert cache_key(2) in AniListService._prefetching
+        stale = await get_page(2, stale_while_revalidate=True)
+        await asyncio.sleep(0)
+        upstream.gate.set()
+        await drain()
+        return stale
+
+    stale = asyncio.run(scenario())
+    assert [anime.id for anime in stale] == [20, 21]
+    assert [call for call in upstream.calls if call[0] == 2] == [(2, Priority.SPECULATIVE)]
+    assert AniListService.cache.peek(cache_key(2)).is_fresh()
+
+
+def test_refresh_after_shed_prefetch_still_fetches(upstream):
+    """When the joined prefetch was shed the refresh fetches the stale entry itself"""
+    upstream.shed = True
+
+    async def scenario():
+        entry = await AniListService.cache.set(cache_key(2), page(2), ttl=60)
+        entry.expires_at = entry.fetched_at - 1
+        await get_page(1)
+        await get_page(2, stale_while_revalidate=True)
+        await drain()
+
+    asyncio.run(scenario())
+    assert [call for call in upstream.calls if call[0] == 2] == [(2, Priority.SPECULATIVE), (2, Priority.LOW)]
+    assert AniListService.cache.peek(cache_key(2)).is_fresh()
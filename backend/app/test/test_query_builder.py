@@ -0,0 +1,80 @@
+"""Unit tests for GraphQL document compilation and field projection"""
+import hashlib
+
+import pytest
+
+from app.schemas.anime import BannerAnime
+from app.services.query_builder import (
+    FIELD_SELECTIONS, REQUIRED_FIELDS, aliased_page_query, compile_query, media_query,
+    page_query, resolve_fields
+)
+
+
+def test_compile_query_digest():
+    """Digest is the SHA-1 of the document text"""
+    query = compile_query("query{Media{id}}")
+    assert query.text == "query{Media{id}}"
+    assert query.digest == hashlib.sha1(b"query{Media{id}}").hexdigest()
+
+
+def test_page_query_is_stable_across_filter_order():
+    """Same filter names compile to the same cached document"""
+    first, first_vars = page_query({"genre": "Action", "season": "WINTER"}, page=2, per_page=10)
+    second, _ = page_query({"season": "WINTER", "genre": "Action"}, page=2, per_page=10)
+    assert first is second
+    assert first_vars == {"page": 2, "perPage": 10, "genre": "Action", "season": "WINTER"}
+    assert "$genre:String" in first.text
+    assert "genre:$genre" in first.text
+
+
+def test_page_query_drops_unset_filters():
+    """Filters with None values are neither declared nor sent"""
+    query, variables = page_query({"genre": None, "status": "RELEASING"})
+    assert "genre" not in variables
+    assert "$genre" not in query.text
+    assert variables["status"] == "RELEASING"
+
+
+def test_page_query_rejects_unknown_filters():
+    """Filters without a known GraphQL type are refused"""
+    with pytest.raises(ValueError):
+        page_query({"not_a_filter": 1})
+
+
+def test_projection_narrows_the_selection():
+    """Projected documents only select the requested fields"""
+    full = media_query()
+    projected = media_query(frozenset({"id", "title"}))
+    assert full.digest != projected.digest
+    assert "bannerImage" in full.text
+    assert "bannerImage" not in projected.text
+    assert media_query(frozenset({"id", "title"})) is projected
+
+
+def test_aliased_sections_prefix_their_variables():
+    """Each aliased Page gets its own prefixed variables"""
+    query, variables = aliased_page_query(
+        {"trending": {"sort": ["TRENDING_DESC"]}, "action": {"genre": "Action", "sort": None}},
+        per_page=5
+    )
+    assert variables == {"perPage": 5, "trending_sort": ["TRENDING_DESC"], "action_genre": "Action"}
+    assert "trending:Page(" in query.text and "action:Page(" in query.text
+    assert "$action_genre:String" in query.text
+
+
+def test_resolve_fields():
+    """Views and field lists always include the required fields"""
+    assert resolve_fields() is None
+    assert resolve_fields("full") is None
+    card = resolve_fields("card")
+    assert card >= REQUIRED_FIELDS
+    assert resolve_fields(fields="meanScore") == REQUIRED_FIELDS | {"meanScore"}
+    assert resolve_fields("card", "bannerImage") == card | {"bannerImage"}
+    assert resolve_fields(fields=",".join(FIELD_SELECTIONS)) is None
+    with pytest.raises(ValueError):
+        resolve_fields(fields="id,nope")
+
+
+def test_projections_keep_the_required_schema_fields():
+    """Projected anime stay valid against the documented BannerAnime schema"""
+    assert set(BannerAnime.model_json_schema(mode="serialization")["required"]) == REQUIRED_FIELDS
@@ -0,0 +1,134 @@
+"""Unit tests for the upstream rate limiter"""
+import asyncio
+
+import pytest
+
+from app.services.rate_limiter import Priority, RateLimiter, RequestShed
+
+
+def drained(rate_per_minute: int = 1200, **kwargs) -> RateLimiter:
+    """Limiter with an empty bucket, refilling a token every 50ms at the default rate"""
+    limiter = RateLimiter(rate_per_minute=rate_per_minute, burst=1, **kwargs)
+    limiter.tokens = 0.0
+    return limiter
+
+
+def test_acquire_uses_burst_without_waiting():
+    """Tokens in the bucket are granted right away"""
+    async def run():
+        limiter = RateLimiter(rate_per_minute=60, burst=3)
+        for _ in range(3):
+            await asyncio.wait_for(limiter.acquire(), 0.1)
+        return limiter
+
+    limiter = asyncio.run(run())
+    assert limiter.acquired == 3
+    assert limiter.budget() < 1
+
+
+def test_queued_waiters_are_served_by_priority():
+    """Higher priority waiters get tokens first regardless of arrival order"""
+    async def run():
+        limiter = drained()
+        order = []
+
+        async def wait(priority: Priority):
+            await limiter.acquire(priority)
+            order.append(priority)
+
+        tasks = [asyncio.create_task(wait(p)) for p in (Priority.LOW, Priority.NORMAL, Priority.HIGH)]
+        await asyncio.sleep(0)
+        snapshot = limiter.snapshot()
+        await asyncio.wait_for(asyncio.gather(*tasks), 2)
+        return order, snapshot
+
+    order, snapshot = asyncio.run(run())
+    assert order == [Priority.HIGH, Priority.NORMAL, Priority.LOW]
+    assert snapshot["queued"] == 3
+    assert snapshot["queued_by_priority"]["high"] == 1
+
+
+def test_timed_out_waiter_leaves_the_queue():
+    """A waiter giving up does not consume a token"""
+    async def run():
+        limiter = drained(rate_per_minute=60)
+        with pytest.raises(asyncio.TimeoutError):
+            await limiter.acquire(Priority.NORMAL, timeout=0.01)
+        return limiter
+
+    limiter = asyncio.run(run())
+    assert limiter.acquired == 0
+    assert limiter.snapshot()["queued"] == 0
+
+
+def test_speculative_request_is_shed_without_budget():
+    """Speculative requests never queue when the bucket is empty"""
+    async def run():
+        limiter = drained(rate_per_minute=60)
+        with pytest.raises(RequestShed):
+            await limiter.acquire(Priority.SPECULATIVE)
+        return limiter
+
+    limiter = asyncio.run(run())
+    assert limiter.shed == 1
+    assert limiter.snapshot()["queued"] == 0
+
+
+def test_speculative_request_keeps_the_reserve():
+    """Speculative requests only take tokens beyond the reserve"""
+    async def run():
+        limiter = RateLimiter(rate_per_minute=60, burst=3, speculative_reserve=2)
+        await limiter.acquire(Priority.SPECULATIVE)
+        with pytest.raises(RequestShed):
+            await limiter.acquire(Priority.SPECULATIVE)
+        # Regular requests may still use the reserved tokens
+        await asyncio.wait_for(limiter.acquire(Priority.NORMAL), 0.1)
+        return limiter
+
+    limiter = asyncio.run(run())
+    assert limiter.acquired == 2
+    assert limiter.shed == 1
+
+
+def test_speculative_request_yields_to_queued_waiters():
+    """Spare tokens go to queued regular requests before speculative ones"""
+    async def run():
+        limiter = drained()
+        waiter = asyncio.create_task(limiter.acquire(Priority.LOW))
+        await asyncio.sleep(0)
+        limiter.tokens = 5.0
+        with pytest.raises(RequestShed):
+            await limiter.acquire(Priority.SPECULATIVE)
+        await asyncio.wait_for(waiter, 1)
+        return limiter
+
+    limiter = asyncio.run(run())
+    assert limiter.shed == 1
+
+
+def test_rate_limit_response_pauses_and_sheds():
+    """A 429 with Retry-After empties the budget for that long"""
+    async def run():
+        limiter = RateLimiter(rate_per_minute=90, burst=10)
+        limiter.update_from_headers({"Retry-After": "30", "X-RateLimit-Remaining": "0"}, status_code=429)
+        with pytest.raises(RequestShed):
+            await limiter.acquire(Priority.SPECULATIVE)
+        with pytest.raises(asyncio.TimeoutError):
+            await limiter.acquire(Priority.HIGH, timeout=0.05)
+        return limiter
+
+    limiter = asyncio.run(run())
+    snapshot = limiter.snapshot()
+    assert snapshot["throttled"] == 1
+    assert snapshot["tokens"] == 0.0
+    assert 29 < snapshot["paused_for"] <= 30
+
+
+def test_headers_lower_the_rate():
+    """Rate follows a lower announced limit but never exceeds the configured one"""
+    limiter = RateLimiter(rate_per_minute=90, burst=10)
+    limiter.update_from_headers({"X-RateLimit-Limit": "30", "X-RateLimit-Remaining": "4"})
+    assert limiter.rate == 0.5
+    assert limiter.tokens == 4
+    limiter.update_from_headers({"X-RateLimit-Limit": "120"})
+    assert limiter.rate == 1.5
@@ -0,0 +1,111 @@
+"""Unit tests for the cache of encoded responses and its invalidation"""
+import asyncio
+import time
+from typing import List
+
+from fastapi import Request
+from pydantic import BaseModel
+
+from app.core.http_cache import RenderedCache, conditional_response, record_source, track_sources
+
+
+def make_request(query: str = "page=1", **headers) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "scheme": "http",
+        "server": ("test", 80),
+        "root_path": "",
+        "path": "/api/v1/anime/popular",
+        "query_string": query.encode("ascii"),
+        "headers": [(name.replace("_", "-").encode("ascii"), value.encode("ascii")) for name, value in headers.items()],
+    })
+
+
+class Item(BaseModel):
+    id: int
+
+
+def render(cache: RenderedCache, request: Request, *sources):
+    """Build a response from the given (tag, fetched_at, expires_at) sources through the cache"""
+    with track_sources() as tracker:
+        for source in sources:
+            record_source(*source)
+    return conditional_response(request, [Item(id=1)], List[Item], tracker, max_age=300, cache=cache)
+
+
+def upstream_source(ttl: float = 60):
+    now = time.time()
+    return ("tag", now, now + ttl)
+
+
+def test_stored_response_is_served_until_its_data_expires():
+    """The body is served from cache, an expired entry is dropped on lookup"""
+    cache = RenderedCache(max_size=10)
+    render(cache, make_request(), upstream_source())
+    hit = cache.lookup(make_request())
+    assert hit.status_code == 200 and hit.body == b'[{"id":1}]'
+
+    cache.local.peek(cache.make_key(make_request())).expires_at = time.time() - 1
+    assert cache.lookup(make_request()) is None
+    assert len(cache.local) == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lookup_answers_304():
+    """Cached validators answer conditional requests without a body"""
+    cache = RenderedCache(max_size=10)
+    etag = render(cache, make_request(), upstream_source()).headers["etag"]
+    response = cache.lookup(make_request(if_none_match=etag))
+    assert response.status_code == 304
+    assert cache.not_modified == 1
+
+
+def test_key_ignores_query_parameter_order():
+    """Reordered query parameters hit the same entry"""
+    cache = RenderedCache(max_size=10)
+    render(cache, make_request("page=1&perPage=20"), upstream_source())
+    assert cache.lookup(make_request("perPage=20&page=1")) is not None
+    assert cache.lookup(make_request("page=2&perPage=20")) is None
+
+
+def test_local_data_invalidated_by_generation():
+    """Responses built from the mirror or indexes live while the generation is unchanged"""
+    generation = [1]
+    cache = RenderedCache(max_size=10, generation=lambda: generation[0])
+    render(cache, make_request(), ("index:1", time.time(), None))
+    assert cache.lookup(make_request()) is not None
+    generation[0] = 2
+    assert cache.lookup(make_request()) is None
+
+
+def test_local_data_not_stored_without_generation():
+    """Without a generation callable local data cannot be invalidated, so it is not kept"""
+    cache = RenderedCache(max_size=10)
+    render(cache, make_request(), ("index:1", time.time(), None))
+    assert len(cache.local) == 0
+
+
+def test_untracked_and_stale_data_not_stored():
+    """Responses without sources or built from already expired data are not kept"""
+    cache = RenderedCache(max_size=10)
+    render(cache, make_request())
+    render(cache, make_request("page=2"), upstream_source(ttl=-1))
+    assert len(cache.local) == 0
+
+
+def test_cached_decorator_skips_the_endpoint():
+    """A hit is answered by the wrapper, the endpoint only runs on a miss"""
+    cache = RenderedCache(max_size=10)
+    calls = []
+
+    @cache.cached
+    async def endpoint(request: Request):
+        calls.append(request)
+        return render(cache, request, upstream_source())
+
+    first = asyncio.run(endpoint(request=make_request()))
+    second = asyncio.run(endpoint(request=make_request()))
+    assert len(calls) == 1
+    assert first.body == second.body
+    assert cache.stats()["hit_rate"] == 0.5
@@ -0,0 +1,104 @@
+"""Unit tests for the two-tier response cache"""
+import asyncio
+import time
+
+from app.services.cache import CacheEntry, InMemoryBackend, LRUCache, ResponseCache, SharedCacheBackend
+
+
+def test_lru_evicts_least_recently_used():
+    """Reading an entry keeps it, the oldest untouched one goes"""
+    lru = LRUCache(max_size=2)
+    entry = CacheEntry(value=1, fetched_at=0, expires_at=0)
+    lru.set("a", entry)
+    lru.set("b", entry)
+    lru.get("a")
+    lru.set("c", entry)
+    assert [key for key, _ in lru.items()] == ["a", "c"]
+    assert lru.evictions == 1
+
+
+def test_make_key_ignores_variable_order():
+    """Equal variables give the same key whatever their order"""
+    assert ResponseCache.make_key("q", {"a": 1, "b": 2}) == ResponseCache.make_key("q", {"b": 2, "a": 1})
+    assert ResponseCache.make_key("q", {"a": 1}) != ResponseCache.make_key("q", {"a": 2})
+    assert ResponseCache.make_key("q") == ResponseCache.make_key("q", {})
+
+
+def test_entry_bytes_round_trip():
+    """Entries stored in the shared tier come back with value, times and etag"""
+    entry = CacheEntry(value={"Page": {"media": [{"id": 1}]}}, fetched_at=1.5, expires_at=61.5, etag="abc")
+    assert CacheEntry.from_bytes(entry.to_bytes()) == entry
+
+
+def test_local_hit():
+    """A fresh local entry is served without the shared tier"""
+    async def run():
+        cache = ResponseCache(max_size=10)
+        stored = await cache.set("k", {"id": 1}, ttl=60)
+        return cache, stored, await cache.get("k")
+
+    cache, stored, entry = asyncio.run(run())
+    assert entry is stored
+    assert entry.etag
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_shared_hit_fills_local_tier():
+    """Another instance's entry is read from the shared tier and kept locally"""
+    async def run():
+        shared = InMemoryBackend()
+        writer = ResponseCache(max_size=10, shared=shared)
+        reader = ResponseCache(max_size=10, shared=shared)
+        await writer.set("k", {"id": 1}, ttl=60)
+        first = await reader.get("k")
+        second = await reader.get("k")
+        return reader, first, second
+
+    reader, first, second = asyncio.run(run())
+    assert first.value == second.value == {"id": 1}
+    assert (reader.shared_hits, reader.hits) == (1, 1)
+    assert reader.peek("k") is not None
+
+
+def test_expired_entry_only_within_stale_window():
+    """Expired entries are handed out with allow_stale until the stale window ends"""
+    async def run():
+        cache = ResponseCache(max_size=10, stale_ttl=60)
+        now = time.time()
+        cache.local.set("recent", CacheEntry(value=1, fetched_at=now - 90, expires_at=now - 30))
+        cache.local.set("old", CacheEntry(value=2, fetched_at=now - 200, expires_at=now - 120))
+        return (
+            await cache.get("recent"),
+            await cache.get("recent", allow_stale=True),
+            await cache.get("old", allow_stale=True),
+        )
+
+    missing, stale, too_old = asyncio.run(run())
+    assert missing is None
+    assert stale.value == 1 and not stale.is_fresh()
+    assert too_old is None
+
+
+class BrokenBackend(SharedCacheBackend):
+    async def get(self, key):
+        raise ConnectionError("down")
+
+    async def set(self, key, value, ttl):
+        raise ConnectionError("down")
+
+    async def delete(self, key):
+        raise ConnectionError("down")
+
+
+def test_shared_tier_errors_degrade_to_local():
+    """A failing shared backend is counted and the local tier keeps working"""
+    async def run():
+        cache = ResponseCache(max_size=10, shared=BrokenBackend())
+        await cache.set("k", {"id": 1}, ttl=60)
+        return cache, await cache.get("k"), await cache.get("missing")
+
+    cache, entry, missing = asyncio.run(run())
+    assert entry.value == {"id": 1}
+    assert missing is None
+    assert cache.shared_errors == 2
+    assert cache.stats()["hit_rate"] == 0.5
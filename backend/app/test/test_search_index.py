@@ -0,0 +1,106 @@
+"""Unit tests for the local title search index and its use by the service"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.schemas.anime import BannerAnime, CoverImage
+from app.services.anilist_service import AniListService
+from app.services.search_index import SearchIndex, normalize
+
+
+def anime(anime_id: int, title: str, popularity: int = 0) -> BannerAnime:
+    return BannerAnime(id=anime_id, title=title, coverImage=CoverImage(), popularity=popularity)
+
+
+def build_index(*items) -> SearchIndex:
+    index = SearchIndex()
+    for item in items:
+        index.add(item, [item.title])
+    return index
+
+
+def test_normalize():
+    """Case, accents and punctuation do not matter"""
+    assert normalize("  Shingeki no Kyojin: The Final Season! ") == "shingeki no kyojin the final season"
+    assert normalize("Pokémon") == "pokemon"
+
+
+def test_prefix_matches_rank_before_fuzzy_ones():
+    """Exact and prefix titles come first and are flagged, typo matches follow"""
+    index = build_index(
+        anime(1, "Naruto", popularity=100),
+        anime(2, "Naruto Shippuden", popularity=500),
+        anime(3, "Boruto: Naruto Next Generations", popularity=50),
+        anime(4, "Nagato Yuki", popularity=10),
+    )
+    matches = [(item.id, prefixed) for item, prefixed in index.search_matches("naruto")]
+    assert matches[0] == (1, True)
+    assert set(matches[:3]) == {(1, True), (2, True), (3, True)}
+    assert index.search("naruto") == [item for item, _ in index.search_matches("naruto")]
+
+
+def test_typo_tolerant_match():
+    """A misspelled title is found by trigram similarity, flagged as fuzzy"""
+    index = build_index(anime(1, "Fullmetal Alchemist"), anime(2, "Cowboy Bebop"))
+    assert [(item.id, prefixed) for item, prefixed in index.search_matches("fulmetal alchemist")] == [(1, False)]
+
+
+def test_fuzzy_pass_skipped_when_typeahead_page_is_full():
+    """Typeahead stops at prefix matches when they fill the page"""
+    index = build_index(anime(1, "Naruto"), anime(2, "Naruto Shippuden"), anime(3, "Nagato Yuki"))
+    assert all(prefixed for _, prefixed in index.search_matches("naru", limit=2, typeahead=True))
+
+
+def test_readding_replaces_titles():
+    """Re-indexed anime are found by their new titles only"""
+    index = build_index(anime(1, "Old Title"))
+    index.add(anime(1, "New Title"), ["New Title"])
+    assert index.search("old") == []
+    assert [item.id for item in index.search("new")] == [1]
+    assert len(index) == 1
+
+
+@pytest.fixture
+def service(monkeypatch):
+    """Service with a partial index of two unrelated titles and a stubbed AniList search"""
+    upstream = [anime(10, "Naruto"), anime(11, "Naruto Shippuden")]
+    calls = []
+
+    async def get_media_page(filters, page, per_page, query_type, fields):
+        calls.append((filters, page, per_page))
+        return upstream[:per_page]
+
+    monkeypatch.setattr(AniListService, "search_index", build_index(anime(1, "Nagato Yuki"), anime(2, "Nana Koto")))
+    monkeypatch.setattr(AniListService, "catalog", None)
+    monkeypatch.setattr(AniListService, "_get_media_page", get_media_page)
+    return SimpleNamespace(calls=calls)
+
+
+def test_partial_index_fuzzy_hits_do_not_replace_upstream_suggestions(service):
+    """Fuzzy-only local hits rank below AniList results"""
+    suggestions = asyncio.run(AniListService.suggest_anime("naruto", limit=3))
+    assert [item.id for item in suggestions] == [10, 11, 1]
+    assert service.calls == [({"search": "naruto"}, 1, 3)]
+
+
+def test_partial_index_fuzzy_hits_do_not_replace_upstream_search(service):
+    """A page of fuzzy-only local hits is not trusted"""
+    results = asyncio.run(AniListService.search_anime("naruto", per_page=2))
+    assert [item.id for item in results] == [10, 11]
+    assert len(service.calls) == 1
+
+
+def test_partial_index_serves_a_full_page_of_prefix_matches(service, monkeypatch):
+    """Prefix matches filling the page are served without asking AniList"""
+    monkeypatch.setattr(AniListService, "search_index", build_index(anime(1, "Naruto"), anime(2, "Naruto Shippuden")))
+    assert [item.id for item in asyncio.run(AniListService.suggest_anime("naruto", limit=2))] == [1, 2]
+    assert [item.id for item in asyncio.run(AniListService.search_anime("naruto", per_page=2))] == [1, 2]
+    assert service.calls == []
+
+
+def test_complete_index_is_trusted(service, monkeypatch):
+    """Once the mirror holds the whole catalog, local results are final"""
+    monkeypatch.setattr(AniListService, "catalog", SimpleNamespace(ready=True))
+    assert [item.id for item in asyncio.run(AniListService.suggest_anime("nagato yuky", limit=3))] == [1]
+    assert service.calls == []
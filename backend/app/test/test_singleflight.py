@@ -0,0 +1,98 @@
+"""Unit tests for single-flight coalescing"""
+import asyncio
+
+import pytest
+
+from app.services.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    """Identical concurrent calls run once and all get its result"""
+    async def run():
+        flight = SingleFlight()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return {"calls": calls}
+
+        results = await asyncio.gather(*[flight.do("key", fetch) for _ in range(10)])
+        return flight, calls, results
+
+    flight, calls, results = asyncio.run(run())
+    assert calls == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats()["upstream_calls"] == 1
+    assert flight.stats()["coalesced"] == 9
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_different_keys_run_separately():
+    """Only callers with the same key are coalesced"""
+    async def run():
+        flight = SingleFlight()
+
+        async def fetch(value):
+            await asyncio.sleep(0.01)
+            return value
+
+        return await asyncio.gather(flight.do("a", lambda: fetch(1)), flight.do("b", lambda: fetch(2)))
+
+    assert asyncio.run(run()) == [1, 2]
+
+
+def test_sequential_calls_are_not_coalesced():
+    """A finished call is forgotten, the next caller runs fn again"""
+    async def run():
+        flight = SingleFlight()
+
+        async def fetch():
+            return "value"
+
+        await flight.do("key", fetch)
+        await flight.do("key", fetch)
+        return flight
+
+    flight = asyncio.run(run())
+    assert flight.calls == 2
+    assert not flight.is_running("key")
+
+
+def test_error_reaches_every_caller():
+    """An exception is raised to each waiting caller and the key is released"""
+    async def run():
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream failed")
+
+        results = await asyncio.gather(*[flight.do("key", fail) for _ in range(3)], return_exceptions=True)
+        return flight, results
+
+    flight, results = asyncio.run(run())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert not flight.is_running("key")
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    """The shared call keeps running for the callers that stay"""
+    async def run():
+        flight = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            return "value"
+
+        first = asyncio.create_task(flight.do("key", fetch))
+        second = asyncio.create_task(flight.do("key", fetch))
+        await asyncio.sleep(0.01)
+        assert flight.is_running("key")
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == "value"
@@ -0,0 +1,113 @@
+"""Unit tests for serving stale hot lists while they are refreshed in the background"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.errors import AniListException
+from app.services.anilist_service import AniListService
+from app.services.cache import LRUCache, ResponseCache
+from app.services.query_builder import page_query
+from app.services.rate_limiter import Priority
+from app.services.singleflight import SingleFlight
+
+QUERY, VARIABLES = page_query({"sort": ["TRENDING_DESC"]}, None, 1, 10)
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Service with an empty cache and AniList replaced by a counting fake"""
+    state = SimpleNamespace(calls=[], version=0, gate=None, error=False)
+
+    async def fetch(query, variables, priority=Priority.NORMAL, query_type=None):
+        state.calls.append(priority)
+        if state.gate is not None:
+            await state.gate.wait()
+        if state.error:
+            raise AniListException("AniList is down")
+        state.version += 1
+        return {"version": state.version}
+
+    monkeypatch.setattr(AniListService, "cache", ResponseCache(max_size=10, stale_ttl=600))
+    monkeypatch.setattr(AniListService, "inflight", SingleFlight())
+    monkeypatch.setattr(AniListService, "_background_tasks", set())
+    monkeypatch.setattr(AniListService, "_prefetching", {})
+    monkeypatch.setattr(AniListService, "_prefetched", LRUCache(10))
+    monkeypatch.setattr(AniListService, "_fetch", fetch)
+    return state
+
+
+async def request(stale_while_revalidate: bool = True):
+    return await AniListService._make_request(
+        QUERY, VARIABLES, query_type="trending", stale_while_revalidate=stale_while_revalidate
+    )
+
+
+def expire() -> None:
+    entry = AniListService.cache.peek(AniListService.cache.make_key(QUERY.digest, VARIABLES))
+    entry.expires_at = entry.fetched_at - 1
+
+
+async def drain() -> None:
+    while AniListService._background_tasks:
+        await asyncio.gather(*AniListService._background_tasks)
+
+
+def test_stale_entry_served_while_refreshing(upstream):
+    """The expired copy is returned at once and replaced in the background"""
+    async def run():
+        await request()
+        expire()
+        stale = await request()
+        await drain()
+        return stale, await request()
+
+    stale, refreshed = asyncio.run(run())
+    assert stale == {"version": 1}
+    assert refreshed == {"version": 2}
+    assert upstream.calls == [Priority.NORMAL, Priority.LOW]
+    assert AniListService.cache.stale_served == 1
+
+
+def test_concurrent_stale_hits_refresh_once(upstream):
+    """Stale hits during a running refresh do not start another one"""
+    async def run():
+        await request()
+        expire()
+        upstream.gate = asyncio.Event()
+        results = [await request()]
+        await asyncio.sleep(0)
+        results += await asyncio.gather(request(), request())
+        upstream.gate.set()
+        await drain()
+        return results
+
+    results = asyncio.run(run())
+    assert results == [{"version": 1}] * 3
+    assert upstream.calls == [Priority.NORMAL, Priority.LOW]
+
+
+def test_without_swr_stale_entry_is_refetched(upstream):
+    """Endpoints not opted in wait for fresh data"""
+    async def run():
+        await request(stale_while_revalidate=False)
+        expire()
+        return await request(stale_while_revalidate=False)
+
+    assert asyncio.run(run()) == {"version": 2}
+    assert upstream.calls == [Priority.NORMAL, Priority.NORMAL]
+
+
+def test_failed_refresh_keeps_stale_entry(upstream):
+    """A refresh error is logged and the old copy keeps being served"""
+    async def run():
+        await request()
+        expire()
+        upstream.error = True
+        first = await request()
+        await drain()
+        return first, await request(stale_while_revalidate=False)
+
+    first, fallback = asyncio.run(run())
+    assert first == fallback == {"version": 1}
+    assert AniListService.cache.stale_served == 2
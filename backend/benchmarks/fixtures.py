@@ -0,0 +1,107 @@
+"""AniList media fixtures for the mock server and the load driver
+
+Fixtures are a JSON list of raw AniList media objects. Without a fixture file a
+deterministic synthetic catalog is generated; `record` stores real pages.
+
+Run from backend/: python -m benchmarks.fixtures record --pages 20 --output benchmarks/fixtures/media.json
+"""
+import argparse
+import json
+import random
+from pathlib import Path
+from typing import Dict, List, Optional
+
+GENRES = [
+    "Action", "Adventure", "Comedy", "Drama", "Ecchi", "Fantasy", "Horror", "Mahou Shoujo", "Mecha",
+    "Music", "Mystery", "Psychological", "Romance", "Sci-Fi", "Slice of Life", "Sports", "Supernatural", "Thriller"
+]
+SEASONS = ["WINTER", "SPRING", "SUMMER", "FALL"]
+FORMATS = ["TV", "TV", "TV", "MOVIE", "OVA", "ONA", "SPECIAL", "TV_SHORT"]
+STATUSES = ["FINISHED", "FINISHED", "FINISHED", "RELEASING", "NOT_YET_RELEASED"]
+WORDS = [
+    "sword", "sky", "academy", "dragon", "summer", "ghost", "city", "star", "heart", "shadow",
+    "legend", "garden", "spirit", "iron", "moon", "world", "blade", "school", "ocean", "dream"
+]
+
+
+def synthetic_media(count: int = 2000, seed: int = 42) -> List[Dict]:
+    """Deterministic AniList-shaped media with realistic field sizes"""
+    rng = random.Random(seed)
+    media = []
+    for anime_id in range(1, count + 1):
+        words = " ".join(rng.choice(WORDS).capitalize() for _ in range(rng.randint(1, 4)))
+        year = rng.randint(2000, 2025)
+        paragraphs = [
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 60)))
+            for _ in range(rng.randint(1, 4))
+        ]
+        media.append({
+            "id": anime_id,
+            "title": {"romaji": f"{words} {anime_id}", "english": f"{words} {anime_id}" if anime_id % 3 else None,
+                      "native": f"作品{anime_id}"},
+            "description": "<br><br>\n".join(paragraphs) + "<br><br>\n<i>(Source: Fixture)</i>",
+            "coverImage": {
+                "large": f"https://s4.anilist.co/file/anilistcdn/media/anime/cover/large/bx{anime_id}.jpg",
+                "medium": f"https://s4.anilist.co/file/anilistcdn/media/anime/cover/medium/bx{anime_id}.jpg",
+                "color": f"#{rng.randrange(0x1000000):06x}"
+            },
+            "bannerImage": f"https://s4.anilist.co/file/anilistcdn/media/anime/banner/{anime_id}.jpg",
+            "meanScore": rng.randint(40, 92),
+            "popularity": int(500000 / (1 + rng.paretovariate(1.2))),
+            "status": rng.choice(STATUSES),
+            "episodes": rng.choice([1, 12, 13, 24, 25, 26, 52, None]),
+            "genres": sorted(rng.sample(GENRES, rng.randint(1, 4))),
+            "startDate": {"year": year, "month": rng.randint(1, 12), "day": rng.choice([None, rng.randint(1, 28)])},
+            "season": rng.choice(SEASONS),
+            "seasonYear": year,
+            "format": rng.choice(FORMATS),
+            "studios": {"nodes": [{"name": f"Studio {rng.randint(1, 60)}"}]},
+            "synonyms": [f"{rng.choice(WORDS).capitalize()} {anime_id}"],
+            "trending": rng.randint(0, 500),
+            "updatedAt": 1700000000 + rng.randint(0, 20000000),
+        })
+    return media
+
+
+def load_media(path: Optional[str] = None, count: int = 2000, seed: int = 42) -> List[Dict]:
+    """Recorded fixtures from path, synthetic ones without it"""
+    if path:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    return synthetic_media(count, seed)
+
+
+def record(pages: int, output: str, per_page: int = 50) -> int:
+    """Store the most popular AniList media pages as a fixture file"""
+    import httpx
+
+    from app.core.config import settings
+    from app.services.query_builder import page_query
+
+    media: List[Dict] = []
+    with httpx.Client(timeout=30) as client:
+        for page in range(1, pages + 1):
+            query, variables = page_query(
+                {"sort": ["POPULARITY_DESC"]}, page=page, per_page=per_page,
+                extra=("synonyms", "trending", "updatedAt")
+            )
+            response = client.post(settings.ANILIST_API_URL, json={"query": query.text, "variables": variables})
+            response.raise_for_status()
+            media.extend(response.json()["data"]["Page"]["media"])
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    Path(output).write_text(json.dumps(media, ensure_ascii=False), encoding="utf-8")
+    return len(media)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="AniList media fixtures")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record", help="record popular media pages from AniList")
+    rec.add_argument("--pages", type=int, default=20)
+    rec.add_argument("--output", default="benchmarks/fixtures/media.json")
+    args = parser.parse_args()
+    if args.command == "record":
+        print(f"recorded {record(args.pages, args.output)} media to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""Load driver for the /api/v1/anime routes against the mock AniList server
+
+Starts the mock and the API as subprocesses (or targets --api-url), then
+requests every route with distinct URLs built from the fixtures: the first
+pass runs on empty caches (cold), the following passes repeat the same URLs
+(warm). Throughput, p50/p95/p99 and upstream calls per route and scenario
+are written as JSON; with --baseline the run fails when a p95 regressed.
+
+Run from backend/: python -m benchmarks.load --requests 100 --concurrency 20 --output bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.fixtures import SEASONS, load_media
+from benchmarks.mock_anilist import add_arguments
+
+# Route name -> builder of the i-th distinct URL from the fixture media
+UrlBuilder = Callable[[int, List[Dict]], str]
+
+ROUTES: Dict[str, UrlBuilder] = {
+    "trending": lambda i, media: f"/api/v1/anime/trending?page={i % 10 + 1}&limit={10 + i // 10 % 4 * 10}",
+    "home": lambda i, media: f"/api/v1/anime/home?limit={10 + i % 41}",
+    "popular": lambda i, media: f"/api/v1/anime/popular?page={i % 10 + 1}&limit={10 + i // 10 % 4 * 10}",
+    "seasonal": lambda i, media: (
+        f"/api/v1/anime/seasonal?season={SEASONS[i % 4]}&year={2025 - i // 4 % 26}&limit=30"
+    ),
+    "genre": lambda i, media: (
+        f"/api/v1/anime/genre/{media[i % len(media)]['genres'][0]}?page={i // 18 % 5 + 1}&limit=30"
+    ),
+    "search": lambda i, media: f"/api/v1/anime/search?query={media[i * 7 % len(media)]['title']['romaji']}",
+    "batch": lambda i, media: (
+        "/api/v1/anime/batch?ids=" + ",".join(str(media[(i * 10 + k) % len(media)]["id"]) for k in range(10))
+    ),
+    "catalog": lambda i, media: (
+        f"/api/v1/anime/catalog?genre={media[i % len(media)]['genres'][0]}"
+        f"&sort={'score' if i % 2 else 'popularity'}&offset={i // 36 * 20}"
+    ),
+    "suggest": lambda i, media: f"/api/v1/anime/suggest?query={media[i * 3 % len(media)]['title']['romaji'][:3 + i % 5]}",
+    "genres_popular": lambda i, media: f"/api/v1/anime/genres/popular?limit={1 + i % 20}",
+    # Detail ids start past the batch ids so they miss the media cache on the cold pass
+    "detail": lambda i, media: f"/api/v1/anime/{media[(len(media) // 2 + i) % len(media)]['id']}",
+    "crawl": lambda i, media: (
+        f"/api/v1/anime/crawl?season={SEASONS[i % 4]}&year={2025 - i // 4 % 26}&per_page=50&max_pages=2"
+    ),
+}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def summarize(latencies: List[float], statuses: Counter, elapsed: float, upstream: Optional[int]) -> Dict:
+    """Report of one route and scenario, latencies in ms"""
+    errors = sum(count for status, count in statuses.items() if status == "error" or int(status) >= 500)
+    return {
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies, default=0.0) * 1000, 2),
+        "errors": errors,
+        "statuses": dict(sorted(statuses.items())),
+        "upstream_requests": upstream,
+    }
+
+
+async def run_pass(client: httpx.AsyncClient, urls: List[str], concurrency: int) -> Tuple[List[float], Counter, float]:
+    """Request every URL once with bounded concurrency"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+
+    async def one(url: str) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                # Stream so NDJSON crawls are timed until their last line
+                async with client.stream("GET", url) as response:
+                    async for _ in response.aiter_raw():
+                        pass
+                statuses[str(response.status_code)] += 1
+            except httpx.HTTPError:
+                statuses["error"] += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(url) for url in urls))
+    return latencies, statuses, time.perf_counter() - started
+
+
+async def upstream_count(client: httpx.AsyncClient, mock_url: Optional[str]) -> Optional[int]:
+    """Requests the mock has served so far"""
+    if not mock_url:
+        return None
+    try:
+        response = await client.get(f"{mock_url}/__stats")
+        return response.json()["requests"]
+    except (httpx.HTTPError, ValueError, KeyError):
+        return None
+
+
+async def benchmark(
+    api_url: str,
+    mock_url: Optional[str],
+    media: List[Dict],
+    routes: List[str],
+    requests: int,
+    concurrency: int,
+    warm_passes: int
+) -> Dict[str, Dict]:
+    """Cold and warm reports per route, routes run one after another"""
+    results: Dict[str, Dict] = {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=api_url, timeout=60, limits=limits) as client:
+        for route in routes:
+            urls = [ROUTES[route](i, media) for i in range(requests)]
+            report = {}
+            for scenario, passes in (("cold", 1), ("warm", warm_passes)):
+                if passes < 1:
+                    continue
+                before = await upstream_count(client, mock_url)
+                latencies: List[float] = []
+                statuses: Counter = Counter()
+                elapsed = 0.0
+                for _ in range(passes):
+                    pass_latencies, pass_statuses, pass_elapsed = await run_pass(client, urls, concurrency)
+                    latencies.extend(pass_latencies)
+                    statuses.update(pass_statuses)
+                    elapsed += pass_elapsed
+                after = await upstream_count(client, mock_url)
+                upstream = after - before if before is not None and after is not None else None
+                report[scenario] = summarize(latencies, statuses, elapsed, upstream)
+            results[route] = report
+            cold, warm = report.get("cold", {}), report.get("warm", {})
+            print(
+                f"{route:15} cold p95 {cold.get('p95_ms', 0):>9.2f} ms  "
+                f"warm p95 {warm.get('p95_ms', 0):>9.2f} ms  {warm.get('throughput_rps', 0):>8.1f} req/s",
+                file=sys.stderr
+            )
+    return results
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], max_regression: float) -> List[str]:
+    """Routes and scenarios whose p95 grew more than max_regression over the baseline"""
+    regressions = []
+    for route, report in results.items():
+        for scenario, current in report.items():
+            previous = baseline.get(route, {}).get(scenario)
+            if not previous or not previous.get("p95_ms"):
+                continue
+            ratio = current["p95_ms"] / previous["p95_ms"] - 1
+            if ratio > max_regression:
+                regressions.append(
+                    f"{route} {scenario}: p95 {previous['p95_ms']} -> {current['p95_ms']} ms (+{ratio:.0%})"
+                )
+    return regressions
+
+
+def wait_ready(url: str, process: Optional[subprocess.Popen] = None, timeout: float = 30.0) -> None:
+    """Poll url until it answers"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"{' '.join(process.args)} exited with {process.returncode}")
+        try:
+            if httpx.get(url, timeout=1).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} not ready after {timeout}s")
+
+
+def mock_command(args: argparse.Namespace) -> List[str]:
+    """Mock server command line forwarding the fault injection options"""
+    command = [
+        sys.executable, "-m", "benchmarks.mock_anilist", "--port", str(args.mock_port),
+        "--media", str(args.media), "--latency", str(args.latency), "--jitter", str(args.jitter),
+        "--error-rate", str(args.error_rate), "--rate-limit-rate", str(args.rate_limit_rate),
+        "--retry-after", str(args.retry_after), "--seed", str(args.seed),
+        "--rate-limit", str(args.upstream_rate_limit),
+    ]
+    if args.fixtures:
+        command += ["--fixtures", args.fixtures]
+    return command
+
+
+def api_environment(args: argparse.Namespace) -> Dict[str, str]:
+    """API settings pointing at the mock, background traffic off so upstream counts stay comparable"""
+    env = dict(os.environ)
+    env.update({
+        "ANILIST_API_URL": f"http://127.0.0.1:{args.mock_port}",
+        "ANILIST_RATE_LIMIT_PER_MINUTE": str(args.upstream_rate_limit),
+        "ANILIST_RATE_LIMIT_BURST": str(max(10, args.upstream_rate_limit // 60)),
+        "CACHE_WARM_ENABLED": "false",
+        "CATALOG_MIRROR_ENABLED": "false",
+        "PREFETCH_ENABLED": "false",
+        "CACHE_PREWARM_ENABLED": "false",
+        "CACHE_SNAPSHOT_ENABLED": "false",
+        "DEBUG": "false",
+    })
+    for item in args.env:
+        name, _, value = item.partition("=")
+        env[name] = value
+    return env
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the anime API against a mock AniList")
+    parser.add_argument("--routes", default=",".join(ROUTES), help="comma-separated routes to run")
+    parser.add_argument("--requests", type=int, default=100, help="distinct URLs per route")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--warm-passes", type=int, default=2, help="repeats of the URL set on warm caches")
+    parser.add_argument("--api-url", default=None, help="benchmark a running API instead of starting one")
+    parser.add_argument("--mock-url", default=None, help="mock to read upstream counts from with --api-url")
+    parser.add_argument("--api-port", type=int, default=8101)
+    parser.add_argument("--mock-port", type=int, default=8100)
+    parser.add_argument("--upstream-rate-limit", type=int, default=100000, help="requests per minute allowed")
+    parser.add_argument("--env", action="append", default=[], help="API setting override, KEY=VALUE")
+    parser.add_argument("--api-log", default=os.devnull, help="file receiving the API server log")
+    parser.add_argument("--output", default=None, help="JSON report path (stdout without it)")
+    parser.add_argument("--baseline", default=None, help="earlier JSON report to compare p95 against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="allowed p95 growth, 0.2 = 20%%")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    routes = [route.strip() for route in args.routes.split(",") if route.strip()]
+    unknown = [route for route in routes if route not in ROUTES]
+    if unknown:
+        parser.error(f"unknown routes: {', '.join(unknown)}")
+    media = load_media(args.fixtures, args.media, args.seed)
+
+    processes: List[subprocess.Popen] = []
+    api_log = open(args.api_log, "ab")
+    try:
+        if args.api_url:
+            api_url, mock_url = args.api_url.rstrip("/"), args.mock_url
+        else:
+            mock_url = f"http://127.0.0.1:{args.mock_port}"
+            api_url = f"http://127.0.0.1:{args.api_port}"
+            mock = subprocess.Popen(mock_command(args))
+            processes.append(mock)
+            wait_ready(f"{mock_url}/__stats", mock)
+            api = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.api_port),
+                 "--log-level", "warning", "--no-access-log"],
+                env=api_environment(args),
+                stdout=api_log,
+                stderr=subprocess.STDOUT
+            )
+            processes.append(api)
+            wait_ready(f"{api_url}/api/v1/health", api)
+
+        results = asyncio.run(benchmark(
+            api_url, mock_url, media, routes, args.requests, args.concurrency, args.warm_passes
+        ))
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        api_log.close()
+
+    report = {
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warm_passes": args.warm_passes,
+            "fixtures": args.fixtures or f"synthetic:{args.media}:{args.seed}",
+            "latency_ms": args.latency,
+            "jitter_ms": args.jitter,
+            "error_rate": args.error_rate,
+            "rate_limit_rate": args.rate_limit_rate,
+            "env": args.env,
+        },
+        "routes": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f)["routes"], args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
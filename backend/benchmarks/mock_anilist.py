@@ -0,0 +1,190 @@
+"""Local stand-in for the AniList GraphQL API
+
+Answers the Page, aliased Page and Media documents built by
+app.services.query_builder from fixture media, with configurable latency,
+server errors and 429 responses. Filters are read from the query variables.
+
+Run from backend/: python -m benchmarks.mock_anilist --port 8100 --latency 80 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from benchmarks.fixtures import load_media
+
+ALIASED_PAGE = re.compile(r"(\w+):Page\(")
+
+SORT_KEYS: Dict[str, Tuple[Callable[[Dict], Any], bool]] = {
+    "POPULARITY_DESC": (lambda media: media.get("popularity") or 0, True),
+    "TRENDING_DESC": (lambda media: media.get("trending") or 0, True),
+    "SCORE_DESC": (lambda media: media.get("meanScore") or 0, True),
+    "UPDATED_AT_DESC": (lambda media: media.get("updatedAt") or 0, True),
+    "ID": (lambda media: media["id"], False),
+}
+
+
+class MockAniList:
+    """Fixture catalog with fault injection"""
+
+    def __init__(
+        self,
+        media: List[Dict],
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: int = 1,
+        rate_limit: int = 90,
+        seed: int = 42
+    ):
+        self.media = media
+        self.by_id = {item["id"]: item for item in media}
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.rate_limit = rate_limit
+        self.random = random.Random(seed)
+        self.stats = {"requests": 0, "errors": 0, "rate_limited": 0}
+        self._filtered = lru_cache(maxsize=1024)(self._filter)
+
+    def _filter(self, filters_json: str) -> List[Dict]:
+        """Media matching AniList filters, in the requested order"""
+        filters = json.loads(filters_json)
+        items = self.media
+        if "id_in" in filters:
+            items = [self.by_id[anime_id] for anime_id in filters["id_in"] if anime_id in self.by_id]
+        if "search" in filters:
+            needle = filters["search"].lower()
+            items = [
+                item for item in items
+                if any(needle in (title or "").lower() for title in item["title"].values())
+                or any(needle in synonym.lower() for synonym in item.get("synonyms") or [])
+            ]
+        for name, field in (("season", "season"), ("seasonYear", "seasonYear"), ("status", "status")):
+            if name in filters:
+                items = [item for item in items if item.get(field) == filters[name]]
+        if "genre" in filters:
+            items = [item for item in items if filters["genre"] in item.get("genres", [])]
+        if "genre_in" in filters:
+            items = [item for item in items if set(filters["genre_in"]) & set(item.get("genres", []))]
+        if "format_in" in filters:
+            items = [item for item in items if item.get("format") in filters["format_in"]]
+        sort = (filters.get("sort") or [None])[0]
+        if sort in SORT_KEYS:
+            key, reverse = SORT_KEYS[sort]
+            items = sorted(items, key=key, reverse=reverse)
+        return items
+
+    def page(self, filters: Dict[str, Any], page: int, per_page: int) -> Dict[str, Any]:
+        """Page object for filters"""
+        items = self._filtered(json.dumps(filters, sort_keys=True))
+        start = (page - 1) * per_page
+        return {
+            "pageInfo": {"hasNextPage": start + per_page < len(items)},
+            "media": items[start:start + per_page],
+        }
+
+    def resolve(self, query: str, variables: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """Status code and GraphQL body for a document"""
+        if "Page(" not in query:
+            media = self.by_id.get(variables.get("id"))
+            if media is None:
+                return 404, {"data": {"Media": None}, "errors": [{"message": "Not Found.", "status": 404}]}
+            return 200, {"data": {"Media": media}}
+
+        aliases = ALIASED_PAGE.findall(query)
+        if aliases:
+            data = {}
+            for alias in aliases:
+                prefix = f"{alias}_"
+                filters = {name[len(prefix):]: value for name, value in variables.items() if name.startswith(prefix)}
+                data[alias] = self.page(filters, 1, variables.get("perPage", 20))
+            return 200, {"data": data}
+
+        filters = {name: value for name, value in variables.items() if name not in ("page", "perPage")}
+        return 200, {"data": {"Page": self.page(filters, variables.get("page", 1), variables.get("perPage", 30))}}
+
+    async def graphql(self, request: Request) -> JSONResponse:
+        """POST / endpoint"""
+        self.stats["requests"] += 1
+        if self.latency or self.jitter:
+            await asyncio.sleep((self.latency + self.random.uniform(0, self.jitter)) / 1000)
+        headers = {"X-RateLimit-Limit": str(self.rate_limit), "X-RateLimit-Remaining": str(self.rate_limit)}
+
+        roll = self.random.random()
+        if roll < self.rate_limit_rate:
+            self.stats["rate_limited"] += 1
+            headers.update({"Retry-After": str(self.retry_after), "X-RateLimit-Remaining": "0"})
+            return JSONResponse({"errors": [{"message": "Too Many Requests.", "status": 429}]}, 429, headers)
+        if roll < self.rate_limit_rate + self.error_rate:
+            self.stats["errors"] += 1
+            return JSONResponse({"errors": [{"message": "Internal Server Error", "status": 500}]}, 500, headers)
+
+        body = await request.json()
+        status, payload = self.resolve(body.get("query", ""), body.get("variables") or {})
+        return JSONResponse(payload, status, headers)
+
+    async def health(self, request: Request) -> JSONResponse:
+        """Readiness probe and request counters"""
+        return JSONResponse({"media": len(self.media), **self.stats})
+
+
+def create_app(mock: MockAniList) -> Starlette:
+    """ASGI app serving a mock"""
+    return Starlette(routes=[
+        Route("/", mock.graphql, methods=["POST"]),
+        Route("/__stats", mock.health, methods=["GET"]),
+    ])
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Mock options, shared with the load driver"""
+    parser.add_argument("--fixtures", default=None, help="recorded media JSON (synthetic catalog without it)")
+    parser.add_argument("--media", type=int, default=2000, help="synthetic catalog size")
+    parser.add_argument("--latency", type=float, default=80.0, help="base upstream latency in ms")
+    parser.add_argument("--jitter", type=float, default=40.0, help="random extra latency in ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of 500 responses")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of 429 responses")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After of 429 responses")
+    parser.add_argument("--seed", type=int, default=42)
+
+
+def mock_from_args(args: argparse.Namespace, rate_limit: int = 90) -> MockAniList:
+    """Build a mock from parsed options"""
+    return MockAniList(
+        load_media(args.fixtures, args.media, args.seed),
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        rate_limit=rate_limit,
+        seed=args.seed
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Mock AniList GraphQL server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--rate-limit", type=int, default=90, help="X-RateLimit-Limit announced per minute")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    uvicorn.run(create_app(mock_from_args(args, args.rate_limit)), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,7 @@
 """Entry point for the application"""
-import uvicorn
-import os
-import sys
+from app.core.config import settings
+from app.server import main
 
 if __name__ == "__main__":
-    # Get port from environment or use default
-    port = int(os.getenv("PORT", 8000))
-    host = os.getenv("HOST", "0.0.0.0")
-    
-    # Run the application
-    uvicorn.run(
-        "app.main:app",
-        host=host,
-        port=port,
-        reload=True,
-        log_level="info"
-    )
+    # Auto-reload in development, tuned multi-worker server elsewhere (see app/server.py)
+    main(reload=settings.ENV == "development")